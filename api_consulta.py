@@ -4,10 +4,14 @@ Use esta API para consultar documentos de qualquer chatbot externo
 """
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
+import os
 import uvicorn
 from rag_engine import RAGEngine
+from executores import executores
+from componentes import Componentes
 
 # API simples e independente
 app = FastAPI(
@@ -16,18 +20,58 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Inicializa o RAG Engine
-rag_engine = RAGEngine(persist_directory="./chroma_db")
+# Inicializa o RAG Engine no primeiro uso ou no aquecimento (ver /ready)
+componentes = Componentes()
+rag_engine = componentes.registrar('rag_engine', lambda: RAGEngine(
+    persist_directory="./chroma_db",
+    embedding_backend=os.getenv("EMBEDDINGS_BACKEND", "huggingface"),
+    reranquear_padrao=os.getenv("RERANQUEAMENTO", "0") == "1",
+    diversificar_padrao=os.getenv("DIVERSIFICACAO_MMR", "0") == "1",
+    max_por_documento_padrao=int(os.getenv("MAX_CHUNKS_POR_DOCUMENTO", "0")) or None,
+    chunk_size=int(os.getenv("CHUNK_SIZE", "1000")),
+    chunk_overlap=int(os.getenv("CHUNK_OVERLAP", "200")),
+    janela_vizinhos_padrao=int(os.getenv("JANELA_VIZINHOS", "0")),
+    microlote_janela_ms=float(os.getenv("MICROLOTE_JANELA_MS", "0")),
+    microlote_max=int(os.getenv("MICROLOTE_MAX", "32"))
+))
+
+@app.on_event("startup")
+async def aquecer_componentes():
+    """Carrega o motor RAG em segundo plano (AQUECER_NA_INICIALIZACAO=0 desativa)"""
+    if os.getenv("AQUECER_NA_INICIALIZACAO", "1") == "1":
+        componentes.aquecer_em_segundo_plano()
 
 # Modelos
 class SearchRequest(BaseModel):
     query: str
     n_results: int = 3
+    modo: str = "vetorial"
+    projeto_ids: Optional[List[int]] = None
+    reranquear: Optional[bool] = None
+    diversificar: Optional[bool] = None
+    lambda_mmr: float = 0.5
+    max_por_documento: Optional[int] = None
+    janela_vizinhos: Optional[int] = None
     
 class SearchResponse(BaseModel):
     results: List[Dict[str, Any]]
     total_found: int
 
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+    n_results: int = 3
+    filters: Optional[Dict[str, Any]] = None
+    projeto_ids: Optional[List[int]] = None
+    reranquear: Optional[bool] = None
+    diversificar: Optional[bool] = None
+    lambda_mmr: float = 0.5
+    max_por_documento: Optional[int] = None
+    janela_vizinhos: Optional[int] = None
+
+class BatchSearchResponse(BaseModel):
+    results: List[List[Dict[str, Any]]]
+    total_queries: int
+
 # Endpoints
 
 @app.post("/search", response_model=SearchResponse)
@@ -40,42 +84,130 @@ async def search_documents(request: SearchRequest):
     POST http://localhost:8001/search
     {
         "query": "qual o conteúdo do documento X?",
-        "n_results": 3
+        "n_results": 3,
+        "modo": "hibrido"
     }
     ```
+    
+    Modos: "vetorial" (padrão), "lexico" (BM25) ou "hibrido" (ambos)
+    
+    Com "reranquear": true, mais candidatos são buscados e reordenados por
+    um cross-encoder (padrão definido por RERANQUEAMENTO=1)
+    
+    Com "diversificar": true, os resultados são escolhidos por MMR (relevância
+    menos redundância, peso "lambda_mmr"); "max_por_documento" limita quantos
+    chunks de um mesmo documento entram no resultado
+    
+    "janela_vizinhos": N devolve cada resultado junto com os N chunks anteriores
+    e seguintes do mesmo documento (trechos vizinhos unidos, sem repetição)
     """
     try:
-        results = rag_engine.search(
+        # O método é resolvido no pool: o primeiro acesso constrói o motor RAG
+        results = await executores.executar('embeddings', lambda: rag_engine.search(
             query=request.query,
-            n_results=request.n_results
-        )
+            n_results=request.n_results,
+            modo=request.modo,
+            projeto_ids=request.projeto_ids,
+            reranquear=request.reranquear,
+            diversificar=request.diversificar,
+            lambda_mmr=request.lambda_mmr,
+            max_por_documento=request.max_por_documento,
+            janela_vizinhos=request.janela_vizinhos
+        ))
         
         return {
             "results": results,
             "total_found": len(results)
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/search/batch", response_model=BatchSearchResponse)
+async def search_documents_batch(request: BatchSearchRequest):
+    """
+    Busca documentos para várias perguntas numa única requisição
+    
+    As perguntas são processadas juntas (um único cálculo de embeddings e
+    uma única consulta ao banco vetorial). Os resultados vêm na mesma ordem.
+    
+    Exemplo de uso:
+    ```
+    POST http://localhost:8001/search/batch
+    {
+        "queries": ["pergunta 1", "pergunta 2"],
+        "n_results": 3
+    }
+    ```
+    """
+    try:
+        results = await executores.executar('embeddings', lambda: rag_engine.search_batch(
+            queries=request.queries,
+            n_results=request.n_results,
+            filter_metadata=request.filters,
+            projeto_ids=request.projeto_ids,
+            reranquear=request.reranquear,
+            diversificar=request.diversificar,
+            lambda_mmr=request.lambda_mmr,
+            max_por_documento=request.max_por_documento,
+            janela_vizinhos=request.janela_vizinhos
+        ))
+        
+        return {
+            "results": results,
+            "total_queries": len(results)
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/stats")
 async def get_stats():
     """Retorna estatísticas do banco de dados"""
-    return rag_engine.get_stats()
+    return await executores.executar('disco', lambda: rag_engine.get_stats())
 
 @app.get("/documents")
-async def list_documents():
-    """Lista todos os documentos disponíveis"""
-    return rag_engine.list_documents()
+async def list_documents(limit: Optional[int] = None, offset: int = 0):
+    """Lista os documentos disponíveis, com paginação opcional"""
+    return await executores.executar('disco', lambda: rag_engine.list_documents(limit=limit, offset=offset))
 
 @app.get("/health")
 async def health_check():
-    """Verifica status da API"""
+    """Verifica status da API (liveness; não carrega o motor RAG)"""
     return {
         "status": "operational",
-        "database": "connected",
-        "total_documents": len(rag_engine.list_documents())
+        "database": "connected" if componentes.carregado('rag_engine') else "loading"
+    }
+
+@app.get("/ready")
+async def ready_check():
+    """Indica se o motor RAG já foi carregado (readiness): 200 ou 503"""
+    if not componentes.prontos():
+        return JSONResponse(
+            status_code=503,
+            content={"status": "loading", "componentes": componentes.get_stats()}
+        )
+    
+    return {
+        "status": "ready",
+        "componentes": componentes.get_stats(),
+        "total_documents": await executores.executar('disco', lambda: rag_engine.count_documents())
     }
 
+@app.get("/metricas/executores")
+async def metricas_executores():
+    """Profundidade de fila, threads ativas e tempos de espera de cada pool"""
+    return executores.get_stats()
+
+@app.get("/metricas/embeddings")
+async def metricas_embeddings():
+    """Distribuição dos micro-lotes de consultas e espera na fila"""
+    if not componentes.carregado('rag_engine'):
+        return {"microlotes": None, "status": "loading"}
+    return {"microlotes": rag_engine.get_stats_microlotes()}
+
 if __name__ == "__main__":
     print("🔍 API de Consulta RAG Iniciada!")
     print("📡 Acesse: http://localhost:8001")
@@ -0,0 +1,362 @@
+"""
+Backends de Embeddings
+Desenvolvido por: Marcio Góes do Nascimento
+
+Implementações intercambiáveis do modelo de embeddings usado pelo RAGEngine,
+escolhidas por configuração (EMBEDDINGS_BACKEND):
+
+- "huggingface": HuggingFaceEmbeddings (PyTorch), o backend original;
+- "onnx": o mesmo modelo exportado para ONNX Runtime. Gera os mesmos
+  vetores (diferenças de arredondamento) sem carregar o PyTorch na busca;
+- "onnx-int8": ONNX com quantização dinâmica int8. Mais rápido e menor,
+  mas os vetores são aproximados: o model_name recebe o sufixo
+  "#onnx-int8" para não misturar caches e para sinalizar coleções
+  indexadas com outro backend;
+- "socket": cliente do servidor_embeddings.py, um processo local que
+  mantém uma única cópia do modelo para todos os workers (Unix socket).
+
+Com o Gunicorn (gunicorn_conf.py), precarregar() carrega o modelo
+PyTorch no processo mestre antes do fork, e os workers compartilham os
+pesos por copy-on-write.
+
+Todos expõem model_name, embed_documents e embed_query, como o
+HuggingFaceEmbeddings do langchain.
+
+A exportação para ONNX (e a quantização) é feita uma única vez e salva em
+diretorio_modelos; requer torch, transformers, onnx e onnxruntime. Depois
+disso, a inferência só precisa de onnxruntime e tokenizers/transformers.
+"""
+
+import inspect
+import json
+import os
+import socket
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BACKENDS = ("huggingface", "onnx", "onnx-int8", "socket")
+
+SOCKET_PADRAO = "/tmp/rag_embeddings.sock"
+
+# Protocolo do servidor de embeddings: cada mensagem é precedida do seu
+# tamanho (4 bytes, big-endian). Pedidos são JSON; a resposta começa com
+# um byte de status (b'O' = ok, b'E' = erro) seguido do corpo.
+CABECALHO = struct.Struct('>I')
+
+# Backends carregados no processo mestre do Gunicorn, antes do fork
+_precarregados: Dict[tuple, Any] = {}
+
+
+class BackendHuggingFace:
+    """Embeddings via sentence-transformers/PyTorch (HuggingFaceEmbeddings)"""
+
+    def __init__(self, modelo: str = "sentence-transformers/all-MiniLM-L6-v2"):
+        from langchain.embeddings import HuggingFaceEmbeddings
+
+        self._embeddings = HuggingFaceEmbeddings(
+            model_name=modelo,
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'normalize_embeddings': True}
+        )
+        self.model_name = modelo
+        self.backend = "huggingface"
+
+    def embed_documents(self, textos: List[str]) -> List[List[float]]:
+        return self._embeddings.embed_documents(textos)
+
+    def embed_query(self, texto: str) -> List[float]:
+        return self._embeddings.embed_query(texto)
+
+
+class BackendOnnx:
+    """Embeddings via ONNX Runtime (mean pooling + normalização L2)"""
+
+    def __init__(self,
+                 modelo: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 quantizar: bool = False,
+                 diretorio_modelos: str = "./modelos_onnx",
+                 tamanho_lote: int = 32,
+                 max_tokens: int = 256,
+                 threads: Optional[int] = None):
+        """
+        Inicializa o backend, exportando o modelo para ONNX se necessário
+
+        Args:
+            modelo: Modelo do Hugging Face (sentence-transformers)
+            quantizar: Usa a versão com quantização dinâmica int8
+            diretorio_modelos: Onde os modelos exportados ficam salvos
+            tamanho_lote: Textos por chamada ao ONNX Runtime
+            max_tokens: Tamanho máximo da sequência (256 no all-MiniLM-L6-v2)
+            threads: Threads do ONNX Runtime (None = padrão do runtime)
+        """
+        import numpy as np
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self._np = np
+        self.modelo = modelo
+        self.quantizar = quantizar
+        self.tamanho_lote = tamanho_lote
+        self.max_tokens = max_tokens
+        self.backend = "onnx-int8" if quantizar else "onnx"
+
+        # Vetores int8 são aproximados: identificados como outro modelo
+        self.model_name = f"{modelo}#onnx-int8" if quantizar else modelo
+
+        diretorio = Path(diretorio_modelos) / modelo.replace('/', '__')
+        arquivo = self._preparar_modelo(diretorio)
+
+        self._tokenizer = AutoTokenizer.from_pretrained(str(diretorio))
+
+        opcoes = ort.SessionOptions()
+        opcoes.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opcoes.intra_op_num_threads = threads
+        self._sessao = ort.InferenceSession(str(arquivo), opcoes, providers=['CPUExecutionProvider'])
+        self._entradas = {entrada.name for entrada in self._sessao.get_inputs()}
+
+    def _preparar_modelo(self, diretorio: Path) -> Path:
+        """Exporta (e quantiza) o modelo na primeira execução"""
+        arquivo_fp32 = diretorio / "model.onnx"
+        arquivo_int8 = diretorio / "model_int8.onnx"
+
+        if not arquivo_fp32.exists():
+            print(f"Exportando '{self.modelo}' para ONNX...")
+            _exportar_onnx(self.modelo, diretorio, self.max_tokens)
+
+        if not self.quantizar:
+            return arquivo_fp32
+
+        if not arquivo_int8.exists():
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            print("Quantizando o modelo ONNX para int8...")
+            quantize_dynamic(str(arquivo_fp32), str(arquivo_int8), weight_type=QuantType.QInt8)
+
+        return arquivo_int8
+
+    def _embed(self, textos: List[str]) -> List[List[float]]:
+        np = self._np
+        resultado = [None] * len(textos)
+
+        # Lotes de textos de tamanho parecido reduzem o padding
+        ordem = sorted(range(len(textos)), key=lambda i: len(textos[i]))
+
+        for inicio in range(0, len(ordem), self.tamanho_lote):
+            indices = ordem[inicio:inicio + self.tamanho_lote]
+            tokens = self._tokenizer(
+                [textos[i] for i in indices],
+                padding=True,
+                truncation=True,
+                max_length=self.max_tokens,
+                return_tensors='np'
+            )
+            entradas = {nome: valor.astype(np.int64) for nome, valor in tokens.items() if nome in self._entradas}
+            estados = self._sessao.run(None, entradas)[0]
+
+            # Mean pooling sobre os tokens reais, seguido de normalização L2
+            mascara = tokens['attention_mask'][..., None].astype(np.float32)
+            vetores = (estados * mascara).sum(axis=1) / np.clip(mascara.sum(axis=1), 1e-9, None)
+            vetores /= np.clip(np.linalg.norm(vetores, axis=1, keepdims=True), 1e-12, None)
+
+            for i, vetor in zip(indices, vetores):
+                resultado[i] = vetor.tolist()
+
+        return resultado
+
+    def embed_documents(self, textos: List[str]) -> List[List[float]]:
+        return self._embed(textos)
+
+    def embed_query(self, texto: str) -> List[float]:
+        return self._embed([texto])[0]
+
+
+class BackendSocket:
+    """Cliente do servidor de embeddings compartilhado (servidor_embeddings.py)"""
+
+    def __init__(self, caminho_socket: Optional[str] = None, timeout: float = 60):
+        """
+        Conecta ao servidor e obtém o modelo que ele serve
+
+        Args:
+            caminho_socket: Unix socket do servidor (padrão: EMBEDDINGS_SOCKET
+                ou /tmp/rag_embeddings.sock)
+            timeout: Tempo máximo de cada pedido, em segundos
+        """
+        import numpy as np
+
+        self._np = np
+        self.caminho_socket = caminho_socket or os.getenv("EMBEDDINGS_SOCKET", SOCKET_PADRAO)
+        self.timeout = timeout
+        self._local = threading.local()
+
+        info = json.loads(self._pedir({'op': 'info'}))
+        self.model_name = info['model_name']
+        self.backend = f"socket:{info['backend']}"
+        self.dimensao = info['dimensao']
+
+    def _conexao(self) -> socket.socket:
+        """Uma conexão por thread (as buscas rodam no pool de embeddings)"""
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conexao.settimeout(self.timeout)
+            conexao.connect(self.caminho_socket)
+            self._local.conexao = conexao
+        return conexao
+
+    def _pedir(self, pedido: Dict[str, Any]) -> bytes:
+        corpo = json.dumps(pedido).encode('utf-8')
+
+        # Uma nova tentativa com outra conexão se o servidor foi reiniciado. Um
+        # timeout não é repetido: o servidor ainda está calculando o pedido
+        for tentativa in range(2):
+            try:
+                conexao = self._conexao()
+                conexao.sendall(CABECALHO.pack(len(corpo)) + corpo)
+                resposta = _receber(conexao, CABECALHO.unpack(_receber(conexao, CABECALHO.size))[0])
+                break
+            except socket.timeout:
+                self._fechar()
+                raise
+            except (ConnectionError, FileNotFoundError):
+                self._fechar()
+                if tentativa:
+                    raise
+            except OSError:
+                self._fechar()
+                raise
+
+        if resposta[:1] == b'E':
+            raise RuntimeError(f"Servidor de embeddings: {resposta[1:].decode('utf-8')}")
+        return resposta[1:]
+
+    def _fechar(self):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is not None:
+            conexao.close()
+            self._local.conexao = None
+
+    def embed_documents(self, textos: List[str]) -> List[List[float]]:
+        if not textos:
+            return []
+        vetores = self._np.frombuffer(self._pedir({'op': 'embed', 'textos': textos}), dtype=self._np.float32)
+        return vetores.reshape(len(textos), self.dimensao).tolist()
+
+    def embed_query(self, texto: str) -> List[float]:
+        return self.embed_documents([texto])[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do servidor (lotes, pedidos, tamanho médio do lote)"""
+        return json.loads(self._pedir({'op': 'stats'}))
+
+
+def _receber(conexao: socket.socket, tamanho: int) -> bytes:
+    """Lê exatamente `tamanho` bytes do socket"""
+    partes = []
+    while tamanho:
+        parte = conexao.recv(min(tamanho, 1 << 20))
+        if not parte:
+            raise ConnectionError("Conexão com o servidor de embeddings encerrada")
+        partes.append(parte)
+        tamanho -= len(parte)
+    return b''.join(partes)
+
+
+_lock_exportacao = threading.Lock()
+
+
+def _exportar_onnx(modelo: str, diretorio: Path, max_tokens: int):
+    """Exporta o transformer do modelo para ONNX, com eixos dinâmicos"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    with _lock_exportacao:
+        diretorio.mkdir(parents=True, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(modelo)
+        transformer = AutoModel.from_pretrained(modelo)
+        transformer.eval()
+
+        class Encoder(torch.nn.Module):
+            """Recebe as entradas por nome e devolve só o last_hidden_state"""
+
+            def __init__(self, nomes):
+                super().__init__()
+                self.transformer = transformer
+                self.nomes = nomes
+
+            def forward(self, *entradas):
+                return self.transformer(**dict(zip(self.nomes, entradas)))[0]
+
+        exemplo = tokenizer(["exemplo de texto"], padding='max_length', max_length=max_tokens,
+                            truncation=True, return_tensors='pt')
+        nomes = [nome for nome in ('input_ids', 'attention_mask', 'token_type_ids') if nome in exemplo]
+        eixos = {nome: {0: 'lote', 1: 'sequencia'} for nome in nomes}
+        eixos['last_hidden_state'] = {0: 'lote', 1: 'sequencia'}
+
+        # Exportador TorchScript (as versões novas do PyTorch usam o dynamo por padrão)
+        opcoes = {}
+        if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+            opcoes['dynamo'] = False
+
+        # Grava num arquivo temporário para não deixar um modelo incompleto
+        temporario = diretorio / "model.onnx.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                Encoder(nomes),
+                tuple(exemplo[nome] for nome in nomes),
+                str(temporario),
+                input_names=nomes,
+                output_names=['last_hidden_state'],
+                dynamic_axes=eixos,
+                opset_version=14,
+                **opcoes
+            )
+        tokenizer.save_pretrained(str(diretorio))
+        os.replace(temporario, diretorio / "model.onnx")
+
+
+def precarregar(nome: str = "huggingface",
+                modelo: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    """
+    Carrega um backend para ser reaproveitado por criar_backend
+
+    Chamado no processo mestre do Gunicorn (preload) para que os workers
+    criados por fork compartilhem os pesos do modelo. Só o backend
+    PyTorch é seguro para isso: a sessão do ONNX Runtime cria threads
+    ao ser construída, e threads não sobrevivem ao fork.
+    """
+    if nome != "huggingface":
+        raise ValueError(f"Backend '{nome}' não pode ser pré-carregado antes do fork; use o servidor de embeddings")
+
+    if (nome, modelo) not in _precarregados:
+        _precarregados[(nome, modelo)] = BackendHuggingFace(modelo)
+    return _precarregados[(nome, modelo)]
+
+
+def criar_backend(nome: str = "huggingface",
+                  modelo: str = "sentence-transformers/all-MiniLM-L6-v2",
+                  **kwargs):
+    """
+    Cria o backend de embeddings pelo nome
+
+    Args:
+        nome: "huggingface", "onnx", "onnx-int8" ou "socket"
+        modelo: Modelo de embeddings (no "socket", o modelo é o do servidor)
+        **kwargs: Opções do BackendOnnx (diretorio_modelos, threads, ...)
+            ou do BackendSocket (caminho_socket, timeout)
+
+    Returns:
+        Backend com model_name, embed_documents e embed_query
+    """
+    if (nome, modelo) in _precarregados:
+        return _precarregados[(nome, modelo)]
+    if nome == "socket":
+        return BackendSocket(**kwargs)
+    if nome == "huggingface":
+        return BackendHuggingFace(modelo)
+    if nome in ("onnx", "onnx-int8"):
+        return BackendOnnx(modelo, quantizar=(nome == "onnx-int8"), **kwargs)
+    raise ValueError(f"Backend de embeddings inválido: {nome}. Use: {', '.join(BACKENDS)}")
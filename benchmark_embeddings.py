@@ -0,0 +1,176 @@
+"""
+Benchmark de Backends de Embeddings
+Desenvolvido por: Marcio Góes do Nascimento
+
+Compara os backends de embeddings (huggingface, onnx, onnx-int8) em:
+
+- frases por segundo ao embutir o corpus;
+- memória residente (RSS) do processo depois de carregar o modelo e
+  embutir o corpus (cada backend roda num processo separado);
+- recall@k das buscas em relação ao backend de referência (os k chunks
+  mais próximos de cada pergunta coincidem?).
+
+O corpus vem de um arquivo (um texto por linha) ou dos chunks já
+indexados no banco vetorial.
+
+Uso:
+    python benchmark_embeddings.py --banco ./chroma_db --max-textos 2000 --k 5
+    python benchmark_embeddings.py --corpus textos.txt --backends huggingface onnx-int8
+"""
+
+import argparse
+import multiprocessing
+import resource
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from backends_embeddings import BACKENDS, criar_backend
+
+PERGUNTAS_PADRAO = [
+    "Qual o objetivo do documento?",
+    "Quais são os prazos definidos?",
+    "Quem são as partes envolvidas?",
+    "Quais os valores mencionados?",
+    "Quais são as obrigações do contratado?",
+    "Como é feito o pagamento?",
+    "Quais as penalidades previstas?",
+    "Qual a vigência do contrato?"
+]
+
+
+def rss_mb() -> float:
+    """Memória residente atual do processo, em MB"""
+    try:
+        with open('/proc/self/status') as f:
+            for linha in f:
+                if linha.startswith('VmRSS:'):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    # Sem /proc (macOS): pico de memória, em bytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024)
+
+
+def carregar_corpus(banco: str, max_textos: int) -> List[str]:
+    """Lê até max_textos chunks das coleções do banco vetorial"""
+    import chromadb
+    from exportacao_streaming import iterar_chunks
+
+    cliente = chromadb.PersistentClient(path=banco)
+    textos = []
+    for colecao in cliente.list_collections():
+        colecao = cliente.get_collection(getattr(colecao, 'name', colecao))
+        for _, conteudo, _ in iterar_chunks(colecao):
+            textos.append(conteudo)
+            if len(textos) >= max_textos:
+                return textos
+    return textos
+
+
+def medir_backend(nome: str, modelo: str, textos: List[str], perguntas: List[str], fila):
+    """Executado num processo separado: carrega o backend e mede tudo"""
+    inicio = time.perf_counter()
+    backend = criar_backend(nome, modelo)
+    carga = time.perf_counter() - inicio
+
+    # Aquece o modelo antes de medir
+    backend.embed_documents(textos[:8])
+
+    inicio = time.perf_counter()
+    documentos = backend.embed_documents(textos)
+    duracao = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    consultas = [backend.embed_query(p) for p in perguntas]
+    latencia_consulta = (time.perf_counter() - inicio) * 1000 / len(perguntas)
+
+    fila.put({
+        'backend': nome,
+        'model_name': backend.model_name,
+        'carga_s': carga,
+        'frases_por_s': len(textos) / duracao,
+        'consulta_ms': latencia_consulta,
+        'rss_mb': rss_mb(),
+        'documentos': np.asarray(documentos, dtype=np.float32),
+        'consultas': np.asarray(consultas, dtype=np.float32)
+    })
+
+
+def recall_k(referencia: Dict[str, Any], resultado: Dict[str, Any], k: int) -> float:
+    """Fração dos k vizinhos da referência também retornados pelo backend"""
+    def vizinhos(medicao):
+        similaridades = medicao['consultas'] @ medicao['documentos'].T
+        return np.argsort(-similaridades, axis=1)[:, :k]
+
+    esperados = vizinhos(referencia)
+    obtidos = vizinhos(resultado)
+    acertos = [len(set(e) & set(o)) / k for e, o in zip(esperados, obtidos)]
+    return float(np.mean(acertos))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de embeddings")
+    parser.add_argument("--backends", nargs='+', default=list(BACKENDS), choices=BACKENDS,
+                        help="Backends comparados; o primeiro é a referência do recall")
+    parser.add_argument("--modelo", default="sentence-transformers/all-MiniLM-L6-v2", help="Modelo de embeddings")
+    parser.add_argument("--banco", default="./chroma_db", help="Banco vetorial usado como corpus")
+    parser.add_argument("--corpus", help="Arquivo com um texto por linha (em vez do banco)")
+    parser.add_argument("--perguntas", help="Arquivo com uma pergunta por linha")
+    parser.add_argument("--max-textos", type=int, default=2000, help="Máximo de textos do corpus")
+    parser.add_argument("--k", type=int, default=5, help="k do recall@k")
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, encoding='utf-8') as f:
+            textos = [linha.strip() for linha in f if linha.strip()][:args.max_textos]
+    else:
+        textos = carregar_corpus(args.banco, args.max_textos)
+
+    if len(textos) < args.k:
+        print("❌ Corpus muito pequeno. Indexe documentos ou use --corpus.")
+        return
+
+    perguntas = PERGUNTAS_PADRAO
+    if args.perguntas:
+        with open(args.perguntas, encoding='utf-8') as f:
+            perguntas = [linha.strip() for linha in f if linha.strip()]
+
+    print("=" * 60)
+    print("📊 BENCHMARK DE BACKENDS DE EMBEDDINGS")
+    print("=" * 60)
+    print(f"   Textos: {len(textos)}   perguntas: {len(perguntas)}   k: {args.k}")
+
+    # Processo novo por backend: o RSS de um não contamina o do outro
+    contexto = multiprocessing.get_context('spawn')
+    medicoes = []
+    for nome in args.backends:
+        fila = contexto.Queue()
+        processo = contexto.Process(target=medir_backend, args=(nome, args.modelo, textos, perguntas, fila))
+        processo.start()
+        medicoes.append(fila.get())
+        processo.join()
+
+    referencia = medicoes[0]
+    print()
+    print(f"   {'Backend':<13}{'frases/s':>10}{'consulta':>12}{'RSS':>10}{'carga':>9}{f'recall@{args.k}':>11}")
+    for medicao in medicoes:
+        print(
+            f"   {medicao['backend']:<13}"
+            f"{medicao['frases_por_s']:>10.1f}"
+            f"{medicao['consulta_ms']:>9.1f} ms"
+            f"{medicao['rss_mb']:>7.0f} MB"
+            f"{medicao['carga_s']:>8.1f}s"
+            f"{recall_k(referencia, medicao, args.k):>11.3f}"
+        )
+
+    print(f"\n   Referência do recall: {referencia['backend']}")
+    for medicao in medicoes:
+        if medicao['model_name'] != referencia['model_name']:
+            print(f"   ⚠️ {medicao['backend']} gera vetores aproximados ({medicao['model_name']}): "
+                  f"reindexe antes de usá-lo com uma coleção existente")
+
+
+if __name__ == "__main__":
+    main()
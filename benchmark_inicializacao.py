@@ -0,0 +1,150 @@
+"""
+Benchmark de Inicialização
+Desenvolvido por: Marcio Góes do Nascimento
+
+Mede, num processo Python novo para cada módulo (main, api_consulta):
+
+- tempo e memória (RSS) para importar o módulo, que é o que o servidor
+  paga antes de responder a /health;
+- quais bibliotecas pesadas já foram importadas nesse momento;
+- tempo e memória depois do aquecimento dos componentes (o que /ready espera).
+
+Cada execução é acrescentada a um histórico JSONL (com data e commit),
+para acompanhar a evolução, e comparada com a execução anterior.
+
+Uso:
+    python benchmark_inicializacao.py
+    python benchmark_inicializacao.py --modulos main --sem-aquecimento
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+BIBLIOTECAS_PESADAS = ("torch", "sentence_transformers", "transformers", "chromadb",
+                       "langchain", "onnxruntime", "anthropic", "openai")
+
+# Executado no processo filho; imprime o resultado em JSON na última linha
+SCRIPT_MEDICAO = """
+import json, sys, time
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for linha in f:
+                if linha.startswith('VmRSS:'):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024)
+
+modulo, aquecer, pesadas = sys.argv[1], sys.argv[2] == '1', sys.argv[3].split(',')
+resultado = {'rss_python_mb': rss_mb()}
+
+inicio = time.perf_counter()
+app = __import__(modulo)
+resultado['importacao_s'] = time.perf_counter() - inicio
+resultado['rss_importacao_mb'] = rss_mb()
+resultado['pesadas_na_importacao'] = [b for b in pesadas if b in sys.modules]
+
+if aquecer and hasattr(app, 'componentes'):
+    inicio = time.perf_counter()
+    app.componentes.aquecer()
+    resultado['aquecimento_s'] = time.perf_counter() - inicio
+    resultado['rss_aquecido_mb'] = rss_mb()
+    resultado['componentes'] = app.componentes.get_stats()
+
+print(json.dumps(resultado))
+"""
+
+
+def medir(modulo: str, aquecer: bool) -> Dict[str, Any]:
+    """Importa (e aquece) o módulo num processo novo"""
+    processo = subprocess.run(
+        [sys.executable, "-c", SCRIPT_MEDICAO, modulo, "1" if aquecer else "0", ",".join(BIBLIOTECAS_PESADAS)],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, AQUECER_NA_INICIALIZACAO="0")
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(f"Falha ao medir '{modulo}':\n{processo.stderr[-2000:]}")
+    return json.loads(processo.stdout.strip().splitlines()[-1])
+
+
+def commit_atual() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def ultima_execucao(historico: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(historico):
+        return None
+    with open(historico, encoding='utf-8') as f:
+        linhas = [linha for linha in f if linha.strip()]
+    return json.loads(linhas[-1]) if linhas else None
+
+
+def variacao(atual: float, anterior: Optional[float], unidade: str) -> str:
+    if anterior is None:
+        return ""
+    return f" ({atual - anterior:+.2f}{unidade})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização dos servidores")
+    parser.add_argument("--modulos", nargs='+', default=["main", "api_consulta"], help="Módulos medidos")
+    parser.add_argument("--sem-aquecimento", action="store_true", help="Mede só a importação")
+    parser.add_argument("--historico", default="./benchmarks/inicializacao.jsonl", help="Arquivo do histórico")
+    args = parser.parse_args()
+
+    anterior = ultima_execucao(args.historico)
+    execucao = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_atual(),
+        'modulos': {}
+    }
+
+    print("=" * 60)
+    print("📊 BENCHMARK DE INICIALIZAÇÃO")
+    print("=" * 60)
+
+    for modulo in args.modulos:
+        resultado = medir(modulo, not args.sem_aquecimento)
+        execucao['modulos'][modulo] = resultado
+        antes = (anterior or {}).get('modulos', {}).get(modulo, {})
+
+        print(f"\n   {modulo}")
+        print(f"     Importação:  {resultado['importacao_s']:6.2f}s"
+              f"{variacao(resultado['importacao_s'], antes.get('importacao_s'), 's')}"
+              f"   RSS {resultado['rss_importacao_mb']:6.0f} MB"
+              f"{variacao(resultado['rss_importacao_mb'], antes.get('rss_importacao_mb'), ' MB')}")
+        print(f"     Pesadas já importadas: {', '.join(resultado['pesadas_na_importacao']) or 'nenhuma'}")
+        if 'aquecimento_s' in resultado:
+            print(f"     Aquecimento: {resultado['aquecimento_s']:6.2f}s"
+                  f"{variacao(resultado['aquecimento_s'], antes.get('aquecimento_s'), 's')}"
+                  f"   RSS {resultado['rss_aquecido_mb']:6.0f} MB"
+                  f"{variacao(resultado['rss_aquecido_mb'], antes.get('rss_aquecido_mb'), ' MB')}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.historico)), exist_ok=True)
+    with open(args.historico, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(execucao, ensure_ascii=False) + "\n")
+
+    if anterior:
+        print(f"\n   Comparado com {anterior['data']} ({anterior.get('commit') or 'sem commit'})")
+    print(f"   Histórico: {args.historico}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark de Extração de PDF
+Desenvolvido por: Marcio Góes do Nascimento
+
+Compara páginas/segundo da extração serial com a extração paralela
+(pool de processos) do DocumentProcessor.
+
+Uso:
+    python benchmark_pdf.py manual.pdf --workers 8 --repeticoes 3
+"""
+
+import argparse
+import os
+import time
+
+import PyPDF2
+
+from document_processor import DocumentProcessor
+
+
+def medir(processor: DocumentProcessor, file_path: str, workers: int, repeticoes: int) -> float:
+    """Retorna o melhor tempo (segundos) entre as repetições"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        processor.process_pdf(file_path, workers=workers)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extração de PDF")
+    parser.add_argument("arquivo", help="Caminho do PDF")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Processos do modo paralelo")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Repetições por modo")
+    args = parser.parse_args()
+
+    with open(args.arquivo, 'rb') as f:
+        total_paginas = len(PyPDF2.PdfReader(f).pages)
+
+    processor = DocumentProcessor(pdf_workers=args.workers, min_paginas_paralelo=1)
+
+    print("=" * 60)
+    print("📊 BENCHMARK DE EXTRAÇÃO DE PDF")
+    print("=" * 60)
+    print(f"   Arquivo: {args.arquivo} ({total_paginas} páginas)")
+
+    # Aquece o pool para não medir a criação dos processos
+    processor.process_pdf(args.arquivo, workers=args.workers)
+
+    serial = medir(processor, args.arquivo, 1, args.repeticoes)
+    paralelo = medir(processor, args.arquivo, args.workers, args.repeticoes)
+    processor.encerrar()
+
+    print(f"\n   Serial:             {serial:8.2f}s  {total_paginas / serial:8.1f} páginas/s")
+    print(f"   Paralelo ({args.workers:>2} proc): {paralelo:8.2f}s  {total_paginas / paralelo:8.1f} páginas/s")
+    print(f"\n   Speedup: {serial / paralelo:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark de Reranqueamento
+Desenvolvido por: Marcio Góes do Nascimento
+
+Mede a latência (p50/p95) da busca com e sem o reranqueamento por
+cross-encoder sobre o banco vetorial existente, com o cache de scores
+frio e quente.
+
+Uso:
+    python benchmark_reranqueamento.py --perguntas perguntas.txt --n-results 3 --candidatos 20
+"""
+
+import argparse
+import time
+from typing import List, Optional, Tuple
+
+from rag_engine import RAGEngine
+
+PERGUNTAS_PADRAO = [
+    "Qual o objetivo do documento?",
+    "Quais são os prazos definidos?",
+    "Quem são as partes envolvidas?",
+    "Quais os valores mencionados?",
+    "Quais são as obrigações do contratado?",
+    "Como é feito o pagamento?",
+    "Quais as penalidades previstas?",
+    "Qual a vigência do contrato?"
+]
+
+
+def percentis(tempos: List[float]) -> Tuple[float, float]:
+    """Retorna (p50, p95) das latências"""
+    ordenados = sorted(tempos)
+
+    def p(q: float) -> float:
+        return ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))]
+
+    return p(0.50), p(0.95)
+
+
+def linha(rotulo: str, tempos: List[float], base: Optional[List[float]] = None) -> str:
+    p50, p95 = percentis(tempos)
+    texto = f"   {rotulo:<22}p50 {p50:8.1f} ms   p95 {p95:8.1f} ms"
+    if base:
+        base50, base95 = percentis(base)
+        texto += f"   ({p50 - base50:+.1f} / {p95 - base95:+.1f} ms)"
+    return texto
+
+
+def medir(rag_engine: RAGEngine, perguntas: List[str], repeticoes: int, **kwargs) -> List[float]:
+    """Retorna a latência (ms) de cada busca"""
+    tempos = []
+    for _ in range(repeticoes):
+        for pergunta in perguntas:
+            inicio = time.perf_counter()
+            rag_engine.search(pergunta, **kwargs)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do reranqueamento por cross-encoder")
+    parser.add_argument("--banco", default="./chroma_db", help="Diretório do banco vetorial")
+    parser.add_argument("--perguntas", help="Arquivo com uma pergunta por linha")
+    parser.add_argument("--n-results", type=int, default=3, help="Resultados por busca")
+    parser.add_argument("--candidatos", type=int, default=20, help="Candidatos reranqueados por busca")
+    parser.add_argument("--orcamento-ms", type=float, default=10_000, help="Orçamento do reranqueamento")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Repetições do conjunto de perguntas")
+    args = parser.parse_args()
+
+    perguntas = PERGUNTAS_PADRAO
+    if args.perguntas:
+        with open(args.perguntas, encoding='utf-8') as f:
+            perguntas = [linha.strip() for linha in f if linha.strip()]
+
+    rag_engine = RAGEngine(persist_directory=args.banco, reranqueador_orcamento_ms=args.orcamento_ms)
+
+    print("=" * 60)
+    print("📊 BENCHMARK DE RERANQUEAMENTO")
+    print("=" * 60)
+    print(f"   Perguntas: {len(perguntas)} x {args.repeticoes}   candidatos: {args.candidatos}")
+
+    # Aquece o modelo de embeddings, o cache de consultas e o cross-encoder
+    medir(rag_engine, perguntas[:1], 1, n_results=args.n_results, reranquear=True, n_candidatos=args.candidatos)
+    rag_engine.reranqueador.limpar()
+
+    sem = medir(rag_engine, perguntas, args.repeticoes, n_results=args.n_results)
+
+    frio = []
+    for _ in range(args.repeticoes):
+        rag_engine.reranqueador.limpar()
+        frio += medir(rag_engine, perguntas, 1, n_results=args.n_results,
+                      reranquear=True, n_candidatos=args.candidatos)
+
+    quente = medir(rag_engine, perguntas, args.repeticoes, n_results=args.n_results,
+                   reranquear=True, n_candidatos=args.candidatos)
+
+    stats = rag_engine.reranqueador.get_stats()
+
+    print()
+    print(linha("Sem reranqueamento:", sem))
+    print(linha("Com (cache frio):", frio, sem))
+    print(linha("Com (cache quente):", quente, sem))
+    print(f"\n   Fallbacks por orçamento: {stats['fallbacks']} de {stats['chamadas']} chamadas")
+
+
+if __name__ == "__main__":
+    main()
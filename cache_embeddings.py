@@ -0,0 +1,259 @@
+"""
+Cache de Embeddings
+Desenvolvido por: Marcio Góes do Nascimento
+
+Cache persistente (SQLite) de embeddings de chunks, endereçado pelo
+conteúdo: a chave é (modelo de embeddings, hash do texto normalizado).
+Re-uploads e documentos levemente editados só pagam pelos chunks novos.
+
+Também contém o cache em memória de embeddings de consultas, usado pelo
+RAGEngine.search para perguntas repetidas.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+
+def normalizar_texto(texto: str) -> str:
+    """Normaliza o texto (unicode NFC e espaços) antes de calcular o hash"""
+    texto = unicodedata.normalize('NFC', texto)
+    return ' '.join(texto.split())
+
+
+def hash_texto(texto: str) -> str:
+    """Retorna o hash SHA-256 do texto normalizado"""
+    return hashlib.sha256(normalizar_texto(texto).encode('utf-8')).hexdigest()
+
+
+class CacheEmbeddings:
+    """Cache LRU em disco para embeddings de chunks"""
+
+    def __init__(self,
+                 arquivo_cache: str = "./chroma_db/cache_embeddings.db",
+                 max_entradas: int = 200_000):
+        """
+        Inicializa o cache
+
+        Args:
+            arquivo_cache: Caminho do arquivo SQLite do cache
+            max_entradas: Número máximo de embeddings mantidos (LRU)
+        """
+        self.arquivo_cache = arquivo_cache
+        self.max_entradas = max_entradas
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        Path(arquivo_cache).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(arquivo_cache, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                modelo TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                vetor BLOB NOT NULL,
+                ultimo_acesso REAL NOT NULL,
+                PRIMARY KEY (modelo, hash)
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_acesso ON embeddings (ultimo_acesso)"
+        )
+        self._conn.commit()
+
+    def buscar(self, modelo: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """
+        Busca embeddings já calculados
+
+        Args:
+            modelo: Nome do modelo de embeddings
+            hashes: Hashes dos textos normalizados
+
+        Returns:
+            Dicionário hash -> embedding apenas para os hashes encontrados
+        """
+        encontrados = {}
+        unicos = list(dict.fromkeys(hashes))
+
+        with self._lock:
+            # SQLite limita o número de parâmetros por consulta
+            for inicio in range(0, len(unicos), 500):
+                lote = unicos[inicio:inicio + 500]
+                marcadores = ','.join('?' * len(lote))
+                linhas = self._conn.execute(
+                    f"SELECT hash, vetor FROM embeddings WHERE modelo = ? AND hash IN ({marcadores})",
+                    [modelo, *lote]
+                ).fetchall()
+                for h, vetor in linhas:
+                    encontrados[h] = array('f', vetor).tolist()
+
+            if encontrados:
+                agora = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET ultimo_acesso = ? WHERE modelo = ? AND hash = ?",
+                    [(agora, modelo, h) for h in encontrados]
+                )
+                self._conn.commit()
+
+            self.hits += sum(1 for h in hashes if h in encontrados)
+            self.misses += sum(1 for h in hashes if h not in encontrados)
+
+        return encontrados
+
+    def salvar(self, modelo: str, embeddings: Dict[str, List[float]]):
+        """
+        Salva embeddings no cache e aplica a política LRU
+
+        Args:
+            modelo: Nome do modelo de embeddings
+            embeddings: Dicionário hash -> embedding
+        """
+        if not embeddings:
+            return
+
+        agora = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (modelo, hash, vetor, ultimo_acesso) VALUES (?, ?, ?, ?)",
+                [(modelo, h, array('f', vetor).tobytes(), agora) for h, vetor in embeddings.items()]
+            )
+            self._remover_excedentes()
+            self._conn.commit()
+
+    def _remover_excedentes(self):
+        """Remove as entradas menos usadas quando o cache passa do limite"""
+        total = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excedente = total - self.max_entradas
+        if excedente > 0:
+            self._conn.execute(
+                """DELETE FROM embeddings WHERE rowid IN (
+                       SELECT rowid FROM embeddings ORDER BY ultimo_acesso ASC LIMIT ?
+                   )""",
+                (excedente,)
+            )
+
+    def limpar(self):
+        """Remove todas as entradas do cache"""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna contadores de uso do cache"""
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        consultas = self.hits + self.misses
+
+        return {
+            'entradas': total,
+            'max_entradas': self.max_entradas,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / consultas, 4) if consultas else 0.0
+        }
+
+
+class CacheConsultas:
+    """Cache LRU em memória, thread-safe e com TTL, para embeddings de consultas"""
+
+    def __init__(self, capacidade: int = 1024, ttl_segundos: float = 3600):
+        """
+        Inicializa o cache
+
+        Args:
+            capacidade: Número máximo de consultas mantidas
+            ttl_segundos: Tempo de vida de cada entrada
+        """
+        self.capacidade = capacidade
+        self.ttl_segundos = ttl_segundos
+        self.modelo: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self._entradas: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _chave(modelo: str, consulta: str) -> tuple:
+        return (modelo, normalizar_texto(consulta))
+
+    def _verificar_modelo(self, modelo: str):
+        """Invalida o cache se o modelo de embeddings mudou"""
+        if self.modelo != modelo:
+            self._entradas.clear()
+            self.modelo = modelo
+
+    def buscar(self, modelo: str, consulta: str) -> Optional[List[float]]:
+        """
+        Busca o embedding de uma consulta
+
+        Args:
+            modelo: Nome do modelo de embeddings
+            consulta: Texto da consulta
+
+        Returns:
+            Embedding em cache ou None
+        """
+        chave = self._chave(modelo, consulta)
+
+        with self._lock:
+            self._verificar_modelo(modelo)
+            entrada = self._entradas.get(chave)
+
+            if entrada is None or time.monotonic() - entrada[1] > self.ttl_segundos:
+                if entrada is not None:
+                    del self._entradas[chave]
+                self.misses += 1
+                return None
+
+            self._entradas.move_to_end(chave)
+            self.hits += 1
+            return entrada[0]
+
+    def salvar(self, modelo: str, consulta: str, embedding: List[float]):
+        """
+        Salva o embedding de uma consulta
+
+        Args:
+            modelo: Nome do modelo de embeddings
+            consulta: Texto da consulta
+            embedding: Embedding calculado
+        """
+        if self.capacidade <= 0:
+            return
+
+        chave = self._chave(modelo, consulta)
+
+        with self._lock:
+            self._verificar_modelo(modelo)
+            self._entradas[chave] = (embedding, time.monotonic())
+            self._entradas.move_to_end(chave)
+
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+
+    def limpar(self):
+        """Remove todas as entradas do cache"""
+        with self._lock:
+            self._entradas.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna contadores de uso do cache"""
+        with self._lock:
+            total = len(self._entradas)
+        consultas = self.hits + self.misses
+
+        return {
+            'entradas': total,
+            'capacidade': self.capacidade,
+            'ttl_segundos': self.ttl_segundos,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / consultas, 4) if consultas else 0.0
+        }
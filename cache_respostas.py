@@ -0,0 +1,163 @@
+"""
+Cache Semântico de Respostas
+Desenvolvido por: Marcio Góes do Nascimento
+
+Cache em memória das respostas do LLM, na frente da chamada ao modelo.
+Uma pergunta reaproveita uma resposta anterior quando:
+
+- recuperou exatamente os mesmos chunks (IDs e conteúdo), e
+- seu embedding é suficientemente similar ao da pergunta original.
+
+A chave inclui os chunks recuperados, então qualquer alteração nos
+documentos (novo upload, remoção, edição) muda a chave e invalida as
+respostas antigas naturalmente.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+def chave_contexto(context_docs: List[Dict[str, Any]]) -> str:
+    """
+    Calcula a chave do conjunto de chunks recuperados
+
+    Args:
+        context_docs: Resultados da busca (com 'id' e 'content')
+
+    Returns:
+        Hash dos IDs e conteúdos, independente da ordem
+    """
+    digest = hashlib.sha256()
+    for doc in sorted(context_docs, key=lambda d: d.get('id') or ''):
+        digest.update((doc.get('id') or '').encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(hashlib.sha256(doc.get('content', '').encode('utf-8')).digest())
+    return digest.hexdigest()
+
+
+def _normalizar(vetor: List[float]) -> List[float]:
+    norma = math.sqrt(sum(v * v for v in vetor)) or 1.0
+    return [v / norma for v in vetor]
+
+
+class CacheRespostas:
+    """Cache LRU em memória, thread-safe e com TTL, de respostas do LLM"""
+
+    def __init__(self,
+                 capacidade: int = 512,
+                 ttl_segundos: float = 3600,
+                 limiar_similaridade: float = 0.95):
+        """
+        Inicializa o cache
+
+        Args:
+            capacidade: Número máximo de respostas mantidas
+            ttl_segundos: Tempo de vida de cada resposta
+            limiar_similaridade: Similaridade de cosseno mínima entre as perguntas
+        """
+        self.capacidade = capacidade
+        self.ttl_segundos = ttl_segundos
+        self.limiar_similaridade = limiar_similaridade
+        self.hits = 0
+        self.misses = 0
+        self.latencia_economizada = 0.0
+        self._proximo_id = 0
+        # id -> (chave do contexto, embedding normalizado, resposta, latência do LLM, criado em)
+        self._entradas: "OrderedDict[int, tuple]" = OrderedDict()
+        # chave do contexto -> ids das entradas com esse contexto
+        self._por_contexto: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def buscar(self, embedding: List[float], contexto: str) -> Optional[str]:
+        """
+        Busca uma resposta para uma pergunta semelhante com o mesmo contexto
+
+        Args:
+            embedding: Embedding da pergunta
+            contexto: Chave dos chunks recuperados (chave_contexto)
+
+        Returns:
+            Resposta em cache ou None
+        """
+        consulta = _normalizar(embedding)
+        agora = time.monotonic()
+
+        with self._lock:
+            melhor_id, melhor_similaridade = None, self.limiar_similaridade
+
+            for entrada_id in list(self._por_contexto.get(contexto, ())):
+                _, vetor, _, _, criado_em = self._entradas[entrada_id]
+                if agora - criado_em > self.ttl_segundos:
+                    self._remover(entrada_id)
+                    continue
+
+                similaridade = sum(a * b for a, b in zip(consulta, vetor))
+                if similaridade >= melhor_similaridade:
+                    melhor_id, melhor_similaridade = entrada_id, similaridade
+
+            if melhor_id is None:
+                self.misses += 1
+                return None
+
+            self._entradas.move_to_end(melhor_id)
+            _, _, resposta, latencia, _ = self._entradas[melhor_id]
+            self.hits += 1
+            self.latencia_economizada += latencia
+            return resposta
+
+    def salvar(self, embedding: List[float], contexto: str, resposta: str, latencia: float):
+        """
+        Salva a resposta do LLM para uma pergunta
+
+        Args:
+            embedding: Embedding da pergunta
+            contexto: Chave dos chunks recuperados (chave_contexto)
+            resposta: Resposta gerada
+            latencia: Tempo da chamada ao LLM, em segundos
+        """
+        if self.capacidade <= 0:
+            return
+
+        with self._lock:
+            entrada_id = self._proximo_id
+            self._proximo_id += 1
+            self._entradas[entrada_id] = (contexto, _normalizar(embedding), resposta, latencia, time.monotonic())
+            self._por_contexto.setdefault(contexto, []).append(entrada_id)
+
+            while len(self._entradas) > self.capacidade:
+                self._remover(next(iter(self._entradas)))
+
+    def _remover(self, entrada_id: int):
+        """Remove uma entrada (chamar com o lock adquirido)"""
+        contexto = self._entradas.pop(entrada_id)[0]
+        ids = self._por_contexto[contexto]
+        ids.remove(entrada_id)
+        if not ids:
+            del self._por_contexto[contexto]
+
+    def limpar(self):
+        """Remove todas as respostas do cache"""
+        with self._lock:
+            self._entradas.clear()
+            self._por_contexto.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna contadores de uso do cache"""
+        with self._lock:
+            total = len(self._entradas)
+        consultas = self.hits + self.misses
+
+        return {
+            'entradas': total,
+            'capacidade': self.capacidade,
+            'ttl_segundos': self.ttl_segundos,
+            'limiar_similaridade': self.limiar_similaridade,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / consultas, 4) if consultas else 0.0,
+            'latencia_economizada_s': round(self.latencia_economizada, 3)
+        }
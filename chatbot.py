@@ -1,23 +1,138 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from collections import deque
+import asyncio
 import os
+import random
+import time
+import threading
 from rag_engine import RAGEngine
+from executores import executores
+from cache_respostas import CacheRespostas, chave_contexto
+from empacotador_contexto import EmpacotadorContexto
+
+
+MODELO_ANTHROPIC = "claude-sonnet-4-20250514"
+MODELO_OPENAI = "gpt-4"
+
+MENSAGEM_ERRO_LLM = "Desculpe, ocorreu um erro ao processar sua mensagem: "
+
+# Status HTTP que justificam uma nova tentativa (sobrecarga, limite de taxa, falha do servidor)
+STATUS_TRANSITORIOS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+SYSTEM_PROMPT = """Você é um assistente útil que responde perguntas baseado em documentos fornecidos.
+
+Suas responsabilidades:
+1. Use APENAS as informações dos documentos fornecidos para responder
+2. Se a resposta não estiver nos documentos, diga claramente que não encontrou a informação
+3. Cite os documentos quando relevante
+4. Seja conciso mas completo
+5. Responda em português do Brasil"""
+
+
+def _erro_transitorio(erro: Exception) -> bool:
+    """Indica se uma falha do LLM pode ser resolvida tentando novamente"""
+    if isinstance(erro, asyncio.TimeoutError):
+        return True
+    if any(classe.__name__ == 'APIConnectionError' for classe in type(erro).__mro__):
+        return True
+    return getattr(erro, 'status_code', None) in STATUS_TRANSITORIOS
+
+
+class LLMFalso:
+    """
+    Provedor local que simula um LLM com respostas prontas
+    
+    Usado com llm_provider="fake" para testar o chatbot (inclusive o
+    streaming) sem rede e sem chave de API.
+    """
+    
+    def __init__(self, atraso_token: float = 0.02):
+        self.atraso_token = atraso_token
+    
+    def responder(self, user_message: str, context_text: str) -> str:
+        """Monta a resposta simulada"""
+        n_docs = context_text.count("Documento: ") if context_text else 0
+        return (
+            f"Resposta simulada para: {user_message.strip()} "
+            f"(baseada em {n_docs} trecho(s) de documentos)."
+        )
+    
+    async def aresponder(self, user_message: str, context_text: str) -> str:
+        """Versão assíncrona de responder(), com a latência de uma geração real"""
+        resposta = self.responder(user_message, context_text)
+        await asyncio.sleep(self.atraso_token * len(resposta.split(' ')))
+        return resposta
+    
+    def stream(self, user_message: str, context_text: str) -> Iterator[str]:
+        """Emite a resposta simulada palavra a palavra"""
+        for i, palavra in enumerate(self.responder(user_message, context_text).split(' ')):
+            time.sleep(self.atraso_token)
+            yield palavra if i == 0 else ' ' + palavra
 
 
 class RAGChatbot:
     """Chatbot com capacidades de RAG usando Claude (Anthropic)"""
     
-    def __init__(self, rag_engine: RAGEngine, llm_provider: str = "anthropic"):
+    def __init__(self, 
+                 rag_engine: RAGEngine, 
+                 llm_provider: str = "anthropic",
+                 max_concorrencia_llm: Optional[int] = None,
+                 timeout_llm: Optional[float] = None,
+                 max_tentativas_llm: int = 3,
+                 cache_respostas_capacidade: int = 512,
+                 cache_respostas_ttl: float = 3600,
+                 cache_respostas_limiar: float = 0.95,
+                 orcamento_contexto_tokens: Optional[int] = None):
         """
         Inicializa o chatbot
         
         Args:
             rag_engine: Instância do motor RAG
-            llm_provider: Provedor do LLM (anthropic, openai, local)
+            llm_provider: Provedor do LLM (anthropic, openai, fake)
+            max_concorrencia_llm: Chamadas simultâneas ao LLM em achat()
+                (padrão: LLM_MAX_CONCORRENCIA ou 64)
+            timeout_llm: Tempo máximo de cada chamada ao LLM, em segundos
+                (padrão: LLM_TIMEOUT ou 60)
+            max_tentativas_llm: Tentativas por chamada em falhas transitórias
+            cache_respostas_capacidade: Respostas mantidas no cache semântico (0 = desativado)
+            cache_respostas_ttl: Tempo de vida de cada resposta em cache, em segundos
+            cache_respostas_limiar: Similaridade mínima entre perguntas para reaproveitar a resposta
+            orcamento_contexto_tokens: Máximo de tokens do contexto enviado ao LLM
+                (padrão: CONTEXTO_MAX_TOKENS ou 3000)
         """
         self.rag_engine = rag_engine
         self.llm_provider = llm_provider
         self.conversation_history = []
         
+        self.max_concorrencia_llm = max_concorrencia_llm or int(os.getenv("LLM_MAX_CONCORRENCIA", "64"))
+        self.timeout_llm = timeout_llm or float(os.getenv("LLM_TIMEOUT", "60"))
+        self.max_tentativas_llm = max(1, max_tentativas_llm)
+        
+        # Cliente assíncrono do LLM (achat), criado no primeiro uso dentro do event loop
+        self._llm_async = None
+        self._http_async = None
+        self._semaforo_llm = None
+        self._llm_em_andamento = 0
+        self._llm_novas_tentativas = 0
+        
+        # Empacotador do contexto dentro do orçamento de tokens
+        self.empacotador = EmpacotadorContexto(
+            orcamento_tokens=orcamento_contexto_tokens or int(os.getenv("CONTEXTO_MAX_TOKENS", "3000"))
+        )
+        
+        # Cache semântico de respostas (pergunta parecida + mesmos chunks recuperados)
+        self.cache_respostas = CacheRespostas(
+            capacidade=cache_respostas_capacidade,
+            ttl_segundos=cache_respostas_ttl,
+            limiar_similaridade=cache_respostas_limiar
+        )
+        
+        # Métricas de streaming (tempo até o primeiro token, em ms) e tokens de contexto por requisição
+        self._ttft_ms = deque(maxlen=1000)
+        self._tokens_contexto = deque(maxlen=1000)
+        self._metricas_lock = threading.Lock()
+        
         # Inicializa o LLM baseado no provedor
         self._init_llm()
     
@@ -49,6 +164,9 @@ class RAGChatbot:
             except ImportError:
                 print("⚠️ Biblioteca OpenAI não instalada")
                 self.llm = None
+        elif self.llm_provider == "fake":
+            self.llm = LLMFalso()
+            print("✓ LLM falso (respostas simuladas) inicializado")
         else:
             print(f"⚠️ Provedor '{self.llm_provider}' não implementado ainda")
             self.llm = None
@@ -56,7 +174,9 @@ class RAGChatbot:
     def chat(self, 
              user_message: str, 
              use_rag: bool = True,
-             n_context_docs: int = 3) -> Dict[str, Any]:
+             n_context_docs: int = 3,
+             modo_busca: str = "vetorial",
+             projeto_ids: Optional[List[int]] = None) -> Dict[str, Any]:
         """
         Processa uma mensagem do usuário e gera uma resposta
         
@@ -64,6 +184,8 @@ class RAGChatbot:
             user_message: Mensagem do usuário
             use_rag: Se deve usar RAG para buscar contexto
             n_context_docs: Número de documentos de contexto a buscar
+            modo_busca: Modo de busca do RAGEngine (vetorial, lexico, hibrido)
+            projeto_ids: Restringe o contexto aos documentos destes projetos (None = todos)
             
         Returns:
             Dicionário com resposta e metadados
@@ -75,26 +197,168 @@ class RAGChatbot:
                 'error': 'empty_message'
             }
         
+        context_docs, context_text, sources, empacotamento = self._buscar_contexto(
+            user_message, use_rag, n_context_docs, modo_busca, projeto_ids
+        )
+        
+        # Gera resposta com o LLM (ou reaproveita uma resposta em cache)
+        if self.llm is None:
+            response = self._resposta_sem_llm(user_message, context_docs)
+        else:
+            chave = self._chave_cache_resposta(user_message, context_docs)
+            response = self.cache_respostas.buscar(*chave) if chave else None
+            
+            if response is None:
+                inicio = time.perf_counter()
+                response = self._generate_llm_response(user_message, context_text)
+                self._salvar_resposta(chave, response, time.perf_counter() - inicio)
+        
+        return {
+            'response': response,
+            'sources': sources,
+            'context_used': len(context_docs),
+            'context_tokens': empacotamento['tokens_contexto'],
+            'rag_enabled': use_rag
+        }
+    
+    async def achat(self, 
+                    user_message: str, 
+                    use_rag: bool = True,
+                    n_context_docs: int = 3,
+                    modo_busca: str = "vetorial",
+                    projeto_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        Versão assíncrona de chat()
+        
+        A busca de contexto roda no pool de embeddings e a chamada ao LLM usa
+        o cliente assíncrono (AsyncAnthropic/AsyncOpenAI), sem ocupar uma
+        thread durante a geração. Muitas conversas podem estar em andamento
+        no mesmo worker, limitadas por max_concorrencia_llm.
+        
+        Args:
+            user_message: Mensagem do usuário
+            use_rag: Se deve usar RAG para buscar contexto
+            n_context_docs: Número de documentos de contexto a buscar
+            modo_busca: Modo de busca do RAGEngine (vetorial, lexico, hibrido)
+            projeto_ids: Restringe o contexto aos documentos destes projetos (None = todos)
+            
+        Returns:
+            Dicionário com resposta e metadados (mesmo formato de chat())
+        """
+        if not user_message or not user_message.strip():
+            return {
+                'response': 'Por favor, envie uma mensagem válida.',
+                'sources': [],
+                'error': 'empty_message'
+            }
+        
+        context_docs, context_text, sources, empacotamento = await executores.executar(
+            'embeddings',
+            self._buscar_contexto,
+            user_message, use_rag, n_context_docs, modo_busca, projeto_ids
+        )
+        
+        if self.llm is None:
+            response = self._resposta_sem_llm(user_message, context_docs)
+        else:
+            chave = await executores.executar(
+                'embeddings', self._chave_cache_resposta, user_message, context_docs
+            )
+            response = self.cache_respostas.buscar(*chave) if chave else None
+            
+            if response is None:
+                inicio = time.perf_counter()
+                response = await self._agenerate_llm_response(user_message, context_text)
+                self._salvar_resposta(chave, response, time.perf_counter() - inicio)
+        
+        return {
+            'response': response,
+            'sources': sources,
+            'context_used': len(context_docs),
+            'context_tokens': empacotamento['tokens_contexto'],
+            'rag_enabled': use_rag
+        }
+    
+    def _chave_cache_resposta(self, 
+                              user_message: str, 
+                              context_docs: List[Dict]) -> Optional[Tuple[List[float], str]]:
+        """
+        Calcula a chave do cache semântico de respostas
+        
+        O embedding da pergunta vem do RAGEngine (normalmente do cache de
+        consultas, pois a busca acabou de calculá-lo).
+        
+        Returns:
+            Tupla (embedding da pergunta, chave dos chunks) ou None se o cache
+            estiver indisponível
+        """
+        if self.cache_respostas.capacidade <= 0 or self.rag_engine is None:
+            return None
+        
+        try:
+            embedding = self.rag_engine.embed_query(user_message)
+        except Exception as e:
+            print(f"Erro ao calcular a chave do cache de respostas: {e}")
+            return None
+        
+        return embedding, chave_contexto(context_docs)
+    
+    def _salvar_resposta(self, chave: Optional[Tuple[List[float], str]], response: str, latencia: float):
+        """Guarda a resposta no cache semântico, exceto respostas de erro"""
+        if chave and response and not response.startswith(MENSAGEM_ERRO_LLM):
+            self.cache_respostas.salvar(chave[0], chave[1], response, latencia)
+    
+    def _resposta_sem_llm(self, user_message: str, context_docs: List[Dict]) -> str:
+        """Resposta do modo de demonstração (LLM não configurado)"""
+        if context_docs:
+            return self._generate_demo_response(user_message, context_docs)
+        
+        return (
+            "⚠️ LLM não configurado. Configure ANTHROPIC_API_KEY para usar o chatbot.\n\n"
+            "No modo de demonstração, mostrando documentos relevantes encontrados..."
+        )
+    
+    def _buscar_contexto(self, 
+                         user_message: str, 
+                         use_rag: bool, 
+                         n_context_docs: int,
+                         modo_busca: str = "vetorial",
+                         projeto_ids: Optional[List[int]] = None) -> Tuple[List[Dict], str, List[Dict], Dict[str, int]]:
+        """
+        Busca os documentos de contexto e prepara o texto e as fontes
+        
+        Os documentos são empacotados no orçamento de tokens: sobreposições
+        entre chunks vizinhos são removidas e os menos relevantes que não
+        cabem ficam de fora.
+        
+        Returns:
+            Tupla (documentos, texto de contexto, fontes, estatísticas do empacotamento)
+        """
         # Busca contexto relevante se RAG estiver ativado
         context_docs = []
         if use_rag:
             try:
                 context_docs = self.rag_engine.search(
                     query=user_message,
-                    n_results=n_context_docs
+                    n_results=n_context_docs,
+                    modo=modo_busca,
+                    projeto_ids=projeto_ids
                 )
             except Exception as e:
                 print(f"Erro ao buscar contexto: {e}")
         
         # Prepara o contexto para o LLM
+        context_docs, empacotamento = self.empacotador.empacotar(context_docs)
+        with self._metricas_lock:
+            self._tokens_contexto.append(empacotamento['tokens_contexto'])
+        
         context_text = ""
         sources = []
         
         if context_docs:
-            context_text = "\n\n---\n\n".join([
-                f"Documento: {doc['metadata'].get('filename', 'unknown')}\n{doc['content']}"
-                for doc in context_docs
-            ])
+            context_text = "\n\n---\n\n".join(
+                self.empacotador.formatar(doc) for doc in context_docs
+            )
             
             sources = [
                 {
@@ -105,25 +369,121 @@ class RAGChatbot:
                 for doc in context_docs
             ]
         
-        # Gera resposta com o LLM
+        return context_docs, context_text, sources, empacotamento
+    
+    def chat_stream(self, 
+                    user_message: str, 
+                    use_rag: bool = True,
+                    n_context_docs: int = 3,
+                    modo_busca: str = "vetorial",
+                    projeto_ids: Optional[List[int]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Processa uma mensagem emitindo eventos à medida que ficam prontos
+        
+        Primeiro emite as fontes recuperadas, depois os tokens do LLM conforme
+        chegam e, por fim, um evento com as métricas da resposta.
+        
+        Args:
+            user_message: Mensagem do usuário
+            use_rag: Se deve usar RAG para buscar contexto
+            n_context_docs: Número de documentos de contexto a buscar
+            modo_busca: Modo de busca do RAGEngine (vetorial, lexico, hibrido)
+            projeto_ids: Restringe o contexto aos documentos destes projetos (None = todos)
+            
+        Yields:
+            Dicts {'evento': 'sources' | 'token' | 'fim' | 'erro', 'dados': {...}}
+        """
+        inicio = time.perf_counter()
+        
+        if not user_message or not user_message.strip():
+            yield {'evento': 'erro', 'dados': {'error': 'empty_message', 'response': 'Por favor, envie uma mensagem válida.'}}
+            return
+        
+        context_docs, context_text, sources, empacotamento = self._buscar_contexto(
+            user_message, use_rag, n_context_docs, modo_busca, projeto_ids
+        )
+        yield {'evento': 'sources', 'dados': {'sources': sources, 'context_used': len(context_docs)}}
+        
+        chave = None
+        em_cache = None
+        if self.llm is not None:
+            chave = self._chave_cache_resposta(user_message, context_docs)
+            em_cache = self.cache_respostas.buscar(*chave) if chave else None
+        
         if self.llm is None:
-            # Modo de demonstração sem LLM
             if context_docs:
-                response = self._generate_demo_response(user_message, context_docs)
+                tokens = iter([self._generate_demo_response(user_message, context_docs)])
             else:
-                response = (
-                    "⚠️ LLM não configurado. Configure ANTHROPIC_API_KEY para usar o chatbot.\n\n"
-                    "No modo de demonstração, mostrando documentos relevantes encontrados..."
-                )
+                tokens = iter(["⚠️ LLM não configurado. Configure ANTHROPIC_API_KEY para usar o chatbot."])
+        elif em_cache is not None:
+            tokens = iter([em_cache])
+        elif self.llm_provider == "anthropic":
+            tokens = self._stream_anthropic_response(user_message, context_text)
+        elif self.llm_provider == "openai":
+            tokens = self._stream_openai_response(user_message, context_text)
         else:
-            response = self._generate_llm_response(user_message, context_text)
+            tokens = self.llm.stream(user_message, context_text)
         
-        return {
-            'response': response,
-            'sources': sources,
-            'context_used': len(context_docs),
-            'rag_enabled': use_rag
+        ttft_ms = None
+        partes = []
+        inicio_llm = time.perf_counter()
+        try:
+            for token in tokens:
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - inicio) * 1000
+                    self._registrar_ttft(ttft_ms)
+                partes.append(token)
+                yield {'evento': 'token', 'dados': {'texto': token}}
+        except Exception as e:
+            print(f"Erro ao gerar resposta do LLM: {e}")
+            yield {'evento': 'erro', 'dados': {'error': str(e)}}
+            return
+        
+        if em_cache is None:
+            self._salvar_resposta(chave, ''.join(partes), time.perf_counter() - inicio_llm)
+        
+        yield {
+            'evento': 'fim',
+            'dados': {
+                'context_used': len(context_docs),
+                'context_tokens': empacotamento['tokens_contexto'],
+                'rag_enabled': use_rag,
+                'cache_hit': em_cache is not None,
+                'tempo_primeiro_token_ms': round(ttft_ms, 1) if ttft_ms is not None else None,
+                'tempo_total_ms': round((time.perf_counter() - inicio) * 1000, 1)
+            }
+        }
+    
+    def _registrar_ttft(self, ttft_ms: float):
+        with self._metricas_lock:
+            self._ttft_ms.append(ttft_ms)
+    
+    def get_metricas(self) -> Dict[str, Any]:
+        """Retorna métricas do streaming, dos tokens de contexto, do LLM assíncrono e do cache"""
+        with self._metricas_lock:
+            amostras = sorted(self._ttft_ms)
+            tokens = sorted(self._tokens_contexto)
+        
+        def percentil(valores: List[float], p: float) -> float:
+            return round(valores[min(len(valores) - 1, int(p * len(valores)))], 1)
+        
+        metricas = {'amostras': len(amostras)}
+        if amostras:
+            metricas.update({
+                'ttft_medio_ms': round(sum(amostras) / len(amostras), 1),
+                'ttft_p50_ms': percentil(amostras, 0.50),
+                'ttft_p95_ms': percentil(amostras, 0.95)
+            })
+        
+        metricas['tokens_contexto'] = {
+            'orcamento': self.empacotador.orcamento_tokens,
+            'requisicoes': len(tokens),
+            'medio': round(sum(tokens) / len(tokens), 1) if tokens else 0.0,
+            'p95': percentil(tokens, 0.95) if tokens else 0
         }
+        metricas['llm_async'] = self._metricas_llm_async()
+        metricas['cache_respostas'] = self.cache_respostas.get_stats()
+        return metricas
     
     def _generate_demo_response(self, query: str, context_docs: List[Dict]) -> str:
         """Gera uma resposta de demonstração sem LLM"""
@@ -148,26 +508,19 @@ class RAGChatbot:
                 return self._generate_anthropic_response(user_message, context_text)
             elif self.llm_provider == "openai":
                 return self._generate_openai_response(user_message, context_text)
+            elif self.llm_provider == "fake":
+                return self.llm.responder(user_message, context_text)
             else:
                 return "Provedor de LLM não configurado corretamente."
                 
         except Exception as e:
             print(f"Erro ao gerar resposta do LLM: {e}")
-            return f"Desculpe, ocorreu um erro ao processar sua mensagem: {str(e)}"
+            return f"{MENSAGEM_ERRO_LLM}{str(e)}"
     
-    def _generate_anthropic_response(self, user_message: str, context_text: str) -> str:
-        """Gera resposta usando Claude (Anthropic)"""
-        system_prompt = """Você é um assistente útil que responde perguntas baseado em documentos fornecidos.
-
-Suas responsabilidades:
-1. Use APENAS as informações dos documentos fornecidos para responder
-2. Se a resposta não estiver nos documentos, diga claramente que não encontrou a informação
-3. Cite os documentos quando relevante
-4. Seja conciso mas completo
-5. Responda em português do Brasil"""
-        
+    def _montar_prompt(self, user_message: str, context_text: str) -> str:
+        """Monta o prompt do usuário com o contexto dos documentos"""
         if context_text:
-            user_prompt = f"""Contexto dos documentos:
+            return f"""Contexto dos documentos:
 
 {context_text}
 
@@ -176,19 +529,23 @@ Suas responsabilidades:
 Pergunta do usuário: {user_message}
 
 Por favor, responda baseado apenas nas informações dos documentos acima."""
-        else:
-            user_prompt = f"""Não foram encontrados documentos relevantes para esta pergunta.
+        
+        return f"""Não foram encontrados documentos relevantes para esta pergunta.
 
 Pergunta do usuário: {user_message}
 
 Por favor, informe educadamente que você não possui informações suficientes nos documentos disponíveis para responder essa pergunta."""
+    
+    def _generate_anthropic_response(self, user_message: str, context_text: str) -> str:
+        """Gera resposta usando Claude (Anthropic)"""
+        user_prompt = self._montar_prompt(user_message, context_text)
         
         # Chama a API da Anthropic
         message = self.llm.messages.create(
-            model="claude-sonnet-4-20250514",  # Modelo mais recente
+            model=MODELO_ANTHROPIC,
             max_tokens=2000,
             temperature=0.7,
-            system=system_prompt,
+            system=SYSTEM_PROMPT,
             messages=[
                 {"role": "user", "content": user_prompt}
             ]
@@ -196,38 +553,31 @@ Por favor, informe educadamente que você não possui informações suficientes
         
         return message.content[0].text
     
+    def _stream_anthropic_response(self, user_message: str, context_text: str) -> Iterator[str]:
+        """Emite os tokens da resposta do Claude (Anthropic) conforme chegam"""
+        user_prompt = self._montar_prompt(user_message, context_text)
+        
+        with self.llm.messages.stream(
+            model=MODELO_ANTHROPIC,
+            max_tokens=2000,
+            temperature=0.7,
+            system=SYSTEM_PROMPT,
+            messages=[
+                {"role": "user", "content": user_prompt}
+            ]
+        ) as stream:
+            for texto in stream.text_stream:
+                yield texto
+    
     def _generate_openai_response(self, user_message: str, context_text: str) -> str:
         """Gera resposta usando OpenAI (mantido para compatibilidade)"""
-        system_prompt = """Você é um assistente útil que responde perguntas baseado em documentos fornecidos.
-Suas responsabilidades:
-1. Use APENAS as informações dos documentos fornecidos para responder
-2. Se a resposta não estiver nos documentos, diga claramente que não encontrou a informação
-3. Cite os documentos quando relevante
-4. Seja conciso mas completo
-5. Responda em português do Brasil"""
-        
-        if context_text:
-            user_prompt = f"""Contexto dos documentos:
-
-{context_text}
-
----
-
-Pergunta do usuário: {user_message}
-
-Por favor, responda baseado apenas nas informações dos documentos acima."""
-        else:
-            user_prompt = f"""Não foram encontrados documentos relevantes para esta pergunta.
-
-Pergunta do usuário: {user_message}
-
-Por favor, informe educadamente que você não possui informações suficientes nos documentos disponíveis para responder essa pergunta."""
+        user_prompt = self._montar_prompt(user_message, context_text)
         
         # Chama a API do OpenAI
         response = self.llm.chat.completions.create(
-            model="gpt-4",
+            model=MODELO_OPENAI,
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": user_prompt}
             ],
             temperature=0.7,
@@ -236,6 +586,141 @@ Por favor, informe educadamente que você não possui informações suficientes
         
         return response.choices[0].message.content
     
+    def _stream_openai_response(self, user_message: str, context_text: str) -> Iterator[str]:
+        """Emite os tokens da resposta da OpenAI conforme chegam"""
+        user_prompt = self._montar_prompt(user_message, context_text)
+        
+        stream = self.llm.chat.completions.create(
+            model=MODELO_OPENAI,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.7,
+            max_tokens=2000,
+            stream=True
+        )
+        
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    def _init_llm_async(self):
+        """Cria o cliente assíncrono do LLM sobre um pool de conexões HTTP compartilhado"""
+        self._semaforo_llm = asyncio.Semaphore(self.max_concorrencia_llm)
+        
+        if self.llm_provider not in ("anthropic", "openai"):
+            self._llm_async = self.llm
+            return
+        
+        import httpx
+        
+        # Conexões mantidas abertas (keep-alive) e reaproveitadas entre as conversas
+        self._http_async = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_concorrencia_llm,
+                max_keepalive_connections=self.max_concorrencia_llm
+            ),
+            timeout=httpx.Timeout(self.timeout_llm, connect=10.0)
+        )
+        
+        # As novas tentativas são feitas por _agenerate_llm_response
+        if self.llm_provider == "anthropic":
+            from anthropic import AsyncAnthropic
+            self._llm_async = AsyncAnthropic(
+                api_key=os.getenv("ANTHROPIC_API_KEY"),
+                http_client=self._http_async,
+                timeout=self.timeout_llm,
+                max_retries=0
+            )
+        else:
+            from openai import AsyncOpenAI
+            self._llm_async = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=self._http_async,
+                timeout=self.timeout_llm,
+                max_retries=0
+            )
+    
+    async def _agenerate_llm_response(self, user_message: str, context_text: str) -> str:
+        """Gera resposta com o cliente assíncrono, com timeout e novas tentativas com backoff"""
+        if self._semaforo_llm is None:
+            self._init_llm_async()
+        
+        try:
+            for tentativa in range(1, self.max_tentativas_llm + 1):
+                try:
+                    async with self._semaforo_llm:
+                        self._llm_em_andamento += 1
+                        try:
+                            return await asyncio.wait_for(
+                                self._chamar_llm_async(user_message, context_text),
+                                timeout=self.timeout_llm
+                            )
+                        except asyncio.TimeoutError:
+                            raise asyncio.TimeoutError(f"LLM não respondeu em {self.timeout_llm:g}s")
+                        finally:
+                            self._llm_em_andamento -= 1
+                
+                except Exception as e:
+                    if tentativa == self.max_tentativas_llm or not _erro_transitorio(e):
+                        raise
+                    
+                    # Backoff exponencial com jitter para não sincronizar as novas tentativas
+                    espera = min(8.0, 0.5 * 2 ** (tentativa - 1)) * random.uniform(0.5, 1.5)
+                    self._llm_novas_tentativas += 1
+                    print(f"⚠️ Falha transitória do LLM (tentativa {tentativa}): {e}. Nova tentativa em {espera:.1f}s")
+                    await asyncio.sleep(espera)
+        
+        except Exception as e:
+            print(f"Erro ao gerar resposta do LLM: {e}")
+            return f"{MENSAGEM_ERRO_LLM}{str(e)}"
+    
+    async def _chamar_llm_async(self, user_message: str, context_text: str) -> str:
+        """Faz uma única chamada ao LLM pelo cliente assíncrono"""
+        user_prompt = self._montar_prompt(user_message, context_text)
+        
+        if self.llm_provider == "anthropic":
+            message = await self._llm_async.messages.create(
+                model=MODELO_ANTHROPIC,
+                max_tokens=2000,
+                temperature=0.7,
+                system=SYSTEM_PROMPT,
+                messages=[
+                    {"role": "user", "content": user_prompt}
+                ]
+            )
+            return message.content[0].text
+        
+        if self.llm_provider == "openai":
+            response = await self._llm_async.chat.completions.create(
+                model=MODELO_OPENAI,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=0.7,
+                max_tokens=2000
+            )
+            return response.choices[0].message.content
+        
+        return await self._llm_async.aresponder(user_message, context_text)
+    
+    def _metricas_llm_async(self) -> Dict[str, int]:
+        return {
+            'em_andamento': self._llm_em_andamento,
+            'max_concorrencia': self.max_concorrencia_llm,
+            'novas_tentativas': self._llm_novas_tentativas
+        }
+    
+    async def aclose(self):
+        """Fecha o pool de conexões HTTP do cliente assíncrono"""
+        if self._http_async is not None:
+            await self._http_async.aclose()
+        self._http_async = None
+        self._llm_async = None
+        self._semaforo_llm = None
+    
     def clear_history(self):
         """Limpa o histórico de conversação"""
         self.conversation_history = []
@@ -0,0 +1,136 @@
+"""
+Componentes com Inicialização Preguiçosa
+Desenvolvido por: Marcio Góes do Nascimento
+
+O RAGEngine (modelo de embeddings, ChromaDB) e o chatbot (cliente do LLM)
+levam segundos e centenas de MB para inicializar. Em vez de criá-los ao
+importar main.py/api_consulta.py, cada um é registrado com uma fábrica e
+só é construído no primeiro uso — ou no aquecimento, disparado em segundo
+plano quando o servidor sobe.
+
+Assim o processo responde a /health (vivo) imediatamente, e /ready
+(pronto) só responde 200 depois que todos os componentes carregaram.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Componente:
+    """
+    Proxy de um objeto construído no primeiro acesso
+
+    Atributos e métodos são repassados ao objeto real, então o proxy pode
+    ser usado no lugar dele (ex.: rag_engine.search(...)). Por isso o proxy
+    só define carregar() e carregado; o resto fica em Componentes.
+
+    O acesso a um atributo pode construir o objeto (ou esperar o
+    aquecimento), então em rotas async ele deve acontecer dentro de um pool:
+    executores.executar('disco', lambda: rag_engine.get_stats()).
+    """
+
+    def __init__(self, nome: str, fabrica: Callable[[], Any]):
+        object.__setattr__(self, '_nome', nome)
+        object.__setattr__(self, '_fabrica', fabrica)
+        object.__setattr__(self, '_objeto', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+        object.__setattr__(self, '_tempo_carga_s', None)
+        object.__setattr__(self, '_erro', None)
+
+    def carregar(self) -> Any:
+        """Constrói o objeto, se ainda não existir, e o retorna"""
+        if self._objeto is None:
+            with self._lock:
+                if self._objeto is None:
+                    inicio = time.perf_counter()
+                    try:
+                        objeto = self._fabrica()
+                    except Exception as e:
+                        object.__setattr__(self, '_erro', str(e))
+                        raise
+                    object.__setattr__(self, '_tempo_carga_s', round(time.perf_counter() - inicio, 3))
+                    object.__setattr__(self, '_erro', None)
+                    object.__setattr__(self, '_objeto', objeto)
+                    print(f"✅ Componente '{self._nome}' carregado em {self._tempo_carga_s:.2f}s")
+        return self._objeto
+
+    @property
+    def carregado(self) -> bool:
+        return self._objeto is not None
+
+    def __getattr__(self, nome: str) -> Any:
+        return getattr(self.carregar(), nome)
+
+    def __setattr__(self, nome: str, valor: Any):
+        setattr(self.carregar(), nome, valor)
+
+    def __repr__(self) -> str:
+        estado = 'carregado' if self.carregado else 'não carregado'
+        return f"<Componente '{self._nome}' ({estado})>"
+
+
+class Componentes:
+    """Registro dos componentes preguiçosos de uma aplicação"""
+
+    def __init__(self):
+        self._componentes: Dict[str, Componente] = {}
+        self._aquecimento: Optional[threading.Thread] = None
+
+    def registrar(self, nome: str, fabrica: Callable[[], Any]) -> Componente:
+        """
+        Registra um componente
+
+        Args:
+            nome: Nome do componente (aparece em /ready)
+            fabrica: Função sem argumentos que constrói o objeto
+
+        Returns:
+            Proxy do componente
+        """
+        componente = Componente(nome, fabrica)
+        self._componentes[nome] = componente
+        return componente
+
+    def carregado(self, nome: str) -> bool:
+        """Indica se um componente já foi construído"""
+        return self._componentes[nome].carregado
+
+    def carregar(self, nome: str) -> Any:
+        """
+        Constrói o componente, se preciso, e retorna o objeto real
+
+        Bloqueia durante a construção; em rotas async, chame dentro de um
+        pool (executores.executar('disco', componentes.carregar, nome)).
+        """
+        return self._componentes[nome].carregar()
+
+    def aquecer(self, nomes: Optional[List[str]] = None):
+        """
+        Constrói os componentes, na ordem de registro
+
+        Falhas são registradas (aparecem em get_stats) e não interrompem
+        o aquecimento dos demais; o componente tenta de novo no próximo uso.
+        """
+        for nome in nomes or list(self._componentes):
+            try:
+                self._componentes[nome].carregar()
+            except Exception as e:
+                print(f"❌ Erro ao carregar o componente '{nome}': {e}")
+
+    def aquecer_em_segundo_plano(self) -> threading.Thread:
+        """Dispara o aquecimento numa thread, sem bloquear a inicialização do servidor"""
+        if self._aquecimento is None:
+            self._aquecimento = threading.Thread(target=self.aquecer, name="aquecimento", daemon=True)
+            self._aquecimento.start()
+        return self._aquecimento
+
+    def prontos(self) -> bool:
+        """Indica se todos os componentes foram construídos"""
+        return all(c.carregado for c in self._componentes.values())
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            nome: {'carregado': c.carregado, 'tempo_carga_s': c._tempo_carga_s, 'erro': c._erro}
+            for nome, c in self._componentes.items()
+        }
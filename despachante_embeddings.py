@@ -0,0 +1,128 @@
+"""
+Despachante de Embeddings com Micro-Lotes
+Desenvolvido por: Marcio Góes do Nascimento
+
+Sob carga concorrente, cada busca embute uma única consulta, e o modelo
+(que rende muito mais em lote) fica subutilizado. O despachante recebe os
+pedidos de embed_query das threads do pool 'embeddings', junta os que
+chegam dentro de uma janela curta (ex.: 2-5 ms) ou até max_lote consultas,
+embute todos numa só passada do modelo e devolve a cada chamador o seu vetor.
+
+Envolve qualquer backend de backends_embeddings e expõe a mesma interface;
+embed_documents (indexação e search_batch, já em lote) passa direto.
+Reporta a distribuição do tamanho dos lotes e a espera na fila, para
+ajustar a janela.
+"""
+
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+class DespachanteEmbeddings:
+    """Agrupa consultas concorrentes em lotes para o backend de embeddings"""
+
+    def __init__(self, backend, janela_ms: float = 3.0, max_lote: int = 32, amostras: int = 1000):
+        """
+        Args:
+            backend: Backend de embeddings (ver backends_embeddings)
+            janela_ms: Espera máxima, a partir da primeira consulta, por outras
+                consultas antes de fechar o lote
+            max_lote: Consultas a partir das quais o lote é fechado sem esperar
+            amostras: Esperas recentes guardadas para os percentis
+        """
+        self.backend_real = backend
+        self.model_name = backend.model_name
+        self.backend = backend.backend
+        self.janela_ms = janela_ms
+        self.max_lote = max_lote
+
+        self._fila: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._despachar, name="despachante-embeddings", daemon=True)
+        self._thread.start()
+
+        self._lock = threading.Lock()
+        self._tamanhos = Counter()
+        self._esperas = deque(maxlen=amostras)
+        self._espera_maxima = 0.0
+        self._pedidos = 0
+        self._tempo_modelo = 0.0
+        self._erros = 0
+
+    def embed_query(self, texto: str) -> List[float]:
+        """Embute uma consulta, esperando o lote em que ela entrar"""
+        futuro = Future()
+        self._fila.put((texto, futuro, time.perf_counter()))
+        return futuro.result()
+
+    def embed_documents(self, textos: List[str]) -> List[List[float]]:
+        """Chunks e consultas já em lote vão direto ao backend"""
+        return self.backend_real.embed_documents(textos)
+
+    def _despachar(self):
+        while True:
+            lote = [self._fila.get()]
+            prazo = time.perf_counter() + self.janela_ms / 1000
+
+            while len(lote) < self.max_lote:
+                restante = prazo - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._fila.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            self._executar(lote)
+
+    def _executar(self, lote):
+        inicio = time.perf_counter()
+        esperas = [inicio - enviado_em for _, _, enviado_em in lote]
+
+        # Consultas repetidas no mesmo lote são embutidas uma vez só
+        textos = list(dict.fromkeys(texto for texto, _, _ in lote))
+        try:
+            vetores = dict(zip(textos, self.backend_real.embed_documents(textos)))
+        except Exception as e:
+            with self._lock:
+                self._erros += 1
+            for _, futuro, _ in lote:
+                futuro.set_exception(e)
+            return
+
+        duracao = time.perf_counter() - inicio
+        with self._lock:
+            self._tamanhos[len(lote)] += 1
+            self._esperas.extend(esperas)
+            self._espera_maxima = max(self._espera_maxima, max(esperas))
+            self._pedidos += len(lote)
+            self._tempo_modelo += duracao
+
+        for texto, futuro, _ in lote:
+            futuro.set_result(vetores[texto])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Distribuição dos tamanhos de lote, espera na fila e tempo do modelo"""
+        with self._lock:
+            lotes = sum(self._tamanhos.values())
+            esperas_ms = np.asarray(self._esperas, dtype=np.float64) * 1000
+            return {
+                'janela_ms': self.janela_ms,
+                'max_lote': self.max_lote,
+                'na_fila': self._fila.qsize(),
+                'pedidos': self._pedidos,
+                'lotes': lotes,
+                'erros': self._erros,
+                'tamanho_medio_lote': round(self._pedidos / lotes, 2) if lotes else 0.0,
+                'distribuicao_lotes': {str(t): n for t, n in sorted(self._tamanhos.items())},
+                'espera_media_ms': round(float(esperas_ms.mean()), 3) if len(esperas_ms) else 0.0,
+                'espera_p50_ms': round(float(np.percentile(esperas_ms, 50)), 3) if len(esperas_ms) else 0.0,
+                'espera_p95_ms': round(float(np.percentile(esperas_ms, 95)), 3) if len(esperas_ms) else 0.0,
+                'espera_maxima_ms': round(self._espera_maxima * 1000, 3),
+                'modelo_medio_ms': round(self._tempo_modelo / lotes * 1000, 3) if lotes else 0.0
+            }
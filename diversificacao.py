@@ -0,0 +1,102 @@
+"""
+Diversificação de Resultados (MMR)
+Desenvolvido por: Marcio Góes do Nascimento
+
+Maximal Marginal Relevance sobre a matriz de embeddings dos candidatos:
+a cada passo escolhe o candidato que equilibra relevância para a
+pergunta e novidade em relação aos já escolhidos. Evita que chunks
+vizinhos do mesmo documento (que compartilham 200 caracteres) ocupem
+todas as vagas do contexto.
+
+Também aplica um limite de chunks por documento.
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+def _normalizar_linhas(matriz: np.ndarray) -> np.ndarray:
+    normas = np.linalg.norm(matriz, axis=-1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return matriz / normas
+
+
+def selecionar_mmr(embedding_consulta: Sequence[float],
+                   embeddings_candidatos: Sequence[Sequence[float]],
+                   n_results: int,
+                   lambda_mmr: float = 0.5,
+                   relevancia: Optional[Sequence[float]] = None,
+                   doc_ids: Optional[Sequence[str]] = None,
+                   max_por_documento: Optional[int] = None) -> List[int]:
+    """
+    Seleciona candidatos por Maximal Marginal Relevance
+
+    Args:
+        embedding_consulta: Embedding da pergunta
+        embeddings_candidatos: Embeddings dos candidatos (mesma ordem dos resultados)
+        n_results: Número de candidatos a selecionar
+        lambda_mmr: Peso da relevância (1.0 = só relevância, 0.0 = só diversidade)
+        relevancia: Relevância de cada candidato em [0, 1] (padrão: cosseno com a pergunta)
+        doc_ids: Documento de cada candidato, para o limite por documento
+        max_por_documento: Máximo de candidatos selecionados por documento
+
+    Returns:
+        Índices dos candidatos selecionados, na ordem de seleção
+    """
+    if not len(embeddings_candidatos) or n_results <= 0:
+        return []
+
+    candidatos = _normalizar_linhas(np.asarray(embeddings_candidatos, dtype=np.float32))
+
+    if relevancia is None:
+        consulta = _normalizar_linhas(np.asarray(embedding_consulta, dtype=np.float32))
+        relevancia = candidatos @ consulta
+    else:
+        relevancia = np.asarray(relevancia, dtype=np.float32)
+
+    # Similaridade de cada candidato com o mais parecido já selecionado
+    similaridade_maxima = np.full(len(candidatos), -np.inf, dtype=np.float32)
+    disponivel = np.ones(len(candidatos), dtype=bool)
+    por_documento = {}
+    selecionados = []
+
+    while len(selecionados) < n_results and disponivel.any():
+        redundancia = np.where(np.isfinite(similaridade_maxima), similaridade_maxima, 0.0)
+        pontuacao = lambda_mmr * relevancia - (1 - lambda_mmr) * redundancia
+        pontuacao[~disponivel] = -np.inf
+
+        escolhido = int(np.argmax(pontuacao))
+        disponivel[escolhido] = False
+
+        if doc_ids is not None and max_por_documento:
+            doc_id = doc_ids[escolhido]
+            if por_documento.get(doc_id, 0) >= max_por_documento:
+                continue
+            por_documento[doc_id] = por_documento.get(doc_id, 0) + 1
+
+        selecionados.append(escolhido)
+        similaridade_maxima = np.maximum(similaridade_maxima, candidatos @ candidatos[escolhido])
+
+    return selecionados
+
+
+def limitar_por_documento(doc_ids: Sequence[str], max_por_documento: int, n_results: int) -> List[int]:
+    """
+    Seleciona, em ordem, até max_por_documento candidatos de cada documento
+
+    Returns:
+        Índices dos candidatos selecionados
+    """
+    por_documento = {}
+    selecionados = []
+
+    for i, doc_id in enumerate(doc_ids):
+        if len(selecionados) >= n_results:
+            break
+        if por_documento.get(doc_id, 0) >= max_por_documento:
+            continue
+        por_documento[doc_id] = por_documento.get(doc_id, 0) + 1
+        selecionados.append(i)
+
+    return selecionados
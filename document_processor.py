@@ -1,5 +1,8 @@
 import os
-from typing import List, Dict, Any
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 try:
@@ -10,6 +13,29 @@ except ImportError:
     print("⚠️ PyPDF2 não instalado. Execute: pip install PyPDF2")
 
 
+def _extrair_paginas(file_path: str, inicio: int, fim: int) -> List[Tuple[int, Optional[str], Optional[str]]]:
+    """
+    Extrai o texto de um intervalo de páginas de um PDF
+    
+    Executada nos processos do pool; cada página é isolada, de modo que a
+    falha de uma página não descarta as demais.
+    
+    Returns:
+        Lista de tuplas (número da página, texto, erro)
+    """
+    paginas = []
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        
+        for page_num in range(inicio, fim):
+            try:
+                paginas.append((page_num, pdf_reader.pages[page_num].extract_text(), None))
+            except Exception as e:
+                paginas.append((page_num, None, str(e)))
+    
+    return paginas
+
+
 class DocumentProcessor:
     """Classe para processar documentos PDF e TXT"""
     
@@ -18,12 +44,48 @@ class DocumentProcessor:
         '.md': 'process_txt',
     }
     
-    def __init__(self):
+    def __init__(self, 
+                 pdf_workers: Optional[int] = None,
+                 paginas_por_tarefa: int = 20,
+                 min_paginas_paralelo: int = 40):
+        """
+        Inicializa o processador
+        
+        Args:
+            pdf_workers: Processos para extração de PDF (None = número de núcleos,
+                1 = extração serial)
+            paginas_por_tarefa: Páginas extraídas por tarefa do pool
+            min_paginas_paralelo: PDFs menores que isso são extraídos em série
+        """
         if HAS_PDF:
             self.SUPPORTED_FORMATS['.pdf'] = 'process_pdf'
         
+        self.pdf_workers = pdf_workers or os.cpu_count() or 1
+        self.paginas_por_tarefa = paginas_por_tarefa
+        self.min_paginas_paralelo = min_paginas_paralelo
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        
         print(f"✅ Formatos suportados: {', '.join(self.SUPPORTED_FORMATS.keys())}")
     
+    def _obter_pool(self) -> ProcessPoolExecutor:
+        """Cria o pool de processos na primeira extração paralela"""
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn evita herdar threads e modelos carregados no processo da API
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.pdf_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._pool
+    
+    def encerrar(self):
+        """Encerra o pool de processos de extração"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+    
     def process_file(self, file_path: str, filename: str) -> Dict[str, Any]:
         """
         Processa um arquivo e extrai seu conteúdo textual
@@ -53,29 +115,83 @@ class DocumentProcessor:
             'size': os.path.getsize(file_path)
         }
     
-    def process_pdf(self, file_path: str) -> str:
-        """Extrai texto de arquivos PDF"""
+    def process_pdf(self, file_path: str, workers: Optional[int] = None) -> str:
+        """
+        Extrai texto de arquivos PDF
+        
+        PDFs grandes têm as páginas distribuídas em intervalos por um pool de
+        processos; o texto é remontado na ordem original.
+        
+        Args:
+            file_path: Caminho do arquivo
+            workers: Processos usados nesta chamada, até pdf_workers (1 = serial)
+        """
         if not HAS_PDF:
             raise ImportError("PyPDF2 não instalado. Execute: pip install PyPDF2")
         
-        text = []
+        workers = workers or self.pdf_workers
+        
         try:
             with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    page_text = page.extract_text()
-                    if page_text:
-                        text.append(page_text)
+                total_paginas = len(PyPDF2.PdfReader(file).pages)
             
-            if not text:
-                return "Erro: Não foi possível extrair texto do PDF. O arquivo pode estar protegido ou ser apenas imagens."
-            
-            return '\n\n'.join(text)
+            if workers > 1 and total_paginas >= self.min_paginas_paralelo:
+                paginas = self._extrair_paralelo(file_path, total_paginas, workers)
+            else:
+                paginas = _extrair_paginas(file_path, 0, total_paginas)
         
         except Exception as e:
             return f"Erro ao processar PDF: {str(e)}"
+        
+        falhas = [num + 1 for num, _, erro in paginas if erro]
+        if falhas:
+            print(f"⚠️ {len(falhas)} página(s) do PDF não puderam ser extraídas: {falhas[:20]}")
+        
+        text = [page_text for _, page_text, _ in paginas if page_text]
+        
+        if not text:
+            return "Erro: Não foi possível extrair texto do PDF. O arquivo pode estar protegido ou ser apenas imagens."
+        
+        return '\n\n'.join(text)
+    
+    def _extrair_paralelo(self, 
+                          file_path: str, 
+                          total_paginas: int, 
+                          workers: Optional[int] = None) -> List[Tuple[int, Optional[str], Optional[str]]]:
+        """
+        Distribui intervalos de páginas pelo pool e remonta em ordem
+        
+        No máximo `workers` intervalos ficam no pool ao mesmo tempo, então a
+        extração usa no máximo esse número de processos (o pool pode ser maior).
+        """
+        pool = self._obter_pool()
+        workers = min(workers or self.pdf_workers, self.pdf_workers)
+        
+        intervalos = [
+            (inicio, min(inicio + self.paginas_por_tarefa, total_paginas))
+            for inicio in range(0, total_paginas, self.paginas_por_tarefa)
+        ]
+        
+        resultados = {}
+        em_andamento = {}
+        
+        def coletar(futuros):
+            for futuro in futuros:
+                inicio, fim = em_andamento.pop(futuro)
+                try:
+                    resultados[inicio] = futuro.result()
+                except Exception as e:
+                    # Falha do intervalo inteiro (ex.: processo morto): marca só essas páginas
+                    resultados[inicio] = [(num, None, str(e)) for num in range(inicio, fim)]
+        
+        for inicio, fim in intervalos:
+            if len(em_andamento) >= workers:
+                prontos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+                coletar(prontos)
+            em_andamento[pool.submit(_extrair_paginas, file_path, inicio, fim)] = (inicio, fim)
+        coletar(list(em_andamento))
+        
+        return [pagina for inicio, _ in intervalos for pagina in resultados[inicio]]
     
     def process_txt(self, file_path: str) -> str:
         """Lê arquivos de texto simples"""
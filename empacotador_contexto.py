@@ -0,0 +1,162 @@
+"""
+Empacotador de Contexto
+Desenvolvido por: Marcio Góes do Nascimento
+
+Monta o contexto enviado ao LLM dentro de um orçamento de tokens:
+
+- percorre os chunks em ordem de relevância;
+- remove a sobreposição entre chunks vizinhos do mesmo documento
+  (chunk_index consecutivos compartilham até 200 caracteres) e
+  descarta chunks repetidos;
+- inclui chunks até esgotar o orçamento, cortando o último se couber
+  um trecho útil.
+
+Os tokens são contados com tiktoken (cl100k_base, uma aproximação para
+o Claude). Sem tiktoken instalado, usa a estimativa de 4 caracteres
+por token.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def tamanho_sobreposicao(anterior: str, seguinte: str, maximo: int) -> int:
+    """Tamanho do maior sufixo de `anterior` que é prefixo de `seguinte` (até `maximo`)"""
+    for tamanho in range(min(len(anterior), len(seguinte), maximo), 0, -1):
+        if anterior.endswith(seguinte[:tamanho]):
+            return tamanho
+    return 0
+
+
+class EmpacotadorContexto:
+    """Seleciona e recorta chunks de contexto dentro de um orçamento de tokens"""
+
+    def __init__(self,
+                 orcamento_tokens: int = 3000,
+                 sobreposicao_maxima: int = 200,
+                 min_tokens_trecho: int = 100,
+                 codificacao: str = "cl100k_base"):
+        """
+        Inicializa o empacotador
+
+        Args:
+            orcamento_tokens: Máximo de tokens do contexto
+            sobreposicao_maxima: Maior sobreposição, em caracteres, procurada entre chunks vizinhos
+            min_tokens_trecho: Menor trecho que vale a pena incluir ao cortar um chunk
+            codificacao: Codificação do tiktoken
+        """
+        self.orcamento_tokens = orcamento_tokens
+        self.sobreposicao_maxima = sobreposicao_maxima
+        self.min_tokens_trecho = min_tokens_trecho
+
+        try:
+            import tiktoken
+            self._codificador = tiktoken.get_encoding(codificacao)
+        except Exception as e:
+            print(f"⚠️ tiktoken indisponível ({e}); estimando 4 caracteres por token")
+            self._codificador = None
+
+    def contar_tokens(self, texto: str) -> int:
+        """Conta os tokens de um texto"""
+        if self._codificador is None:
+            return (len(texto) + 3) // 4
+        return len(self._codificador.encode(texto, disallowed_special=()))
+
+    def _cortar(self, texto: str, max_tokens: int) -> str:
+        """Mantém apenas os primeiros max_tokens tokens do texto"""
+        if self._codificador is None:
+            return texto[:max_tokens * 4]
+        return self._codificador.decode(self._codificador.encode(texto, disallowed_special=())[:max_tokens])
+
+    @staticmethod
+    def formatar(doc: Dict[str, Any]) -> str:
+        """Formata um chunk como aparece no prompt"""
+        return f"Documento: {doc['metadata'].get('filename', 'unknown')}\n{doc['content']}"
+
+    def _remover_sobreposicao(self,
+                              doc: Dict[str, Any],
+                              aceitos: List[Dict[str, Any]]) -> Tuple[Optional[str], int]:
+        """
+        Remove do chunk o texto já presente em vizinhos aceitos do mesmo documento
+
+        Returns:
+            Tupla (conteúdo restante ou None se repetido, caracteres removidos)
+        """
+        conteudo = doc['content']
+        doc_id = doc['metadata'].get('doc_id')
+        indice = doc['metadata'].get('chunk_index')
+        removidos = 0
+
+        for aceito in aceitos:
+            if conteudo in aceito['content']:
+                return None, len(conteudo)
+
+            if doc_id is None or indice is None or aceito['metadata'].get('doc_id') != doc_id:
+                continue
+
+            indice_aceito = aceito['metadata'].get('chunk_index')
+            if indice_aceito == indice - 1:
+                # Início deste chunk repete o fim do anterior
+                tamanho = tamanho_sobreposicao(aceito['content'], conteudo, self.sobreposicao_maxima)
+                conteudo = conteudo[tamanho:].lstrip()
+            elif indice_aceito == indice + 1:
+                # Fim deste chunk repete o início do seguinte
+                tamanho = tamanho_sobreposicao(conteudo, aceito['content'], self.sobreposicao_maxima)
+                conteudo = conteudo[:len(conteudo) - tamanho].rstrip()
+            else:
+                continue
+            removidos += tamanho
+
+        return (conteudo or None), removidos
+
+    def empacotar(self, context_docs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """
+        Seleciona os chunks que cabem no orçamento, em ordem de relevância
+
+        Args:
+            context_docs: Resultados da busca, do mais ao menos relevante
+
+        Returns:
+            Tupla (chunks empacotados, estatísticas). Os chunks mantêm o
+            formato da busca, com o conteúdo já recortado.
+        """
+        empacotados = []
+        tokens = 0
+        estatisticas = {
+            'docs_recebidos': len(context_docs),
+            'docs_usados': 0,
+            'docs_descartados': 0,
+            'docs_cortados': 0,
+            'caracteres_sobrepostos': 0,
+            'tokens_contexto': 0
+        }
+
+        for i, doc in enumerate(context_docs):
+            conteudo, removidos = self._remover_sobreposicao(doc, empacotados)
+            estatisticas['caracteres_sobrepostos'] += removidos
+            if conteudo is None:
+                estatisticas['docs_descartados'] += 1
+                continue
+
+            doc = dict(doc, content=conteudo)
+            # Separador "\n\n---\n\n" entre documentos
+            custo = self.contar_tokens(self.formatar(doc)) + (3 if empacotados else 0)
+
+            if tokens + custo > self.orcamento_tokens:
+                restante = self.orcamento_tokens - tokens - (custo - self.contar_tokens(conteudo))
+                if restante >= self.min_tokens_trecho:
+                    doc['content'] = self._cortar(conteudo, restante)
+                    empacotados.append(doc)
+                    tokens += self.contar_tokens(self.formatar(doc)) + (3 if len(empacotados) > 1 else 0)
+                    estatisticas['docs_cortados'] += 1
+                else:
+                    estatisticas['docs_descartados'] += 1
+
+                estatisticas['docs_descartados'] += len(context_docs) - i - 1
+                break
+
+            empacotados.append(doc)
+            tokens += custo
+
+        estatisticas['docs_usados'] = len(empacotados)
+        estatisticas['tokens_contexto'] = tokens
+        return empacotados, estatisticas
@@ -0,0 +1,193 @@
+"""
+Executores de Trabalho Bloqueante
+Desenvolvido por: Marcio Góes do Nascimento
+
+Pools de threads dimensionados por tipo de carga, usados pelas rotas
+async da API para tirar do event loop as chamadas bloqueantes:
+
+- embeddings: CPU (modelo de embeddings, busca vetorial)
+- llm: espera de rede (chamadas à Anthropic/OpenAI)
+- disco: SQLite, ChromaDB e arquivos
+
+Uma chamada lenta ao LLM ocupa apenas uma thread do pool 'llm', sem
+bloquear as demais requisições. Cada pool expõe a profundidade da fila
+e os tempos de espera.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+
+
+class PoolMonitorado:
+    """ThreadPoolExecutor com métricas de fila e de espera"""
+
+    def __init__(self, nome: str, max_workers: int):
+        """
+        Inicializa o pool
+
+        Args:
+            nome: Nome do pool (usado nas threads e nas métricas)
+            max_workers: Número de threads do pool
+        """
+        self.nome = nome
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"pool-{nome}")
+        self._lock = threading.Lock()
+        self._na_fila = 0
+        self._ativos = 0
+        self._pico_fila = 0
+        self._concluidos = 0
+        self._erros = 0
+        self._espera_total = 0.0
+        self._espera_maxima = 0.0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Agenda fn(*args, **kwargs) no pool"""
+        enviado_em = time.perf_counter()
+
+        def executar():
+            espera = time.perf_counter() - enviado_em
+            with self._lock:
+                self._na_fila -= 1
+                self._ativos += 1
+                self._espera_total += espera
+                self._espera_maxima = max(self._espera_maxima, espera)
+
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                with self._lock:
+                    self._erros += 1
+                raise
+            finally:
+                with self._lock:
+                    self._ativos -= 1
+                    self._concluidos += 1
+
+        with self._lock:
+            self._na_fila += 1
+            self._pico_fila = max(self._pico_fila, self._na_fila)
+
+        try:
+            return self._executor.submit(executar)
+        except RuntimeError:
+            with self._lock:
+                self._na_fila -= 1
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna as métricas do pool"""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'na_fila': self._na_fila,
+                'ativos': self._ativos,
+                'pico_fila': self._pico_fila,
+                'concluidos': self._concluidos,
+                'erros': self._erros,
+                'espera_media_ms': round(self._espera_total / self._concluidos * 1000, 2) if self._concluidos else 0.0,
+                'espera_maxima_ms': round(self._espera_maxima * 1000, 2)
+            }
+
+    def encerrar(self, aguardar: bool = True):
+        """Encerra o pool"""
+        self._executor.shutdown(wait=aguardar)
+
+
+class Executores:
+    """Conjunto de pools nomeados para as rotas da API"""
+
+    def __init__(self, tamanhos: Optional[Dict[str, int]] = None):
+        """
+        Inicializa os pools
+
+        Args:
+            tamanhos: Número de threads por pool. Por padrão vem das variáveis
+                EXECUTOR_EMBEDDINGS_WORKERS, EXECUTOR_LLM_WORKERS e
+                EXECUTOR_DISCO_WORKERS
+        """
+        if tamanhos is None:
+            tamanhos = {
+                'embeddings': int(os.getenv("EXECUTOR_EMBEDDINGS_WORKERS", str(os.cpu_count() or 2))),
+                'llm': int(os.getenv("EXECUTOR_LLM_WORKERS", "32")),
+                'disco': int(os.getenv("EXECUTOR_DISCO_WORKERS", "8"))
+            }
+
+        self.pools = {nome: PoolMonitorado(nome, tamanho) for nome, tamanho in tamanhos.items()}
+
+    def pool(self, nome: str) -> PoolMonitorado:
+        """Retorna um pool pelo nome"""
+        if nome not in self.pools:
+            raise ValueError(f"Pool desconhecido: {nome}. Use: {', '.join(self.pools)}")
+        return self.pools[nome]
+
+    async def executar(self, nome: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Executa uma função bloqueante num pool e aguarda o resultado
+
+        Args:
+            nome: Nome do pool ('embeddings', 'llm' ou 'disco')
+            fn: Função bloqueante
+            *args, **kwargs: Argumentos da função
+
+        Returns:
+            Retorno da função
+        """
+        return await asyncio.wrap_future(self.pool(nome).submit(fn, *args, **kwargs))
+
+    async def iterar(self, nome: str, iteravel: Iterable) -> AsyncIterator:
+        """
+        Consome um iterável bloqueante num pool, item a item
+
+        Útil para StreamingResponse com geradores que fazem I/O (streaming
+        do LLM, leitura paginada do ChromaDB).
+
+        Args:
+            nome: Nome do pool
+            iteravel: Iterável ou gerador síncrono
+        """
+        iterador = iter(iteravel)
+        fim = object()
+        pool = self.pool(nome)
+        pendente: Optional[Future] = None
+
+        try:
+            while True:
+                pendente = pool.submit(next, iterador, fim)
+                item = await asyncio.wrap_future(pendente)
+                if item is fim:
+                    break
+                yield item
+        finally:
+            # Cliente desconectado: libera o gerador (ex.: fecha o stream do LLM)
+            fechar = getattr(iterador, 'close', None)
+            if fechar is not None:
+                def _fechar():
+                    try:
+                        fechar()
+                    except Exception as e:
+                        print(f"⚠️ Erro ao fechar o iterador do pool '{nome}': {e}")
+
+                # O next em andamento (a tarefa cancelada não espera por ele) precisa
+                # terminar antes: fechar um gerador em execução falha
+                if pendente is None or pendente.done():
+                    pool.submit(_fechar)
+                else:
+                    pendente.add_done_callback(lambda _: pool.submit(_fechar))
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna as métricas de todos os pools"""
+        return {nome: pool.get_stats() for nome, pool in self.pools.items()}
+
+    def encerrar(self, aguardar: bool = True):
+        """Encerra todos os pools"""
+        for pool in self.pools.values():
+            pool.encerrar(aguardar=aguardar)
+
+
+# Instância global
+executores = Executores()
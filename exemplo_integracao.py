@@ -50,6 +50,37 @@ class RAGConnector:
             print(f"Erro ao conectar com RAG: {e}")
             return []
     
+    def buscar_contexto_lote(self, perguntas: List[str], n_resultados: int = 3) -> List[List[Dict]]:
+        """
+        Busca contexto para várias perguntas numa única requisição
+        
+        Args:
+            perguntas: Lista de perguntas
+            n_resultados: Número de documentos por pergunta
+            
+        Returns:
+            Uma lista de documentos relevantes para cada pergunta
+        """
+        try:
+            response = requests.post(
+                f"{self.rag_api_url}/search/batch",
+                json={
+                    "queries": perguntas,
+                    "n_results": n_resultados
+                },
+                timeout=30
+            )
+            
+            if response.status_code == 200:
+                return response.json().get('results', [])
+            else:
+                print(f"Erro na API: {response.status_code}")
+                return [[] for _ in perguntas]
+                
+        except Exception as e:
+            print(f"Erro ao conectar com RAG: {e}")
+            return [[] for _ in perguntas]
+    
     def formatar_contexto(self, resultados: List[Dict]) -> str:
         """
         Formata os resultados em texto para enviar ao LLM
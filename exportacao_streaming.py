@@ -0,0 +1,146 @@
+"""
+Exportação em Streaming
+Desenvolvido por: Marcio Góes do Nascimento
+
+Geradores que leem a coleção do ChromaDB em páginas e produzem JSON,
+NDJSON ou CSV incrementalmente, com gzip opcional. A memória usada é
+limitada pelo tamanho da página, independente do tamanho do corpus.
+"""
+
+import csv
+import io
+import json
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def iterar_chunks(collection,
+                  where: Optional[Dict[str, Any]] = None,
+                  tamanho_pagina: int = 500,
+                  doc_ids: Optional[Iterable[str]] = None,
+                  documentos_por_pagina: int = 20) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """
+    Percorre os chunks de uma coleção em páginas
+
+    Com doc_ids (ex.: do registro de documentos), cada página traz os chunks
+    de alguns documentos, filtrados por doc_id; o custo é linear no tamanho
+    da coleção. Sem doc_ids, pagina por offset, e cada página custa mais
+    que a anterior (O(n²) no total): use só em coleções pequenas ou quando
+    não há registro (ex.: ao reconstruí-lo).
+
+    Args:
+        collection: Coleção do ChromaDB
+        where: Filtro opcional de metadados
+        tamanho_pagina: Número de chunks lidos por vez (paginação por offset)
+        doc_ids: Documentos a percorrer; chunks de outros documentos são ignorados
+        documentos_por_pagina: Documentos lidos por vez (paginação por doc_id)
+
+    Yields:
+        Tuplas (id, conteúdo, metadados)
+    """
+    if doc_ids is not None:
+        doc_ids = list(doc_ids)
+        for inicio in range(0, len(doc_ids), documentos_por_pagina):
+            filtro = {'doc_id': {'$in': doc_ids[inicio:inicio + documentos_por_pagina]}}
+            pagina = collection.get(
+                where={'$and': [where, filtro]} if where else filtro,
+                include=['documents', 'metadatas']
+            )
+            yield from _itens_pagina(pagina)
+        return
+
+    offset = 0
+    while True:
+        pagina = collection.get(
+            where=where,
+            limit=tamanho_pagina,
+            offset=offset,
+            include=['documents', 'metadatas']
+        )
+        if not pagina['ids']:
+            break
+
+        yield from _itens_pagina(pagina)
+        offset += len(pagina['ids'])
+
+
+def _itens_pagina(pagina: Dict[str, Any]) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    for i, chunk_id in enumerate(pagina['ids']):
+        metadata = pagina['metadatas'][i] if pagina['metadatas'] else {}
+        yield chunk_id, pagina['documents'][i], metadata or {}
+
+
+def gerar_json(cabecalho: Dict[str, Any],
+               itens: Iterable[Dict[str, Any]],
+               campo_itens: str = 'documentos') -> Iterator[str]:
+    """
+    Gera um objeto JSON cujo campo `campo_itens` é um array escrito item a item
+
+    Args:
+        cabecalho: Campos escalares do objeto
+        itens: Itens do array
+        campo_itens: Nome do campo do array
+    """
+    abertura = json.dumps(cabecalho, ensure_ascii=False)[:-1]
+    separador = ', ' if cabecalho else ''
+    yield f'{abertura}{separador}"{campo_itens}": ['
+
+    primeiro = True
+    for item in itens:
+        yield ('' if primeiro else ',') + '\n' + json.dumps(item, ensure_ascii=False)
+        primeiro = False
+
+    yield '\n]}\n'
+
+
+def gerar_ndjson(itens: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Gera um item JSON por linha"""
+    for item in itens:
+        yield json.dumps(item, ensure_ascii=False) + '\n'
+
+
+def gerar_csv(colunas: List[str],
+              linhas: Iterable[List[Any]],
+              linhas_por_bloco: int = 200) -> Iterator[str]:
+    """
+    Gera um CSV em blocos de linhas
+
+    Args:
+        colunas: Cabeçalho do CSV
+        linhas: Linhas de valores
+        linhas_por_bloco: Linhas acumuladas antes de cada envio
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(colunas)
+
+    for i, linha in enumerate(linhas, 1):
+        writer.writerow(linha)
+        if i % linhas_por_bloco == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def codificar(partes: Iterable[str], gzip: bool = False) -> Iterator[bytes]:
+    """
+    Codifica as partes em UTF-8, comprimindo em gzip se solicitado
+
+    Args:
+        partes: Texto gerado incrementalmente
+        gzip: Se deve comprimir a saída
+    """
+    if not gzip:
+        for parte in partes:
+            yield parte.encode('utf-8')
+        return
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for parte in partes:
+        dados = compressor.compress(parte.encode('utf-8'))
+        if dados:
+            yield dados
+    yield compressor.flush()
@@ -2,15 +2,17 @@
 Funções de Exportação por Projeto
 Desenvolvido por: Marcio Góes do Nascimento
 
-Exporta documentos separados por projeto
+Exporta documentos separados por projeto.
+As exportações leem a coleção em páginas e escrevem o arquivo
+incrementalmente, com uso de memória limitado.
 """
 
 import json
-import csv
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator
 from projetos import gerenciador_projetos
+from exportacao_streaming import gerar_json, gerar_csv
 
 
 class ExportadorProjetos:
@@ -21,62 +23,54 @@ class ExportadorProjetos:
         self.export_dir = Path(export_dir)
         self.export_dir.mkdir(exist_ok=True)
     
-    def _agrupar_por_projeto(self, results: dict) -> Dict[int, List[dict]]:
+    def _escrever(self, partes: Iterable[str], export_path: Path):
+        """Grava no arquivo as partes geradas incrementalmente"""
+        with open(export_path, 'w', newline='', encoding='utf-8') as f:
+            for parte in partes:
+                f.write(parte)
+    
+    def _iterar_chunks_projeto(self, projeto_id: int) -> Iterator[Dict]:
         """
-        Agrupa documentos por projeto_id
+        Percorre os chunks da coleção de um projeto (0 = sem projeto)
         
         Args:
-            results: Resultados do ChromaDB
+            projeto_id: ID do projeto
             
-        Returns:
-            Dict com projeto_id como chave e lista de documentos como valor
+        Yields:
+            Dicts com id, conteudo e metadata de cada chunk
         """
-        documentos_por_projeto = {}
-        
-        for i in range(len(results['ids'])):
-            metadata = results['metadatas'][i] if results['metadatas'] else {}
-            projeto_id = metadata.get('projeto_id', 0)  # 0 = sem projeto
-            
-            if projeto_id not in documentos_por_projeto:
-                documentos_por_projeto[projeto_id] = []
-            
-            documentos_por_projeto[projeto_id].append({
-                'id': results['ids'][i],
-                'conteudo': results['documents'][i],
+        for chunk_id, conteudo, metadata in self.rag_engine.iterar_chunks(projeto_id):
+            yield {
+                'id': chunk_id,
+                'conteudo': conteudo,
                 'metadata': metadata
-            })
-        
-        return documentos_por_projeto
+            }
     
-    def exportar_json_por_projeto(self, usuario_exportador: dict) -> str:
-        """
-        Exporta documentos para JSON separados por projeto
-        
-        Args:
-            usuario_exportador: Dict com dados do usuário que está exportando
-            
-        Returns:
-            Caminho do arquivo JSON exportado
-        """
-        results = self.rag_engine.collection.get()
-        documentos_por_projeto = self._agrupar_por_projeto(results)
+    def _nome_projeto(self, projeto_id: int) -> str:
+        """Retorna o nome de exibição de um projeto"""
+        if projeto_id == 0:
+            return 'Sem Projeto'
+        projeto = gerenciador_projetos.buscar_projeto(projeto_id)
+        return projeto['nome'] if projeto else 'Projeto Desconhecido'
+    
+    def _gerar_json_por_projeto(self, usuario_exportador: dict) -> Iterator[str]:
+        """Gera o JSON de exportação agrupado por projeto"""
+        resumo = self.rag_engine.registro.resumo_por_projeto()
         
-        dados_exportados = {
+        yield json.dumps({
             'exportado_por': usuario_exportador['nome'],
             'data_exportacao': datetime.now().isoformat(),
             'desenvolvedor': 'Marcio Góes do Nascimento',
-            'total_projetos': len(documentos_por_projeto),
-            'total_documentos': len(set([m.get('doc_id') for m in results['metadatas']])),
-            'total_chunks': len(results['ids']),
-            'projetos': []
-        }
+            'total_projetos': len(resumo),
+            'total_documentos': sum(r['total_documentos'] for r in resumo),
+            'total_chunks': sum(r['total_chunks'] for r in resumo)
+        }, ensure_ascii=False)[:-1] + ', "projetos": ['
         
-        # Para cada projeto, adicionar informações
-        for projeto_id, documentos in documentos_por_projeto.items():
+        for i, r in enumerate(resumo):
+            projeto_id = r['projeto_id']
             projeto_info = {
                 'projeto_id': projeto_id,
-                'total_chunks': len(documentos),
-                'documentos': documentos
+                'total_chunks': r['total_chunks']
             }
             
             # Se projeto_id != 0, buscar informações do projeto
@@ -90,14 +84,27 @@ class ExportadorProjetos:
                 projeto_info['nome_projeto'] = 'Sem Projeto'
                 projeto_info['descricao_projeto'] = 'Documentos não associados a projetos'
             
-            dados_exportados['projetos'].append(projeto_info)
+            if i:
+                yield ','
+            yield '\n'
+            yield from gerar_json(projeto_info, self._iterar_chunks_projeto(projeto_id))
         
-        # Salvar arquivo
+        yield '\n]}\n'
+    
+    def exportar_json_por_projeto(self, usuario_exportador: dict) -> str:
+        """
+        Exporta documentos para JSON separados por projeto
+        
+        Args:
+            usuario_exportador: Dict com dados do usuário que está exportando
+            
+        Returns:
+            Caminho do arquivo JSON exportado
+        """
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         export_path = self.export_dir / f"export_por_projeto_{usuario_exportador['username']}_{timestamp}.json"
         
-        with open(export_path, 'w', encoding='utf-8') as f:
-            json.dump(dados_exportados, f, ensure_ascii=False, indent=2)
+        self._escrever(self._gerar_json_por_projeto(usuario_exportador), export_path)
         
         print(f"✅ JSON exportado: {export_path}")
         return str(export_path)
@@ -112,45 +119,38 @@ class ExportadorProjetos:
         Returns:
             Caminho do arquivo CSV exportado
         """
-        results = self.rag_engine.collection.get()
-        
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         export_path = self.export_dir / f"export_por_projeto_{usuario_exportador['username']}_{timestamp}.csv"
         
-        with open(export_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                'ID',
-                'Projeto_ID',
-                'Nome_Projeto',
-                'Conteudo',
-                'Arquivo',
-                'Formato',
-                'Chunk',
-                'Exportado_Por'
-            ])
-            
-            for i in range(len(results['ids'])):
-                metadata = results['metadatas'][i] if results['metadatas'] else {}
-                projeto_id = metadata.get('projeto_id', 0)
-                
-                # Buscar nome do projeto
-                if projeto_id != 0:
-                    projeto = gerenciador_projetos.buscar_projeto(projeto_id)
-                    nome_projeto = projeto['nome'] if projeto else 'Projeto Desconhecido'
-                else:
-                    nome_projeto = 'Sem Projeto'
+        colunas = [
+            'ID',
+            'Projeto_ID',
+            'Nome_Projeto',
+            'Conteudo',
+            'Arquivo',
+            'Formato',
+            'Chunk',
+            'Exportado_Por'
+        ]
+        
+        def linhas():
+            for projeto_id, collection in self.rag_engine.colecoes():
+                # Buscar nome do projeto uma única vez por coleção
+                nome_projeto = self._nome_projeto(projeto_id)
                 
-                writer.writerow([
-                    results['ids'][i],
-                    projeto_id,
-                    nome_projeto,
-                    results['documents'][i],
-                    metadata.get('filename', ''),
-                    metadata.get('format', ''),
-                    metadata.get('chunk_index', ''),
-                    usuario_exportador['nome']
-                ])
+                for chunk_id, conteudo, metadata in self.rag_engine.iterar_chunks(projeto_id):
+                    yield [
+                        chunk_id,
+                        projeto_id,
+                        nome_projeto,
+                        conteudo,
+                        metadata.get('filename', ''),
+                        metadata.get('format', ''),
+                        metadata.get('chunk_index', ''),
+                        usuario_exportador['nome']
+                    ]
+        
+        self._escrever(gerar_csv(colunas, linhas()), export_path)
         
         print(f"✅ CSV exportado: {export_path}")
         return str(export_path)
@@ -175,12 +175,7 @@ class ExportadorProjetos:
         if not projeto:
             raise ValueError(f"Projeto ID {projeto_id} não encontrado")
         
-        # Buscar documentos do projeto
-        results = self.rag_engine.collection.get(
-            where={"projeto_id": projeto_id}
-        )
-        
-        dados_exportados = {
+        cabecalho = {
             'exportado_por': usuario_exportador['nome'],
             'data_exportacao': datetime.now().isoformat(),
             'desenvolvedor': 'Marcio Góes do Nascimento',
@@ -191,24 +186,24 @@ class ExportadorProjetos:
                 'criado_por': projeto['criado_por'],
                 'data_criacao': projeto['data_criacao']
             },
-            'total_chunks': len(results['ids']),
-            'documentos': []
+            'total_chunks': sum(
+                r['total_chunks'] for r in self.rag_engine.registro.resumo_por_projeto()
+                if r['projeto_id'] == projeto_id
+            )
         }
         
-        for i in range(len(results['ids'])):
-            dados_exportados['documentos'].append({
-                'id': results['ids'][i],
-                'conteudo': results['documents'][i],
-                'metadata': results['metadatas'][i] if results['metadatas'] else {}
-            })
+        # Buscar documentos do projeto em páginas
+        documentos = (
+            {'id': chunk_id, 'conteudo': conteudo, 'metadata': metadata}
+            for chunk_id, conteudo, metadata in self.rag_engine.iterar_chunks(projeto_id)
+        )
         
         # Salvar arquivo
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         nome_projeto_safe = projeto['nome'].replace(' ', '_').replace('/', '_')
         export_path = self.export_dir / f"projeto_{nome_projeto_safe}_{timestamp}.json"
         
-        with open(export_path, 'w', encoding='utf-8') as f:
-            json.dump(dados_exportados, f, ensure_ascii=False, indent=2)
+        self._escrever(gerar_json(cabecalho, documentos), export_path)
         
         print(f"✅ Projeto '{projeto['nome']}' exportado: {export_path}")
         return str(export_path)
@@ -233,38 +228,34 @@ class ExportadorProjetos:
         if not projeto:
             raise ValueError(f"Projeto ID {projeto_id} não encontrado")
         
-        # Buscar documentos do projeto
-        results = self.rag_engine.collection.get(
-            where={"projeto_id": projeto_id}
-        )
-        
         # Salvar arquivo
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         nome_projeto_safe = projeto['nome'].replace(' ', '_').replace('/', '_')
         export_path = self.export_dir / f"projeto_{nome_projeto_safe}_{timestamp}.csv"
         
-        with open(export_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                'ID',
-                'Conteudo',
-                'Arquivo',
-                'Formato',
-                'Chunk',
-                'Exportado_Por'
-            ])
-            
-            for i in range(len(results['ids'])):
-                metadata = results['metadatas'][i] if results['metadatas'] else {}
-                
-                writer.writerow([
-                    results['ids'][i],
-                    results['documents'][i],
-                    metadata.get('filename', ''),
-                    metadata.get('format', ''),
-                    metadata.get('chunk_index', ''),
-                    usuario_exportador['nome']
-                ])
+        colunas = [
+            'ID',
+            'Conteudo',
+            'Arquivo',
+            'Formato',
+            'Chunk',
+            'Exportado_Por'
+        ]
+        
+        # Buscar documentos do projeto em páginas
+        linhas = (
+            [
+                chunk_id,
+                conteudo,
+                metadata.get('filename', ''),
+                metadata.get('format', ''),
+                metadata.get('chunk_index', ''),
+                usuario_exportador['nome']
+            ]
+            for chunk_id, conteudo, metadata in self.rag_engine.iterar_chunks(projeto_id)
+        )
+        
+        self._escrever(gerar_csv(colunas, linhas), export_path)
         
         print(f"✅ Projeto '{projeto['nome']}' exportado: {export_path}")
         return str(export_path)
@@ -0,0 +1,249 @@
+"""
+Fila de Ingestão de Documentos
+Desenvolvido por: Marcio Góes do Nascimento
+
+Processa uploads em segundo plano (extração, chunking, embeddings e
+indexação) num pool limitado de workers, sem bloquear o event loop da API.
+Cada upload vira um job cujo progresso pode ser consultado em /jobs/{id}.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional, Any
+
+
+class FilaCheiaError(Exception):
+    """Levantada quando a fila de ingestão atingiu o limite de jobs pendentes"""
+
+
+class FilaIngestao:
+    """Fila de jobs de ingestão com pool limitado de workers"""
+
+    ETAPAS = ('extracting', 'chunking', 'embedding', 'indexing')
+
+    def __init__(self,
+                 document_processor,
+                 rag_engine,
+                 gerenciador_projetos=None,
+                 max_workers: int = 2,
+                 max_pendentes: int = 100,
+                 max_jobs_retidos: int = 1000):
+        """
+        Inicializa a fila
+
+        Args:
+            document_processor: Instância do DocumentProcessor
+            rag_engine: Instância do RAGEngine
+            gerenciador_projetos: GerenciadorProjetos para atualizar o contador
+                de documentos dos projetos (opcional)
+            max_workers: Número de jobs processados em paralelo
+            max_pendentes: Número máximo de jobs aguardando na fila
+            max_jobs_retidos: Número de jobs mantidos para consulta
+        """
+        self.document_processor = document_processor
+        self.rag_engine = rag_engine
+        self.gerenciador_projetos = gerenciador_projetos
+        self.max_pendentes = max_pendentes
+        self.max_jobs_retidos = max_jobs_retidos
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingestao")
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def enfileirar(self,
+                   file_path: str,
+                   filename: str,
+                   metadata: Dict[str, Any],
+                   sha256: Optional[str] = None) -> str:
+        """
+        Enfileira um arquivo já salvo em disco para ingestão
+
+        Args:
+            file_path: Caminho do arquivo salvo
+            filename: Nome original do arquivo
+            metadata: Metadados extras do documento (uploaded_by, projeto_id, ...)
+            sha256: Hash do arquivo, usado por buscar_ativo para detectar reenvios
+
+        Returns:
+            ID do job criado
+        """
+        with self._lock:
+            pendentes = sum(1 for j in self._jobs.values() if j['status'] == 'pendente')
+            if pendentes >= self.max_pendentes:
+                raise FilaCheiaError("Fila de ingestão cheia. Tente novamente em instantes.")
+
+            job_id = str(uuid.uuid4())
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'filename': filename,
+                'projeto_id': metadata.get('projeto_id'),
+                'sha256': sha256,
+                'status': 'pendente',
+                'stage': None,
+                'chunks_total': 0,
+                'chunks_processados': 0,
+                'doc_id': None,
+                'indexacao': None,
+                'erro': None,
+                'tempos': {},
+                'criado_em': datetime.now().isoformat(),
+                'iniciado_em': None,
+                'concluido_em': None
+            }
+            self._descartar_antigos()
+
+        self._executor.submit(self._processar, job_id, file_path, filename, metadata)
+        return job_id
+
+    def obter(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna uma cópia do estado de um job
+
+        Args:
+            job_id: ID do job
+
+        Returns:
+            Dict com o estado do job ou None
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            copia = dict(job)
+            copia['tempos'] = dict(job['tempos'])
+            return copia
+
+    def buscar_ativo(self, sha256: str, filename: str, projeto_id: Optional[int] = None) -> Optional[str]:
+        """
+        Procura um job pendente ou em processamento do mesmo arquivo
+
+        O documento é identificado por (projeto, nome): o mesmo conteúdo com
+        outro nome é outro documento e não é considerado reenvio.
+
+        Args:
+            sha256: Hash do arquivo
+            filename: Nome original do arquivo
+            projeto_id: Projeto do envio (o mesmo arquivo pode ir para projetos diferentes)
+
+        Returns:
+            ID do job encontrado ou None
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if (job['sha256'] == sha256 and job['filename'] == filename
+                        and job['projeto_id'] == projeto_id
+                        and job['status'] in ('pendente', 'processando')):
+                    return job['job_id']
+        return None
+
+    def get_stats(self) -> Dict[str, int]:
+        """Retorna a contagem de jobs por status"""
+        with self._lock:
+            contagem = {'pendente': 0, 'processando': 0, 'concluido': 0, 'erro': 0}
+            for job in self._jobs.values():
+                contagem[job['status']] += 1
+            return contagem
+
+    def encerrar(self, aguardar: bool = True):
+        """Encerra o pool de workers"""
+        self._executor.shutdown(wait=aguardar)
+
+    def _descartar_antigos(self):
+        """Descarta os jobs finalizados mais antigos acima do limite de retenção"""
+        excedente = len(self._jobs) - self.max_jobs_retidos
+        if excedente <= 0:
+            return
+
+        for job_id in list(self._jobs.keys()):
+            if excedente <= 0:
+                break
+            if self._jobs[job_id]['status'] in ('concluido', 'erro'):
+                del self._jobs[job_id]
+                excedente -= 1
+
+    def _atualizar(self, job_id: str, **campos):
+        with self._lock:
+            self._jobs[job_id].update(campos)
+
+    def _processar(self, job_id: str, file_path: str, filename: str, metadata: Dict[str, Any]):
+        """Executa a ingestão de um arquivo, registrando etapa e tempos"""
+        inicio_etapa = [time.perf_counter()]
+        etapa_atual = ['extracting']
+
+        def mudar_etapa(etapa: Optional[str], **info):
+            # Fecha o cronômetro da etapa atual e, se houver, abre o da próxima
+            agora = time.perf_counter()
+            with self._lock:
+                job = self._jobs[job_id]
+                job['tempos'][etapa_atual[0]] = round(agora - inicio_etapa[0], 4)
+                job['stage'] = etapa
+                job.update(info)
+            etapa_atual[0] = etapa
+            inicio_etapa[0] = agora
+
+        self._atualizar(
+            job_id,
+            status='processando',
+            stage='extracting',
+            iniciado_em=datetime.now().isoformat()
+        )
+
+        try:
+            doc_data = self.document_processor.process_file(file_path, filename)
+
+            doc_metadata = dict(metadata)
+            doc_metadata.update({
+                'filename': doc_data['filename'],
+                'format': doc_data['format'],
+                'size': doc_data['size']
+            })
+
+            projeto_id = doc_metadata.get('projeto_id')
+            indexacao = self.rag_engine.indexar_documento(
+                content=doc_data['content'],
+                metadata=doc_metadata,
+                progresso=mudar_etapa,
+                projeto_id=projeto_id
+            )
+            
+            # Reenvio de um documento existente não conta como documento novo
+            # O documento já está indexado: falha no contador (ex.: projeto removido
+            # durante a ingestão) não deve marcar o job como erro
+            if projeto_id and indexacao['status'] == 'novo' and self.gerenciador_projetos is not None:
+                try:
+                    self.gerenciador_projetos.incrementar_contador_documentos(projeto_id)
+                except ValueError as e:
+                    print(f"⚠️ Contador do projeto {projeto_id} não atualizado para '{filename}': {e}")
+
+            mudar_etapa(None)
+            with self._lock:
+                job = self._jobs[job_id]
+                job['tempos']['total'] = round(sum(job['tempos'].values()), 4)
+                job.update(
+                    status='concluido',
+                    doc_id=indexacao['doc_id'],
+                    indexacao=indexacao['status'],
+                    chunks_total=indexacao['chunks'],
+                    chunks_processados=indexacao['chunks'],
+                    chunks_novos=indexacao['chunks_novos'],
+                    chunks_removidos=indexacao['chunks_removidos'],
+                    concluido_em=datetime.now().isoformat()
+                )
+
+        except Exception as e:
+            print(f"Erro na ingestão de '{filename}': {e}")
+            self._atualizar(
+                job_id,
+                status='erro',
+                erro=str(e),
+                concluido_em=datetime.now().isoformat()
+            )
+
+        finally:
+            if os.path.exists(file_path):
+                os.remove(file_path)
@@ -0,0 +1,70 @@
+"""
+Configuração do Gunicorn
+Desenvolvido por: Marcio Góes do Nascimento
+
+Roda main.py (ou api_consulta.py) com vários workers Uvicorn carregando o
+modelo de embeddings uma única vez, no processo mestre, antes do fork.
+Os pesos do modelo ficam compartilhados entre os workers (copy-on-write),
+e cada worker ocupa só a memória da aplicação.
+
+Vale para o backend PyTorch (EMBEDDINGS_BACKEND=huggingface). Com os
+backends ONNX, use o servidor de embeddings (servidor_embeddings.py e
+EMBEDDINGS_BACKEND=socket); nesse caso nada é pré-carregado aqui.
+
+A importação no mestre também abre o banco de projetos (projetos.py). Uma
+conexão SQLite não pode atravessar o fork: o mestre a fecha antes de criar
+os workers e cada worker abre a sua.
+
+O estado dos jobs de ingestão (fila_ingestao) fica na memória do worker que
+recebeu o upload: /jobs/{id} retorna 404 se a consulta cair em outro worker.
+Use afinidade de sessão no balanceador ou um servidor com um só worker para
+os uploads.
+
+Uso:
+    gunicorn main:app -c gunicorn_conf.py
+    WEB_CONCURRENCY=8 gunicorn api_consulta:app -c gunicorn_conf.py
+"""
+
+import gc
+import os
+import sys
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = 120
+
+# Importa a aplicação no mestre; os componentes pesados continuam
+# preguiçosos e são criados em cada worker, reaproveitando o modelo abaixo
+preload_app = True
+
+
+def on_starting(server):
+    """Carrega o modelo de embeddings no mestre, antes de criar os workers"""
+    backend = os.getenv("EMBEDDINGS_BACKEND", "huggingface")
+    if backend != "huggingface":
+        server.log.info(f"Backend de embeddings '{backend}': modelo não pré-carregado")
+        return
+
+    from backends_embeddings import precarregar
+
+    server.log.info("Pré-carregando o modelo de embeddings no processo mestre")
+    precarregar(backend, "sentence-transformers/all-MiniLM-L6-v2")
+
+
+def when_ready(server):
+    """Congela os objetos já criados para o coletor de lixo não tocar nas
+    páginas compartilhadas (o que as copiaria em cada worker)"""
+    # Nenhuma conexão SQLite do mestre pode ser herdada pelos workers
+    projetos = sys.modules.get("projetos")
+    if projetos is not None:
+        projetos.gerenciador_projetos.fechar()
+
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Abre no worker a sua própria conexão com o banco de projetos"""
+    projetos = sys.modules.get("projetos")
+    if projetos is not None:
+        projetos.gerenciador_projetos.reabrir()
@@ -0,0 +1,291 @@
+"""
+Índice Léxico (BM25)
+Desenvolvido por: Marcio Góes do Nascimento
+
+Índice invertido persistente (SQLite) sobre os mesmos IDs de chunk do
+ChromaDB. Encontra identificadores exatos, números de contrato e códigos
+legais (ex.: "8.666/93") que a busca vetorial costuma perder. Atualizado
+incrementalmente por add_document / delete_document.
+"""
+
+import math
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Palavras e compostos com separadores internos: "art. 5º", "8.666/93", "NF-e"
+_PADRAO_TOKEN = re.compile(r"\w+(?:[./-]\w+)*")
+
+STOPWORDS = frozenset("""
+a o as os um uma uns umas de do da dos das em no na nos nas por para com
+sem e ou que se ao aos à às é ser foi sao são como mais mas seu sua seus
+suas ele ela eles elas isso isto esse essa este esta the of and to in is
+""".split())
+
+
+def tokenizar(texto: str) -> List[str]:
+    """
+    Converte um texto em termos para o índice
+
+    Remove acentos e maiúsculas. Termos compostos ("8.666/93") são
+    indexados inteiros e também por partes.
+    """
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+
+    termos = []
+    for token in _PADRAO_TOKEN.findall(texto):
+        partes = re.split(r"[./-]", token)
+        if len(partes) > 1:
+            termos.append(token)
+        termos.extend(p for p in partes if p and p not in STOPWORDS)
+
+    return termos
+
+
+class IndiceLexico:
+    """Índice invertido BM25 persistido em SQLite"""
+
+    def __init__(self,
+                 arquivo_indice: str = "./chroma_db/indice_lexico.db",
+                 k1: float = 1.5,
+                 b: float = 0.75):
+        """
+        Inicializa o índice
+
+        Args:
+            arquivo_indice: Caminho do arquivo SQLite do índice
+            k1: Parâmetro de saturação de frequência do BM25
+            b: Parâmetro de normalização por tamanho do BM25
+        """
+        self.arquivo_indice = arquivo_indice
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+
+        Path(arquivo_indice).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(arquivo_indice, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                chunk_id TEXT PRIMARY KEY,
+                doc_id TEXT NOT NULL,
+                comprimento INTEGER NOT NULL,
+                projeto_id INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunks_doc ON chunks (doc_id);
+            CREATE TABLE IF NOT EXISTS postings (
+                termo TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (termo, chunk_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_postings_chunk ON postings (chunk_id);
+            CREATE TABLE IF NOT EXISTS estatisticas (
+                chave TEXT PRIMARY KEY,
+                valor INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO estatisticas VALUES ('total_chunks', 0), ('soma_comprimentos', 0);
+        """)
+
+        # Índices criados antes da separação por projeto não têm a coluna
+        colunas = [linha[1] for linha in self._conn.execute("PRAGMA table_info(chunks)")]
+        if 'projeto_id' not in colunas:
+            self._conn.execute("ALTER TABLE chunks ADD COLUMN projeto_id INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    def adicionar(self, 
+                  doc_id: str, 
+                  ids: List[str], 
+                  textos: List[str], 
+                  projeto_id: Optional[int] = None):
+        """
+        Indexa os chunks de um documento
+
+        Args:
+            doc_id: ID do documento
+            ids: IDs dos chunks (os mesmos do ChromaDB)
+            textos: Conteúdo dos chunks
+            projeto_id: Projeto do documento (None = sem projeto)
+        """
+        chunks = []
+        postings = []
+        for chunk_id, texto in zip(ids, textos):
+            termos = tokenizar(texto)
+            chunks.append((chunk_id, doc_id, len(termos), projeto_id or 0))
+            postings.extend((termo, chunk_id, tf) for termo, tf in Counter(termos).items())
+
+        with self._lock, self._conn:
+            self._remover_chunks([c[0] for c in chunks])
+            self._conn.executemany(
+                "INSERT INTO chunks (chunk_id, doc_id, comprimento, projeto_id) VALUES (?, ?, ?, ?)",
+                chunks
+            )
+            self._conn.executemany("INSERT INTO postings VALUES (?, ?, ?)", postings)
+            self._somar_estatisticas(len(chunks), sum(c[2] for c in chunks))
+
+    def remover_chunks(self, ids: List[str]):
+        """Remove chunks específicos do índice"""
+        with self._lock, self._conn:
+            self._remover_chunks(ids)
+
+    def remover_documento(self, doc_id: str):
+        """Remove todos os chunks de um documento do índice"""
+        with self._lock, self._conn:
+            ids = [linha[0] for linha in self._conn.execute(
+                "SELECT chunk_id FROM chunks WHERE doc_id = ?", (doc_id,)
+            )]
+            self._remover_chunks(ids)
+
+    def limpar(self):
+        """Remove todo o conteúdo do índice"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("UPDATE estatisticas SET valor = 0")
+
+    def contar(self) -> int:
+        """Retorna o número de chunks indexados"""
+        with self._lock:
+            return self._estatistica('total_chunks')
+
+    def _remover_chunks(self, ids: List[str]):
+        """Remove chunks e postings (chamar com o lock e a transação abertos)"""
+        for inicio in range(0, len(ids), 500):
+            lote = ids[inicio:inicio + 500]
+            marcadores = ','.join('?' * len(lote))
+            total, soma = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(comprimento), 0) FROM chunks WHERE chunk_id IN ({marcadores})",
+                lote
+            ).fetchone()
+            if not total:
+                continue
+            self._conn.execute(f"DELETE FROM postings WHERE chunk_id IN ({marcadores})", lote)
+            self._conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({marcadores})", lote)
+            self._somar_estatisticas(-total, -soma)
+
+    def _somar_estatisticas(self, chunks: int, comprimento: int):
+        self._conn.execute(
+            "UPDATE estatisticas SET valor = valor + ? WHERE chave = 'total_chunks'", (chunks,)
+        )
+        self._conn.execute(
+            "UPDATE estatisticas SET valor = valor + ? WHERE chave = 'soma_comprimentos'", (comprimento,)
+        )
+
+    def _estatistica(self, chave: str) -> int:
+        return self._conn.execute(
+            "SELECT valor FROM estatisticas WHERE chave = ?", (chave,)
+        ).fetchone()[0]
+
+    def buscar(self, 
+               consulta: str, 
+               n_results: int = 20,
+               projeto_ids: Optional[List[int]] = None) -> List[Tuple[str, float, int]]:
+        """
+        Busca chunks pela pontuação BM25
+
+        Args:
+            consulta: Texto da busca
+            n_results: Número de resultados
+            projeto_ids: Restringe a busca a estes projetos (0 = sem projeto)
+
+        Returns:
+            Lista de (chunk_id, score, projeto_id) em ordem decrescente de score
+        """
+        termos = list(dict.fromkeys(tokenizar(consulta)))
+        if not termos:
+            return []
+
+        filtro_projeto = ''
+        if projeto_ids is not None:
+            filtro_projeto = f" AND c.projeto_id IN ({','.join('?' * len(projeto_ids))})"
+
+        with self._lock:
+            total_chunks = self._estatistica('total_chunks')
+            if total_chunks == 0:
+                return []
+            media_comprimento = self._estatistica('soma_comprimentos') / total_chunks
+
+            scores: Dict[str, float] = {}
+            projetos: Dict[str, int] = {}
+            for termo in termos:
+                postings = self._conn.execute(
+                    f"""SELECT p.chunk_id, p.tf, c.comprimento, c.projeto_id
+                        FROM postings p JOIN chunks c ON c.chunk_id = p.chunk_id
+                        WHERE p.termo = ?{filtro_projeto}""",
+                    (termo, *(projeto_ids or []))
+                ).fetchall()
+                if not postings:
+                    continue
+
+                df = len(postings)
+                idf = math.log(1 + (total_chunks - df + 0.5) / (df + 0.5))
+                for chunk_id, tf, comprimento, projeto_id in postings:
+                    norma = self.k1 * (1 - self.b + self.b * comprimento / (media_comprimento or 1))
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norma)
+                    projetos[chunk_id] = projeto_id
+
+        ordenados = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
+        return [(chunk_id, score, projetos[chunk_id]) for chunk_id, score in ordenados]
+
+    def reconstruir(self, 
+                    chunks: Iterable[Tuple[str, str, Dict]], 
+                    projeto_id: Optional[int] = None,
+                    tamanho_lote: int = 500) -> int:
+        """
+        Reconstrói o índice a partir dos chunks existentes
+
+        Args:
+            chunks: Tuplas (id, conteúdo, metadados), ex.: de iterar_chunks
+            projeto_id: Projeto da coleção de origem (None = usa os metadados)
+            tamanho_lote: Chunks indexados por transação
+
+        Returns:
+            Número de chunks indexados
+        """
+        total = 0
+        lote: Dict[Tuple[str, int], Tuple[List[str], List[str]]] = {}
+
+        def gravar():
+            for (doc_id, projeto_id), (ids, textos) in lote.items():
+                self.adicionar(doc_id, ids, textos, projeto_id)
+            lote.clear()
+
+        for i, (chunk_id, conteudo, metadata) in enumerate(chunks, 1):
+            chave = (
+                metadata.get('doc_id', ''),
+                projeto_id if projeto_id is not None else metadata.get('projeto_id', 0)
+            )
+            ids, textos = lote.setdefault(chave, ([], []))
+            ids.append(chunk_id)
+            textos.append(conteudo or '')
+            total += 1
+            if i % tamanho_lote == 0:
+                gravar()
+
+        gravar()
+        return total
+
+
+def fusao_rrf(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Combina rankings por Reciprocal Rank Fusion
+
+    Args:
+        rankings: Listas de IDs, cada uma em ordem de relevância
+        k: Constante de suavização do RRF
+
+    Returns:
+        Lista de (id, score) em ordem decrescente de score
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for posicao, item_id in enumerate(ranking):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + posicao + 1)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,418 @@
+"""
+Ingestão em Massa de Documentos
+Desenvolvido por: Marcio Góes do Nascimento
+
+Indexa todos os documentos de um diretório ou arquivo ZIP (inclusive ZIPs
+dentro do diretório) sem passar pela API, em um pipeline:
+
+- extração do texto e divisão em chunks num pool de processos, vários
+  arquivos em paralelo;
+- embeddings em lotes grandes (milhares de chunks por passada) no processo
+  principal, enquanto os processos já extraem os próximos arquivos;
+- gravação no ChromaDB com poucas chamadas a collection.add por lote.
+
+Cada arquivo indexado é anotado num checkpoint (JSONL); se a ingestão for
+interrompida, rodar o mesmo comando de novo retoma de onde parou. A
+indexação é incremental, então reprocessar um arquivo já indexado também
+não duplica nada.
+
+Uso:
+    python ingestao_lote.py ./documentos
+    python ingestao_lote.py backup.zip --projeto 3 --workers 6 --lote-chunks 4096
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+# Textos que DocumentProcessor.process_pdf devolve no lugar do conteúdo
+ERROS_EXTRACAO = ("Erro ao processar PDF:", "Erro: Não foi possível extrair texto do PDF")
+
+
+def listar_arquivos(origem: str, extensoes: Set[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Percorre o diretório (ou ZIP) em ordem, devolvendo os arquivos suportados
+
+    Cada arquivo é um dict com chave (identifica a versão no checkpoint),
+    nome, tamanho, caminho e membro (nome dentro do ZIP, ou None). O nome de
+    cada arquivo é o caminho relativo à origem, para que arquivos homônimos
+    em pastas diferentes não sejam tratados como versões um do outro.
+    """
+    origem = os.path.abspath(origem)
+
+    if zipfile.is_zipfile(origem):
+        yield from _listar_zip(origem, "", extensoes)
+        return
+
+    for raiz, pastas, nomes in os.walk(origem):
+        pastas.sort()
+        for nome in sorted(nomes):
+            caminho = os.path.join(raiz, nome)
+            relativo = Path(os.path.relpath(caminho, origem)).as_posix()
+            ext = Path(nome).suffix.lower()
+
+            if ext == '.zip':
+                yield from _listar_zip(caminho, relativo + "/", extensoes)
+            elif ext in extensoes:
+                info = os.stat(caminho)
+                yield {
+                    'chave': f"{caminho}|{info.st_size}|{info.st_mtime_ns}",
+                    'nome': relativo,
+                    'tamanho': info.st_size,
+                    'caminho': caminho,
+                    'membro': None
+                }
+
+
+def _listar_zip(caminho: str, prefixo: str, extensoes: Set[str]) -> Iterator[Dict[str, Any]]:
+    with zipfile.ZipFile(caminho) as arquivo_zip:
+        for info in sorted(arquivo_zip.infolist(), key=lambda i: i.filename):
+            if info.is_dir() or Path(info.filename).suffix.lower() not in extensoes:
+                continue
+            yield {
+                'chave': f"{caminho}!{info.filename}|{info.file_size}|{info.CRC}",
+                'nome': prefixo + info.filename,
+                'tamanho': info.file_size,
+                'caminho': caminho,
+                'membro': info.filename
+            }
+
+
+# Estado de cada processo do pool, criado uma vez por processo
+_processador = None
+_divisor = None
+
+
+def _inicializar_processo(chunk_size: int, chunk_overlap: int):
+    global _processador, _divisor
+    from document_processor import DocumentProcessor
+    from rag_engine import criar_divisor_texto
+
+    # Extração serial: o paralelismo já está nos arquivos
+    _processador = DocumentProcessor(pdf_workers=1)
+    _divisor = criar_divisor_texto(chunk_size, chunk_overlap)
+
+
+def _extrair_e_dividir(arquivo: Dict[str, Any]) -> Dict[str, Any]:
+    """Executada nos processos do pool: extrai o texto e divide em chunks"""
+    resultado = {'arquivo': arquivo, 'erro': None}
+    temporario = None
+
+    try:
+        caminho = arquivo['caminho']
+        if arquivo['membro'] is not None:
+            # PyPDF2 precisa de um arquivo: extrai o membro do ZIP para um temporário
+            with zipfile.ZipFile(arquivo['caminho']) as arquivo_zip, arquivo_zip.open(arquivo['membro']) as origem:
+                with tempfile.NamedTemporaryFile(suffix=Path(arquivo['membro']).suffix, delete=False) as destino:
+                    shutil.copyfileobj(origem, destino)
+                    temporario = caminho = destino.name
+
+        doc_data = _processador.process_file(caminho, arquivo['nome'])
+        conteudo = doc_data['content']
+        if not conteudo or not conteudo.strip():
+            raise ValueError("Conteúdo do documento está vazio")
+        if conteudo.startswith(ERROS_EXTRACAO):
+            raise ValueError(conteudo)
+
+        resultado.update(
+            content=conteudo,
+            format=doc_data['format'],
+            chunks=_divisor.split_text(conteudo)
+        )
+    except Exception as e:
+        resultado['erro'] = str(e)
+    finally:
+        if temporario:
+            os.remove(temporario)
+
+    return resultado
+
+
+class Checkpoint:
+    """Arquivos já indexados, anotados em JSONL a cada lote gravado"""
+
+    def __init__(self, arquivo: str, destino: str = ""):
+        """
+        Args:
+            arquivo: Arquivo JSONL do checkpoint
+            destino: Banco e projeto da ingestão; só contam como concluídos
+                os arquivos indexados no mesmo destino
+        """
+        self.arquivo = arquivo
+        self.destino = destino
+        self.concluidos: Set[str] = set()
+
+        if os.path.exists(arquivo):
+            with open(arquivo, encoding='utf-8') as f:
+                for linha in f:
+                    if not linha.strip():
+                        continue
+                    registro = json.loads(linha)
+                    if registro.get('destino') == destino:
+                        self.concluidos.add(registro['chave'])
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(arquivo)), exist_ok=True)
+
+        self._saida = open(arquivo, 'a', encoding='utf-8')
+
+    def registrar(self, registros: List[Dict[str, Any]]):
+        for registro in registros:
+            registro = dict(registro, destino=self.destino)
+            self._saida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            self.concluidos.add(registro['chave'])
+        self._saida.flush()
+        os.fsync(self._saida.fileno())
+
+    def fechar(self):
+        self._saida.close()
+
+
+class IngestaoLote:
+    """Pipeline de ingestão em massa sobre um RAGEngine"""
+
+    def __init__(self,
+                 rag_engine,
+                 checkpoint: Checkpoint,
+                 workers: Optional[int] = None,
+                 lote_chunks: int = 2048,
+                 projeto_id: Optional[int] = None,
+                 gerenciador_projetos=None,
+                 metadata: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            rag_engine: Motor RAG que recebe os documentos
+            checkpoint: Checkpoint dos arquivos já indexados
+            workers: Processos de extração (None = núcleos - 1)
+            lote_chunks: Chunks acumulados antes de embutir e gravar um lote
+            projeto_id: Projeto dos documentos (None = sem projeto)
+            gerenciador_projetos: Atualiza o contador de documentos do projeto
+            metadata: Metadados extras de todos os documentos (ex.: uploaded_by)
+        """
+        self.rag_engine = rag_engine
+        self.checkpoint = checkpoint
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.lote_chunks = lote_chunks
+        self.projeto_id = projeto_id
+        self.gerenciador_projetos = gerenciador_projetos
+        self.metadata = metadata or {}
+
+        self.estatisticas = {
+            'arquivos': 0, 'pulados': 0, 'novos': 0, 'atualizados': 0, 'inalterados': 0,
+            'erros': 0, 'chunks': 0, 'chunks_novos': 0, 'bytes': 0,
+            'tempo_gravacao_s': 0.0, 'lotes': 0
+        }
+        self.erros: List[Dict[str, str]] = []
+
+    def executar(self, arquivos: Iterator[Dict[str, Any]]) -> Dict[str, Any]:
+        """Ingere os arquivos e retorna as estatísticas"""
+        inicio = time.perf_counter()
+        lote: List[Dict[str, Any]] = []
+        chunks_lote = 0
+        em_andamento = set()
+        esgotado = False
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            # spawn evita herdar o modelo de embeddings e as threads do processo principal
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_inicializar_processo,
+            initargs=(self.rag_engine.chunk_size, self.rag_engine.chunk_overlap)
+        ) as pool:
+            while True:
+                # Mantém os processos ocupados enquanto o lote é embutido
+                while not esgotado and len(em_andamento) < self.workers * 4:
+                    arquivo = next(arquivos, None)
+                    if arquivo is None:
+                        esgotado = True
+                    elif arquivo['chave'] in self.checkpoint.concluidos:
+                        self.estatisticas['pulados'] += 1
+                    else:
+                        em_andamento.add(pool.submit(_extrair_e_dividir, arquivo))
+
+                if not em_andamento:
+                    break
+
+                prontos, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    try:
+                        resultado = futuro.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        print(f"❌ Falha num processo de extração: {e}")
+                        self.estatisticas['erros'] += 1
+                        continue
+
+                    if resultado['erro']:
+                        self._registrar_erro(resultado['arquivo'], resultado['erro'])
+                        continue
+
+                    lote.append(resultado)
+                    chunks_lote += len(resultado['chunks'])
+
+                if chunks_lote >= self.lote_chunks:
+                    self._gravar(lote)
+                    lote, chunks_lote = [], 0
+                    self._imprimir_progresso(inicio)
+
+            if lote:
+                self._gravar(lote)
+
+        self.estatisticas['duracao_s'] = time.perf_counter() - inicio
+        return self.estatisticas
+
+    def _gravar(self, lote: List[Dict[str, Any]]):
+        """Embute e grava um lote de documentos, anotando-os no checkpoint"""
+        documentos = []
+        for resultado in lote:
+            arquivo = resultado['arquivo']
+            metadata = dict(self.metadata)
+            metadata.update({'filename': arquivo['nome'], 'format': resultado['format'], 'size': arquivo['tamanho']})
+            documentos.append({'content': resultado['content'], 'metadata': metadata, 'chunks': resultado['chunks']})
+
+        inicio = time.perf_counter()
+        try:
+            indexacoes = self.rag_engine.indexar_documentos(documentos, projeto_id=self.projeto_id)
+        except Exception as e:
+            # Nada do lote foi gravado; os arquivos ficam fora do checkpoint
+            for resultado in lote:
+                self._registrar_erro(resultado['arquivo'], f"Falha ao gravar o lote: {e}")
+            return
+        finally:
+            self.estatisticas['tempo_gravacao_s'] += time.perf_counter() - inicio
+
+        registros = []
+        for resultado, indexacao in zip(lote, indexacoes):
+            arquivo = resultado['arquivo']
+            if indexacao['status'] == 'erro':
+                self._registrar_erro(arquivo, indexacao['erro'])
+                continue
+
+            self.estatisticas['arquivos'] += 1
+            self.estatisticas['bytes'] += arquivo['tamanho']
+            self.estatisticas['chunks'] += indexacao['chunks']
+            self.estatisticas['chunks_novos'] += indexacao['chunks_novos']
+            self.estatisticas[{'novo': 'novos', 'atualizado': 'atualizados', 'inalterado': 'inalterados'}[indexacao['status']]] += 1
+
+            # O documento já está gravado: falha no contador não o torna um erro
+            if indexacao['status'] == 'novo' and self.projeto_id and self.gerenciador_projetos is not None:
+                try:
+                    self.gerenciador_projetos.incrementar_contador_documentos(self.projeto_id)
+                except ValueError as e:
+                    print(f"⚠️ Contador do projeto {self.projeto_id} não atualizado para '{arquivo['nome']}': {e}")
+
+            registros.append({'chave': arquivo['chave'], 'nome': arquivo['nome'], 'doc_id': indexacao['doc_id'],
+                              'status': indexacao['status']})
+
+        self.checkpoint.registrar(registros)
+        self.estatisticas['lotes'] += 1
+
+    def _registrar_erro(self, arquivo: Dict[str, Any], erro: str):
+        self.estatisticas['erros'] += 1
+        self.erros.append({'nome': arquivo['nome'], 'erro': erro})
+        print(f"❌ {arquivo['nome']}: {erro}")
+
+    def _imprimir_progresso(self, inicio: float):
+        decorrido = time.perf_counter() - inicio
+        print(f"📦 {self.estatisticas['arquivos']} arquivos, {self.estatisticas['chunks']} chunks "
+              f"({self.estatisticas['arquivos'] / decorrido:.1f} arquivos/s, "
+              f"{self.estatisticas['chunks'] / decorrido:.0f} chunks/s)")
+
+
+def imprimir_relatorio(estatisticas: Dict[str, Any], erros: List[Dict[str, str]]):
+    duracao = max(estatisticas['duracao_s'], 1e-9)
+    megabytes = estatisticas['bytes'] / (1024 * 1024)
+
+    print()
+    print("=" * 60)
+    print("📊 RELATÓRIO DA INGESTÃO")
+    print("=" * 60)
+    print(f"   Arquivos indexados: {estatisticas['arquivos']} "
+          f"({estatisticas['novos']} novos, {estatisticas['atualizados']} atualizados, "
+          f"{estatisticas['inalterados']} inalterados)")
+    print(f"   Pulados (checkpoint): {estatisticas['pulados']}   erros: {estatisticas['erros']}")
+    print(f"   Chunks: {estatisticas['chunks']} ({estatisticas['chunks_novos']} embutidos)   "
+          f"dados: {megabytes:.1f} MB   lotes: {estatisticas['lotes']}")
+    print(f"   Duração: {duracao:.1f}s (embeddings e gravação: {estatisticas['tempo_gravacao_s']:.1f}s)")
+    print(f"   Vazão: {estatisticas['arquivos'] / duracao:.2f} arquivos/s   "
+          f"{estatisticas['chunks'] / duracao:.1f} chunks/s   {megabytes / duracao:.2f} MB/s")
+
+    for erro in erros[:20]:
+        print(f"   ❌ {erro['nome']}: {erro['erro'][:120]}")
+    if len(erros) > 20:
+        print(f"   ... e mais {len(erros) - 20} erros")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestão em massa de um diretório ou arquivo ZIP")
+    parser.add_argument("origem", help="Diretório ou arquivo ZIP com os documentos")
+    parser.add_argument("--banco", default="./chroma_db", help="Diretório do banco vetorial")
+    parser.add_argument("--projeto", type=int, help="ID do projeto que recebe os documentos")
+    parser.add_argument("--workers", type=int, help="Processos de extração (padrão: núcleos - 1)")
+    parser.add_argument("--lote-chunks", type=int, default=2048, help="Chunks por lote de embeddings e gravação")
+    parser.add_argument("--checkpoint", default="./data/ingestao_lote.jsonl", help="Arquivo de checkpoint")
+    parser.add_argument("--usuario", default="ingestao_lote", help="Valor de uploaded_by nos metadados")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.origem):
+        print(f"❌ Origem não encontrada: {args.origem}")
+        sys.exit(1)
+
+    from document_processor import DocumentProcessor
+    from rag_engine import RAGEngine
+
+    extensoes = set(DocumentProcessor().SUPPORTED_FORMATS)
+
+    gerenciador = None
+    if args.projeto is not None:
+        from projetos import gerenciador_projetos as gerenciador
+        projeto = gerenciador.buscar_projeto(args.projeto)
+        if not projeto or not projeto.get('ativo', True):
+            print(f"❌ Projeto ID {args.projeto} não encontrado ou inativo")
+            sys.exit(1)
+
+    rag_engine = RAGEngine(
+        persist_directory=args.banco,
+        embedding_backend=os.getenv("EMBEDDINGS_BACKEND", "huggingface"),
+        chunk_size=int(os.getenv("CHUNK_SIZE", "1000")),
+        chunk_overlap=int(os.getenv("CHUNK_OVERLAP", "200"))
+    )
+
+    # O mesmo diretório ingerido em outro banco ou projeto não é pulado
+    destino = f"{os.path.abspath(args.banco)}#projeto={args.projeto or 0}"
+    checkpoint = Checkpoint(args.checkpoint, destino)
+    ingestao = IngestaoLote(
+        rag_engine,
+        checkpoint,
+        workers=args.workers,
+        lote_chunks=args.lote_chunks,
+        projeto_id=args.projeto,
+        gerenciador_projetos=gerenciador,
+        metadata={'uploaded_by': args.usuario}
+    )
+
+    print(f"🚚 Ingerindo {args.origem} com {ingestao.workers} processos de extração "
+          f"({len(checkpoint.concluidos)} arquivos já no checkpoint)")
+    try:
+        estatisticas = ingestao.executar(listar_arquivos(args.origem, extensoes))
+    except KeyboardInterrupt:
+        print("\n⚠️ Interrompido; rode o mesmo comando para retomar")
+        sys.exit(130)
+    finally:
+        checkpoint.fechar()
+
+    imprimir_relatorio(estatisticas, ingestao.erros)
+
+
+if __name__ == "__main__":
+    main()
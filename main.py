@@ -1,20 +1,26 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Depends
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Depends, Request
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Optional
 import os
-import shutil
+import asyncio
+import uuid
 import json
-import csv
 from pathlib import Path
-from datetime import timedelta
+from datetime import datetime, timedelta
 import uvicorn
 from pydantic import BaseModel
 
 from document_processor import DocumentProcessor
 from rag_engine import RAGEngine
 from chatbot import RAGChatbot
+from fila_ingestao import FilaIngestao, FilaCheiaError
+from projetos import gerenciador_projetos
+from executores import executores
+from componentes import Componentes
+from upload_streaming import salvar_upload, expandir_zip, TamanhoExcedidoError
+from exportacao_streaming import gerar_json, gerar_ndjson, gerar_csv, codificar
 from auth import autenticar_usuario, criar_token_acesso, usuario_atual
 from config_usuarios import ACCESS_TOKEN_EXPIRE_MINUTES
 
@@ -40,10 +46,79 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 EXPORT_DIR = Path("./exports")
 EXPORT_DIR.mkdir(exist_ok=True)
 
-# Inicializa componentes
+# Limites de upload
+UPLOAD_MAX_BYTES_ARQUIVO = int(os.getenv("UPLOAD_MAX_MB_ARQUIVO", "50")) * 1024 * 1024
+UPLOAD_MAX_BYTES_LOTE = int(os.getenv("UPLOAD_MAX_MB_LOTE", "500")) * 1024 * 1024
+UPLOAD_MAX_ARQUIVOS_LOTE = int(os.getenv("UPLOAD_MAX_ARQUIVOS_LOTE", "500"))
+
+@app.middleware("http")
+async def limitar_tamanho_upload(request: Request, call_next):
+    """
+    Recusa pelo Content-Length os uploads acima do limite, antes de receber o corpo
+    
+    O Starlette grava o multipart inteiro em arquivos temporários antes de a
+    rota rodar, então o Content-Length é o único limite aplicado antes da
+    recepção: envios sem ele (chunked) são recusados com 411.
+    """
+    limite = {"/upload": UPLOAD_MAX_BYTES_ARQUIVO, "/upload/lote": UPLOAD_MAX_BYTES_LOTE}.get(request.url.path)
+    if limite is None or request.method != "POST":
+        return await call_next(request)
+    
+    tamanho = request.headers.get("content-length", "")
+    if not tamanho.isdigit():
+        return JSONResponse(
+            status_code=411,
+            content={"detail": "Envie o arquivo com o cabeçalho Content-Length"}
+        )
+    # 1 MB de folga para os cabeçalhos do multipart
+    if int(tamanho) > limite + 1024 * 1024:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"O envio excede o limite de {limite // (1024 * 1024)} MB"}
+        )
+    return await call_next(request)
+
+# Inicializa componentes. O motor RAG e o chatbot são construídos no primeiro
+# uso ou no aquecimento em segundo plano (ver /ready)
+componentes = Componentes()
 document_processor = DocumentProcessor()
-rag_engine = RAGEngine(persist_directory="./chroma_db")
-chatbot = RAGChatbot(rag_engine=rag_engine, llm_provider="anthropic")
+rag_engine = componentes.registrar('rag_engine', lambda: RAGEngine(
+    persist_directory="./chroma_db",
+    embedding_backend=os.getenv("EMBEDDINGS_BACKEND", "huggingface"),
+    reranquear_padrao=os.getenv("RERANQUEAMENTO", "0") == "1",
+    diversificar_padrao=os.getenv("DIVERSIFICACAO_MMR", "0") == "1",
+    max_por_documento_padrao=int(os.getenv("MAX_CHUNKS_POR_DOCUMENTO", "0")) or None,
+    chunk_size=int(os.getenv("CHUNK_SIZE", "1000")),
+    chunk_overlap=int(os.getenv("CHUNK_OVERLAP", "200")),
+    janela_vizinhos_padrao=int(os.getenv("JANELA_VIZINHOS", "0")),
+    microlote_janela_ms=float(os.getenv("MICROLOTE_JANELA_MS", "0")),
+    microlote_max=int(os.getenv("MICROLOTE_MAX", "32"))
+))
+chatbot = componentes.registrar('chatbot', lambda: RAGChatbot(
+    rag_engine=rag_engine,
+    llm_provider=os.getenv("LLM_PROVIDER", "anthropic")
+))
+fila_ingestao = FilaIngestao(
+    document_processor=document_processor,
+    rag_engine=rag_engine,
+    gerenciador_projetos=gerenciador_projetos,
+    max_workers=int(os.getenv("INGESTAO_WORKERS", "2")),
+    max_pendentes=int(os.getenv("INGESTAO_MAX_PENDENTES", "100"))
+)
+
+@app.on_event("startup")
+async def aquecer_componentes():
+    """Carrega o motor RAG e o chatbot em segundo plano (AQUECER_NA_INICIALIZACAO=0 desativa)"""
+    if os.getenv("AQUECER_NA_INICIALIZACAO", "1") == "1":
+        componentes.aquecer_em_segundo_plano()
+
+@app.on_event("shutdown")
+async def encerrar_pools():
+    """Encerra a fila de ingestão, os pools de execução e as conexões com o LLM"""
+    fila_ingestao.encerrar(aguardar=False)
+    executores.encerrar(aguardar=False)
+    if componentes.carregado('chatbot'):
+        await chatbot.aclose()
 
 # Modelos Pydantic
 class LoginRequest(BaseModel):
@@ -54,11 +129,14 @@ class ChatRequest(BaseModel):
     message: str
     use_rag: bool = True
     n_context_docs: int = 3
+    modo_busca: str = "vetorial"
+    projeto_ids: Optional[List[int]] = None
 
 class ChatResponse(BaseModel):
     response: str
     sources: List[dict]
     context_used: int
+    context_tokens: int = 0
     rag_enabled: bool
 
 # Rotas de Autenticação
@@ -432,7 +510,7 @@ async def home():
                             <h2>📤 Upload de Documentos</h2>
                             <div class="upload-area" id="uploadArea">
                                 <p>📁 Arraste arquivos aqui<br>ou clique para selecionar</p>
-                                <input type="file" id="fileInput" multiple accept=".pdf,.docx,.txt,.xlsx,.pptx,.csv,.md">
+                                <input type="file" id="fileInput" multiple accept=".pdf,.docx,.txt,.xlsx,.pptx,.csv,.md,.zip">
                             </div>
                             <button class="btn" onclick="document.getElementById('fileInput').click()">
                                 Selecionar Arquivos
@@ -627,8 +705,14 @@ async def home():
                 const loading = document.getElementById('loading');
                 loading.classList.add('active');
                 
-                for (let file of files) {
-                    await uploadFile(file);
+                // Vários arquivos (ou um ZIP) vão numa única requisição
+                const lote = files.length > 1 || Array.from(files).some(f => f.name.toLowerCase().endsWith('.zip'));
+                if (lote) {
+                    await uploadLote(files);
+                } else {
+                    for (let file of files) {
+                        await uploadFile(file);
+                    }
                 }
                 
                 await loadDocuments();
@@ -648,7 +732,12 @@ async def home():
                     
                     const result = await response.json();
                     if (response.ok) {
-                        addMessage('bot', `✅ Arquivo "${file.name}" processado com sucesso!`);
+                        const job = await aguardarJob(result.job_id);
+                        if (job.status === 'concluido') {
+                            addMessage('bot', `✅ Arquivo "${file.name}" processado com sucesso!`);
+                        } else {
+                            addMessage('bot', `❌ Erro ao processar "${file.name}": ${job.erro}`);
+                        }
                     } else {
                         addMessage('bot', `❌ Erro ao processar "${file.name}": ${result.detail}`);
                     }
@@ -657,6 +746,52 @@ async def home():
                 }
             }
             
+            async function uploadLote(files) {
+                const formData = new FormData();
+                for (let file of files) {
+                    formData.append('files', file);
+                }
+                
+                try {
+                    const response = await fetch('/upload/lote', {
+                        method: 'POST',
+                        headers: getAuthHeaders(),
+                        body: formData
+                    });
+                    
+                    const result = await response.json();
+                    if (!response.ok) {
+                        addMessage('bot', `❌ Erro ao enviar os arquivos: ${result.detail}`);
+                        return;
+                    }
+                    
+                    result.rejeitados.forEach(r => addMessage('bot', `⚠️ "${r.filename}" recusado: ${r.erro}`));
+                    
+                    const jobs = await Promise.all(result.jobs.map(j => aguardarJob(j.job_id)));
+                    const concluidos = jobs.filter(job => job.status === 'concluido').length;
+                    addMessage('bot', `✅ ${concluidos} de ${jobs.length} arquivo(s) processado(s) com sucesso!`);
+                    jobs.forEach((job, i) => {
+                        if (job.status !== 'concluido') {
+                            addMessage('bot', `❌ Erro ao processar "${result.jobs[i].filename}": ${job.erro}`);
+                        }
+                    });
+                } catch (error) {
+                    addMessage('bot', `❌ Erro ao enviar os arquivos: ${error.message}`);
+                }
+            }
+            
+            async function aguardarJob(jobId) {
+                while (true) {
+                    const response = await fetch(`/jobs/${jobId}`, {
+                        headers: getAuthHeaders()
+                    });
+                    const job = await response.json();
+                    if (!response.ok) return { status: 'erro', erro: job.detail };
+                    if (job.status === 'concluido' || job.status === 'erro') return job;
+                    await new Promise(resolve => setTimeout(resolve, 1000));
+                }
+            }
+
             async function loadDocuments() {
                 try {
                     const response = await fetch('/documents', {
@@ -853,9 +988,19 @@ async def home():
     </html>
     """
 
+async def _validar_projeto_upload(projeto_id: Optional[int]):
+    """Garante que o projeto de destino do upload existe e está ativo"""
+    projeto = await executores.executar('disco', gerenciador_projetos.buscar_projeto, projeto_id)
+    if not projeto or not projeto.get('ativo', True):
+        raise HTTPException(status_code=400, detail=f"Projeto ID {projeto_id} não encontrado ou inativo")
+
 @app.post("/upload")
-async def upload_file(file: UploadFile = File(...), current_user: dict = Depends(usuario_atual)):
-    """Upload e processa um arquivo (rota protegida)"""
+async def upload_file(
+    file: UploadFile = File(...),
+    projeto_id: Optional[int] = Form(None),
+    current_user: dict = Depends(usuario_atual)
+):
+    """Recebe um arquivo e enfileira seu processamento, opcionalmente num projeto (rota protegida)"""
     try:
         file_ext = Path(file.filename).suffix.lower()
         if file_ext not in document_processor.SUPPORTED_FORMATS:
@@ -864,52 +1009,267 @@ async def upload_file(file: UploadFile = File(...), current_user: dict = Depends
                 detail=f"Formato não suportado: {file_ext}"
             )
         
-        file_path = UPLOAD_DIR / file.filename
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        metadata = {'uploaded_by': current_user['username']}
+        if projeto_id is not None:
+            await _validar_projeto_upload(projeto_id)
+            metadata['projeto_id'] = projeto_id
         
-        doc_data = document_processor.process_file(str(file_path), file.filename)
+        # Nome único evita colisão entre uploads simultâneos do mesmo arquivo
+        file_path = UPLOAD_DIR / f"{uuid.uuid4().hex}_{Path(file.filename).name}"
+        try:
+            arquivo = await salvar_upload(file, file_path, UPLOAD_MAX_BYTES_ARQUIVO)
+        except TamanhoExcedidoError as e:
+            raise HTTPException(status_code=413, detail=str(e))
         
-        doc_id = rag_engine.add_document(
-            content=doc_data['content'],
-            metadata={
-                'filename': doc_data['filename'],
-                'format': doc_data['format'],
-                'size': doc_data['size'],
-                'uploaded_by': current_user['username']
+        # Reenvio de um arquivo que ainda está na fila: devolve o job existente
+        job_id = fila_ingestao.buscar_ativo(arquivo['sha256'], file.filename, projeto_id)
+        if job_id is not None:
+            file_path.unlink()
+            return {
+                'success': True,
+                'job_id': job_id,
+                'filename': file.filename,
+                'projeto_id': projeto_id,
+                'status': 'duplicado',
+                'message': f'Arquivo "{file.filename}" já está na fila de processamento'
             }
-        )
         
-        file_path.unlink()
+        try:
+            job_id = fila_ingestao.enfileirar(
+                file_path=str(file_path),
+                filename=file.filename,
+                metadata=metadata,
+                sha256=arquivo['sha256']
+            )
+        except FilaCheiaError as e:
+            file_path.unlink()
+            raise HTTPException(status_code=503, detail=str(e))
         
         return {
             'success': True,
-            'doc_id': doc_id,
+            'job_id': job_id,
             'filename': file.filename,
-            'message': f'Arquivo "{file.filename}" processado com sucesso!'
+            'projeto_id': projeto_id,
+            'status': 'pendente',
+            'message': f'Arquivo "{file.filename}" recebido e enfileirado para processamento'
         }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/upload/lote")
+async def upload_lote(
+    files: List[UploadFile] = File(...),
+    projeto_id: Optional[int] = Form(None),
+    current_user: dict = Depends(usuario_atual)
+):
+    """
+    Recebe vários arquivos, e/ou arquivos ZIP, e enfileira cada documento (rota protegida)
+    
+    Os arquivos são gravados em paralelo, em blocos, com o limite de tamanho
+    por arquivo (UPLOAD_MAX_MB_ARQUIVO) e do envio (UPLOAD_MAX_MB_LOTE e
+    UPLOAD_MAX_ARQUIVOS_LOTE). Arquivos repetidos (mesmo nome e mesmo SHA-256)
+    no envio ou ainda na fila não são processados de novo. Arquivos recusados
+    não impedem os demais e aparecem em 'rejeitados'.
+    """
+    salvos = []
+    try:
+        metadata = {'uploaded_by': current_user['username']}
+        if projeto_id is not None:
+            await _validar_projeto_upload(projeto_id)
+            metadata['projeto_id'] = projeto_id
+        
+        rejeitados = []
+        aceitos = []
+        for file in files:
+            file_ext = Path(file.filename or '').suffix.lower()
+            if file_ext == '.zip' or file_ext in document_processor.SUPPORTED_FORMATS:
+                aceitos.append(file)
+            else:
+                rejeitados.append({'filename': file.filename, 'erro': f"Formato não suportado: {file_ext}"})
+        
+        if len(aceitos) > UPLOAD_MAX_ARQUIVOS_LOTE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"O envio excede o limite de {UPLOAD_MAX_ARQUIVOS_LOTE} documentos"
+            )
+        
+        # Grava os arquivos em paralelo, sem bloquear o event loop
+        gravacoes = asyncio.Semaphore(4)
+        
+        async def gravar(file: UploadFile):
+            file_path = UPLOAD_DIR / f"{uuid.uuid4().hex}_{Path(file.filename).name}"
+            zip_ = Path(file.filename).suffix.lower() == '.zip'
+            async with gravacoes:
+                try:
+                    arquivo = await salvar_upload(
+                        file, file_path, UPLOAD_MAX_BYTES_LOTE if zip_ else UPLOAD_MAX_BYTES_ARQUIVO
+                    )
+                except TamanhoExcedidoError as e:
+                    rejeitados.append({'filename': file.filename, 'erro': str(e)})
+                    return
+            salvos.append({'filename': file.filename, 'caminho': file_path, 'zip': zip_, **arquivo})
+        
+        # Espera todas as gravações, mesmo se uma falhar: um arquivo gravado
+        # depois da limpeza (finally) ficaria para sempre em uploads/
+        falhas = [
+            resultado
+            for resultado in await asyncio.gather(*(gravar(file) for file in aceitos), return_exceptions=True)
+            if isinstance(resultado, BaseException)
+        ]
+        if falhas:
+            raise falhas[0]
+        
+        if sum(arquivo['tamanho'] for arquivo in salvos) > UPLOAD_MAX_BYTES_LOTE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"O envio excede o limite de {UPLOAD_MAX_BYTES_LOTE // (1024 * 1024)} MB"
+            )
+        
+        # Expande os ZIPs com o que sobra dos limites do envio
+        documentos = [arquivo for arquivo in salvos if not arquivo['zip']]
+        for arquivo in [arquivo for arquivo in salvos if arquivo['zip']]:
+            try:
+                extraidos, recusados = await executores.executar(
+                    'disco', expandir_zip, arquivo['caminho'], UPLOAD_DIR,
+                    document_processor.SUPPORTED_FORMATS,
+                    limite_arquivo=UPLOAD_MAX_BYTES_ARQUIVO,
+                    limite_total=UPLOAD_MAX_BYTES_LOTE - sum(d['tamanho'] for d in documentos),
+                    max_arquivos=UPLOAD_MAX_ARQUIVOS_LOTE - len(documentos)
+                )
+            except TamanhoExcedidoError as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            except ValueError as e:
+                rejeitados.append({'filename': arquivo['filename'], 'erro': str(e)})
+                continue
+            
+            salvos.extend(extraidos)
+            documentos.extend(extraidos)
+            rejeitados.extend(
+                {'filename': f"{arquivo['filename']}/{r['filename']}", 'erro': r['erro']} for r in recusados
+            )
+        
+        # Enfileira cada documento; repetidos (mesmo conteúdo e mesmo nome)
+        # apontam para o job já existente
+        jobs = []
+        vistos = {}
+        for documento in documentos:
+            chave = (documento['sha256'], documento['filename'])
+            job_id = vistos.get(chave) or fila_ingestao.buscar_ativo(
+                documento['sha256'], documento['filename'], projeto_id
+            )
+            if job_id is not None:
+                jobs.append({'filename': documento['filename'], 'job_id': job_id, 'status': 'duplicado'})
+                continue
+            
+            try:
+                job_id = fila_ingestao.enfileirar(
+                    file_path=str(documento['caminho']),
+                    filename=documento['filename'],
+                    metadata=metadata,
+                    sha256=documento['sha256']
+                )
+            except FilaCheiaError as e:
+                rejeitados.append({'filename': documento['filename'], 'erro': str(e)})
+                continue
+            
+            documento['enfileirado'] = True
+            vistos[chave] = job_id
+            jobs.append({'filename': documento['filename'], 'job_id': job_id, 'status': 'pendente'})
         
+        enfileirados = sum(1 for job in jobs if job['status'] == 'pendente')
+        return {
+            'success': bool(jobs),
+            'projeto_id': projeto_id,
+            'jobs': jobs,
+            'rejeitados': rejeitados,
+            'total_bytes': sum(documento['tamanho'] for documento in documentos),
+            'message': f'{enfileirados} arquivo(s) enfileirado(s) para processamento'
+                       + (f', {len(rejeitados)} recusado(s)' if rejeitados else '')
+        }
+    
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # A fila remove os arquivos enfileirados; os demais (ZIPs, repetidos, recusados) saem aqui
+        for arquivo in salvos:
+            if not arquivo.get('enfileirado') and arquivo['caminho'].exists():
+                arquivo['caminho'].unlink()
+
+@app.get("/jobs/{job_id}")
+async def status_job(job_id: str, current_user: dict = Depends(usuario_atual)):
+    """Retorna etapa, contagem de chunks e tempos de um job de ingestão (rota protegida)"""
+    job = fila_ingestao.obter(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest, current_user: dict = Depends(usuario_atual)):
     """Endpoint de chat (rota protegida)"""
     try:
-        response = chatbot.chat(
+        # Constrói o chatbot fora do event loop; achat já não bloqueia
+        bot = await executores.executar('disco', componentes.carregar, 'chatbot')
+        response = await bot.achat(
             user_message=request.message,
             use_rag=request.use_rag,
-            n_context_docs=request.n_context_docs
+            n_context_docs=request.n_context_docs,
+            modo_busca=request.modo_busca,
+            projeto_ids=request.projeto_ids
         )
         return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, current_user: dict = Depends(usuario_atual)):
+    """
+    Endpoint de chat com streaming via Server-Sent Events (rota protegida)
+    
+    Eventos emitidos, nesta ordem:
+    - sources: documentos recuperados
+    - token: trechos da resposta conforme o LLM os gera
+    - fim: métricas da resposta (tempo até o primeiro token, tempo total)
+    - erro: em caso de falha
+    """
+    def eventos():
+        for evento in chatbot.chat_stream(
+            user_message=request.message,
+            use_rag=request.use_rag,
+            n_context_docs=request.n_context_docs,
+            modo_busca=request.modo_busca,
+            projeto_ids=request.projeto_ids
+        ):
+            yield f"event: {evento['evento']}\ndata: {json.dumps(evento['dados'], ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(
+        executores.iterar('llm', eventos()),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.get("/chat/metricas")
+async def chat_metricas(current_user: dict = Depends(usuario_atual)):
+    """Métricas do chat em streaming, como o tempo até o primeiro token (rota protegida)"""
+    if not componentes.carregado('chatbot'):
+        return {"status": "loading"}
+    return chatbot.get_metricas()
+
 @app.get("/documents")
-async def list_documents(current_user: dict = Depends(usuario_atual)):
-    """Lista todos os documentos (rota protegida)"""
+async def list_documents(
+    limit: Optional[int] = None,
+    offset: int = 0,
+    current_user: dict = Depends(usuario_atual)
+):
+    """Lista os documentos, com paginação opcional (rota protegida)"""
     try:
-        documents = rag_engine.list_documents()
+        documents = await executores.executar(
+            'disco', lambda: rag_engine.list_documents(limit=limit, offset=offset)
+        )
         return documents
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -918,11 +1278,21 @@ async def list_documents(current_user: dict = Depends(usuario_atual)):
 async def delete_document(doc_id: str, current_user: dict = Depends(usuario_atual)):
     """Remove um documento (rota protegida)"""
     try:
-        success = rag_engine.delete_document(doc_id)
+        documento = await executores.executar('disco', lambda: rag_engine.registro.buscar(doc_id))
+        success = await executores.executar('disco', lambda: rag_engine.delete_document(doc_id))
         if success:
+            if documento and documento.get('projeto_id'):
+                try:
+                    await executores.executar(
+                        'disco', gerenciador_projetos.decrementar_contador_documentos, documento['projeto_id']
+                    )
+                except ValueError:
+                    pass  # Projeto já removido
             return {'success': True, 'message': 'Documento removido com sucesso'}
         else:
             raise HTTPException(status_code=404, detail="Documento não encontrado")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -930,7 +1300,7 @@ async def delete_document(doc_id: str, current_user: dict = Depends(usuario_atua
 async def clear_all_documents(current_user: dict = Depends(usuario_atual)):
     """Remove todos os documentos (rota protegida)"""
     try:
-        success = rag_engine.clear_all()
+        success = await executores.executar('disco', lambda: rag_engine.clear_all())
         if success:
             return {'success': True, 'message': 'Todos os documentos foram removidos'}
         else:
@@ -942,76 +1312,108 @@ async def clear_all_documents(current_user: dict = Depends(usuario_atual)):
 async def get_stats(current_user: dict = Depends(usuario_atual)):
     """Retorna estatísticas do sistema (rota protegida)"""
     try:
-        stats = rag_engine.get_stats()
+        stats = await executores.executar('disco', lambda: rag_engine.get_stats())
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metricas/executores")
+async def metricas_executores(current_user: dict = Depends(usuario_atual)):
+    """Profundidade de fila, threads ativas e tempos de espera de cada pool (rota protegida)"""
+    return executores.get_stats()
+
+@app.get("/metricas/embeddings")
+async def metricas_embeddings(current_user: dict = Depends(usuario_atual)):
+    """Distribuição dos micro-lotes de consultas e espera na fila (rota protegida)"""
+    if not componentes.carregado('rag_engine'):
+        return {"microlotes": None, "status": "loading"}
+    return {"microlotes": rag_engine.get_stats_microlotes()}
+
 # Endpoints de Exportação
 
+def _resposta_exportacao(partes, media_type: str, filename: str, gzip: bool) -> StreamingResponse:
+    """Monta a resposta em streaming de uma exportação"""
+    headers = {'Content-Disposition': f'attachment; filename="{filename}{".gz" if gzip else ""}"'}
+    if gzip:
+        media_type = 'application/gzip'
+    return StreamingResponse(
+        executores.iterar('disco', codificar(partes, gzip=gzip)),
+        media_type=media_type,
+        headers=headers
+    )
+
+def _iterar_todos_chunks():
+    """Percorre em páginas os chunks de todas as coleções (sem projeto e projetos)"""
+    for projeto_id, _ in rag_engine.colecoes():
+        yield from rag_engine.iterar_chunks(projeto_id)
+
 @app.get("/export/json")
-async def exportar_json(current_user: dict = Depends(usuario_atual)):
-    """Exporta todos os documentos para JSON"""
+async def exportar_json(
+    formato: str = "json",
+    gzip: bool = False,
+    current_user: dict = Depends(usuario_atual)
+):
+    """
+    Exporta todos os documentos em streaming
+    
+    - formato=json: objeto JSON com o array de chunks (padrão)
+    - formato=ndjson: um chunk por linha
+    - gzip=true: comprime a saída
+    """
+    if formato not in ('json', 'ndjson'):
+        raise HTTPException(status_code=400, detail="Formato inválido. Use 'json' ou 'ndjson'")
+    
     try:
-        results = rag_engine.collection.get()
+        itens = (
+            {'id': chunk_id, 'conteudo': conteudo, 'metadata': metadata}
+            for chunk_id, conteudo, metadata in _iterar_todos_chunks()
+        )
+        
+        if formato == 'ndjson':
+            return _resposta_exportacao(
+                gerar_ndjson(itens), 'application/x-ndjson', 'documentos_exportados.ndjson', gzip
+            )
         
-        dados_exportados = {
+        def contar():
+            return (
+                rag_engine.count_documents(),
+                sum(collection.count() for _, collection in rag_engine.colecoes())
+            )
+        
+        total_documentos, total_chunks = await executores.executar('disco', contar)
+        cabecalho = {
             'exportado_por': current_user['nome'],
             'data_exportacao': datetime.now().isoformat(),
             'desenvolvedor': 'Marcio Góes do Nascimento',
-            'total_documentos': len(set([m.get('doc_id') for m in results['metadatas']])),
-            'total_chunks': len(results['ids']),
-            'documentos': []
+            'total_documentos': total_documentos,
+            'total_chunks': total_chunks
         }
-        
-        for i in range(len(results['ids'])):
-            dados_exportados['documentos'].append({
-                'id': results['ids'][i],
-                'conteudo': results['documents'][i],
-                'metadata': results['metadatas'][i] if results['metadatas'] else {}
-            })
-        
-        export_path = EXPORT_DIR / f"export_{current_user['username']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        
-        with open(export_path, 'w', encoding='utf-8') as f:
-            json.dump(dados_exportados, f, ensure_ascii=False, indent=2)
-        
-        return FileResponse(
-            export_path,
-            media_type='application/json',
-            filename='documentos_exportados.json'
+        return _resposta_exportacao(
+            gerar_json(cabecalho, itens), 'application/json', 'documentos_exportados.json', gzip
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/export/csv")
-async def exportar_csv(current_user: dict = Depends(usuario_atual)):
-    """Exporta todos os documentos para CSV"""
+async def exportar_csv(gzip: bool = False, current_user: dict = Depends(usuario_atual)):
+    """Exporta todos os documentos para CSV em streaming"""
     try:
-        results = rag_engine.collection.get()
-        
-        export_path = EXPORT_DIR / f"export_{current_user['username']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        
-        with open(export_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(['ID', 'Conteudo', 'Arquivo', 'Formato', 'Chunk', 'Exportado_Por'])
-            
-            for i in range(len(results['ids'])):
-                metadata = results['metadatas'][i] if results['metadatas'] else {}
-                writer.writerow([
-                    results['ids'][i],
-                    results['documents'][i],
-                    metadata.get('filename', ''),
-                    metadata.get('format', ''),
-                    metadata.get('chunk_index', ''),
-                    current_user['nome']
-                ])
+        linhas = (
+            [
+                chunk_id,
+                conteudo,
+                metadata.get('filename', ''),
+                metadata.get('format', ''),
+                metadata.get('chunk_index', ''),
+                current_user['nome']
+            ]
+            for chunk_id, conteudo, metadata in _iterar_todos_chunks()
+        )
+        colunas = ['ID', 'Conteudo', 'Arquivo', 'Formato', 'Chunk', 'Exportado_Por']
         
-        return FileResponse(
-            export_path,
-            media_type='text/csv',
-            filename='documentos_exportados.csv'
+        return _resposta_exportacao(
+            gerar_csv(colunas, linhas), 'text/csv', 'documentos_exportados.csv', gzip
         )
         
     except Exception as e:
@@ -1019,23 +1421,34 @@ async def exportar_csv(current_user: dict = Depends(usuario_atual)):
 
 @app.get("/health")
 async def health_check():
-    """Verifica se o servidor está funcionando"""
+    """Verifica se o servidor está funcionando (liveness; não carrega componentes)"""
     return {
         'status': 'healthy',
-        'rag_engine': 'operational',
-        'chatbot': 'operational',
+        'rag_engine': 'operational' if componentes.carregado('rag_engine') else 'loading',
+        'chatbot': 'operational' if componentes.carregado('chatbot') else 'loading',
         'desenvolvedor': 'Marcio Góes do Nascimento',
         'versao': '2.0.0'
     }
 
+@app.get("/ready")
+async def ready_check():
+    """Indica se o motor RAG e o chatbot já foram carregados (readiness): 200 ou 503"""
+    return JSONResponse(
+        status_code=200 if componentes.prontos() else 503,
+        content={
+            'status': 'ready' if componentes.prontos() else 'loading',
+            'componentes': componentes.get_stats()
+        }
+    )
+
 if __name__ == "__main__":
     print("🚀 Iniciando RAG Chatbot com Autenticação...")
     print("📡 Acesse: http://localhost:8000")
     print("\n💻 Desenvolvido por: Marcio Góes do Nascimento")
     print("\n⚙️  Configurações:")
-    print(f"   - Banco vetorial: {rag_engine.persist_directory}")
-    print(f"   - Modelo embeddings: {rag_engine.embeddings.model_name}")
-    print(f"   - LLM Provider: {chatbot.llm_provider}")
+    print("   - Banco vetorial: ./chroma_db")
+    print(f"   - Backend embeddings: {os.getenv('EMBEDDINGS_BACKEND', 'huggingface')}")
+    print(f"   - LLM Provider: {os.getenv('LLM_PROVIDER', 'anthropic')}")
     print("\n🔐 Credenciais padrão:")
     print("   - Usuário: admin | Senha: admin123")
     print("   - Usuário: marcio | Senha: marcio2024")
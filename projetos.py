@@ -3,10 +3,14 @@ Sistema de Gestão de Projetos
 Desenvolvido por: Marcio Góes do Nascimento
 
 Permite que administradores criem projetos e associem documentos a eles.
+Os projetos ficam num banco SQLite (modo WAL), seguro para vários workers;
+o antigo data/projetos.json é migrado automaticamente na primeira execução.
 """
 
 import json
 import os
+import sqlite3
+import threading
 from datetime import datetime
 from typing import List, Dict, Optional
 from pathlib import Path
@@ -15,36 +19,153 @@ from pathlib import Path
 class GerenciadorProjetos:
     """Gerenciador de projetos para organização de documentos"""
     
-    def __init__(self, arquivo_projetos: str = "data/projetos.json"):
+    def __init__(self, 
+                 arquivo_projetos: str = "data/projetos.json",
+                 arquivo_banco: str = "data/projetos.db"):
+        """
+        Inicializa o gerenciador
+        
+        Args:
+            arquivo_projetos: Arquivo JSON legado (migrado se existir)
+            arquivo_banco: Arquivo do banco SQLite
+        """
         self.arquivo_projetos = arquivo_projetos
+        self.arquivo_banco = arquivo_banco
+        self._lock = threading.Lock()
         self._garantir_diretorio()
-        self._garantir_arquivo()
+        self._conectar()
+        self._migrar_json()
+    
+    def fechar(self):
+        """Fecha a conexão com o banco"""
+        with self._lock:
+            self._conn.close()
+    
+    def reabrir(self):
+        """
+        Abre uma conexão nova com o banco
+        
+        Uma conexão SQLite não pode ser usada por um processo criado por
+        fork: cada worker do Gunicorn chama reabrir() logo após o fork.
+        """
+        with self._lock:
+            self._conectar()
     
     def _garantir_diretorio(self):
-        """Garante que o diretório data/ existe"""
-        Path("data").mkdir(exist_ok=True)
+        """Garante que o diretório do banco existe"""
+        Path(self.arquivo_banco).parent.mkdir(parents=True, exist_ok=True)
     
-    def _garantir_arquivo(self):
-        """Garante que o arquivo de projetos existe"""
-        if not os.path.exists(self.arquivo_projetos):
-            self._salvar_projetos([])
+    def _conectar(self):
+        """Abre o banco SQLite e cria a tabela de projetos"""
+        self._conn = sqlite3.connect(
+            self.arquivo_banco, 
+            timeout=30, 
+            check_same_thread=False
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        # AUTOINCREMENT: o ID de um projeto removido nunca é reaproveitado (a
+        # coleção "documents_projeto_<id>" dele não pode passar a outro projeto)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS projetos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome TEXT NOT NULL,
+                descricao TEXT NOT NULL,
+                criado_por TEXT,
+                data_criacao TEXT NOT NULL,
+                ativo INTEGER NOT NULL DEFAULT 1,
+                total_documentos INTEGER NOT NULL DEFAULT 0,
+                data_atualizacao TEXT,
+                data_desativacao TEXT
+            )
+        """)
+        self._migrar_autoincrement()
+        self._conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_projetos_nome ON projetos (nome COLLATE NOCASE)"
+        )
+        self._conn.commit()
     
-    def _carregar_projetos(self) -> List[Dict]:
-        """Carrega projetos do arquivo JSON"""
-        try:
-            with open(self.arquivo_projetos, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Erro ao carregar projetos: {e}")
-            return []
+    def _migrar_autoincrement(self):
+        """Recria a tabela de bancos antigos, criada sem AUTOINCREMENT"""
+        sql = self._conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'projetos'"
+        ).fetchone()[0]
+        if 'AUTOINCREMENT' in sql.upper():
+            return
+        
+        # Copiar as linhas com os IDs atuais também inicializa o sqlite_sequence
+        with self._conn:
+            self._conn.execute("ALTER TABLE projetos RENAME TO projetos_antiga")
+            self._conn.execute(sql.replace("INTEGER PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT", 1))
+            self._conn.execute("INSERT INTO projetos SELECT * FROM projetos_antiga")
+            self._conn.execute("DROP TABLE projetos_antiga")
+        print("✅ Tabela de projetos migrada para IDs sem reaproveitamento")
     
-    def _salvar_projetos(self, projetos: List[Dict]):
-        """Salva projetos no arquivo JSON"""
-        try:
-            with open(self.arquivo_projetos, 'w', encoding='utf-8') as f:
-                json.dump(projetos, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Erro ao salvar projetos: {e}")
+    def _migrar_json(self):
+        """Importa o arquivo JSON legado uma única vez, se o banco estiver vazio"""
+        if not os.path.exists(self.arquivo_projetos):
+            return
+        
+        with self._lock:
+            # BEGIN IMMEDIATE serializa a migração entre workers concorrentes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._conn.execute("SELECT COUNT(*) FROM projetos").fetchone()[0] > 0:
+                    self._conn.rollback()
+                    return
+                
+                with open(self.arquivo_projetos, 'r', encoding='utf-8') as f:
+                    projetos = json.load(f)
+                
+                self._conn.executemany(
+                    """INSERT INTO projetos
+                           (id, nome, descricao, criado_por, data_criacao, ativo,
+                            total_documentos, data_atualizacao, data_desativacao)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    [
+                        (
+                            p['id'],
+                            p['nome'],
+                            p.get('descricao', ''),
+                            p.get('criado_por'),
+                            p.get('data_criacao', datetime.now().isoformat()),
+                            int(p.get('ativo', True)),
+                            p.get('total_documentos', 0),
+                            p.get('data_atualizacao'),
+                            p.get('data_desativacao')
+                        )
+                        for p in projetos
+                    ]
+                )
+                self._conn.commit()
+            except Exception as e:
+                self._conn.rollback()
+                print(f"Erro ao migrar projetos: {e}")
+                return
+        
+        if os.path.exists(self.arquivo_projetos):
+            os.replace(self.arquivo_projetos, self.arquivo_projetos + ".migrado")
+        print(f"✅ {len(projetos)} projeto(s) migrado(s) de {self.arquivo_projetos} para {self.arquivo_banco}")
+    
+    @staticmethod
+    def _para_dict(linha: sqlite3.Row) -> Dict:
+        """Converte uma linha do banco no formato de projeto da API"""
+        projeto = {
+            "id": linha['id'],
+            "nome": linha['nome'],
+            "descricao": linha['descricao'],
+            "criado_por": linha['criado_por'],
+            "data_criacao": linha['data_criacao'],
+            "ativo": bool(linha['ativo']),
+            "total_documentos": linha['total_documentos']
+        }
+        
+        for campo in ('data_atualizacao', 'data_desativacao'):
+            if linha[campo]:
+                projeto[campo] = linha[campo]
+        
+        return projeto
     
     def criar_projeto(
         self, 
@@ -63,30 +184,19 @@ class GerenciadorProjetos:
         Returns:
             Dict com dados do projeto criado
         """
-        projetos = self._carregar_projetos()
-        
-        # Verificar se já existe projeto com esse nome
-        if any(p['nome'].lower() == nome.lower() for p in projetos):
+        try:
+            with self._lock, self._conn:
+                cursor = self._conn.execute(
+                    """INSERT INTO projetos (nome, descricao, criado_por, data_criacao)
+                       VALUES (?, ?, ?, ?)""",
+                    (nome, descricao, usuario_criador, datetime.now().isoformat())
+                )
+                novo_id = cursor.lastrowid
+        except sqlite3.IntegrityError:
             raise ValueError(f"Já existe um projeto com o nome '{nome}'")
         
-        # Gerar ID único
-        proximo_id = max([p['id'] for p in projetos], default=0) + 1
-        
-        novo_projeto = {
-            "id": proximo_id,
-            "nome": nome,
-            "descricao": descricao,
-            "criado_por": usuario_criador,
-            "data_criacao": datetime.now().isoformat(),
-            "ativo": True,
-            "total_documentos": 0
-        }
-        
-        projetos.append(novo_projeto)
-        self._salvar_projetos(projetos)
-        
-        print(f"✅ Projeto '{nome}' criado com sucesso! ID: {proximo_id}")
-        return novo_projeto
+        print(f"✅ Projeto '{nome}' criado com sucesso! ID: {novo_id}")
+        return self.buscar_projeto(novo_id)
     
     def listar_projetos(self, apenas_ativos: bool = True) -> List[Dict]:
         """
@@ -98,12 +208,14 @@ class GerenciadorProjetos:
         Returns:
             Lista de projetos
         """
-        projetos = self._carregar_projetos()
-        
+        consulta = "SELECT * FROM projetos"
         if apenas_ativos:
-            projetos = [p for p in projetos if p.get('ativo', True)]
+            consulta += " WHERE ativo = 1"
+        
+        with self._lock:
+            linhas = self._conn.execute(consulta + " ORDER BY id").fetchall()
         
-        return projetos
+        return [self._para_dict(linha) for linha in linhas]
     
     def buscar_projeto(self, projeto_id: int) -> Optional[Dict]:
         """
@@ -115,17 +227,16 @@ class GerenciadorProjetos:
         Returns:
             Dict com dados do projeto ou None
         """
-        projetos = self._carregar_projetos()
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT * FROM projetos WHERE id = ?", (projeto_id,)
+            ).fetchone()
         
-        for projeto in projetos:
-            if projeto['id'] == projeto_id:
-                return projeto
-        
-        return None
+        return self._para_dict(linha) if linha else None
     
     def buscar_projeto_por_nome(self, nome: str) -> Optional[Dict]:
         """
-        Busca um projeto por nome
+        Busca um projeto por nome (sem diferenciar maiúsculas)
         
         Args:
             nome: Nome do projeto
@@ -133,13 +244,12 @@ class GerenciadorProjetos:
         Returns:
             Dict com dados do projeto ou None
         """
-        projetos = self._carregar_projetos()
-        
-        for projeto in projetos:
-            if projeto['nome'].lower() == nome.lower():
-                return projeto
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT * FROM projetos WHERE nome = ? COLLATE NOCASE", (nome,)
+            ).fetchone()
         
-        return None
+        return self._para_dict(linha) if linha else None
     
     def atualizar_projeto(
         self, 
@@ -160,31 +270,30 @@ class GerenciadorProjetos:
         Returns:
             Dict com dados atualizados
         """
-        projetos = self._carregar_projetos()
+        campos = {'data_atualizacao': datetime.now().isoformat()}
+        if nome is not None:
+            campos['nome'] = nome
+        if descricao is not None:
+            campos['descricao'] = descricao
+        if ativo is not None:
+            campos['ativo'] = int(ativo)
         
-        for i, projeto in enumerate(projetos):
-            if projeto['id'] == projeto_id:
-                if nome is not None:
-                    # Verificar se novo nome já existe
-                    if any(p['nome'].lower() == nome.lower() and p['id'] != projeto_id 
-                           for p in projetos):
-                        raise ValueError(f"Já existe um projeto com o nome '{nome}'")
-                    projeto['nome'] = nome
-                
-                if descricao is not None:
-                    projeto['descricao'] = descricao
-                
-                if ativo is not None:
-                    projeto['ativo'] = ativo
-                
-                projeto['data_atualizacao'] = datetime.now().isoformat()
-                projetos[i] = projeto
-                self._salvar_projetos(projetos)
-                
-                print(f"✅ Projeto ID {projeto_id} atualizado com sucesso!")
-                return projeto
+        atribuicoes = ', '.join(f"{campo} = ?" for campo in campos)
+        
+        try:
+            with self._lock, self._conn:
+                cursor = self._conn.execute(
+                    f"UPDATE projetos SET {atribuicoes} WHERE id = ?",
+                    (*campos.values(), projeto_id)
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Já existe um projeto com o nome '{nome}'")
+        
+        if cursor.rowcount == 0:
+            raise ValueError(f"Projeto ID {projeto_id} não encontrado")
         
-        raise ValueError(f"Projeto ID {projeto_id} não encontrado")
+        print(f"✅ Projeto ID {projeto_id} atualizado com sucesso!")
+        return self.buscar_projeto(projeto_id)
     
     def deletar_projeto(self, projeto_id: int, deletar_documentos: bool = False):
         """
@@ -194,24 +303,35 @@ class GerenciadorProjetos:
             projeto_id: ID do projeto
             deletar_documentos: Se True, marca documentos para deleção
         """
-        projetos = self._carregar_projetos()
+        projeto = self.buscar_projeto(projeto_id)
+        if not projeto:
+            raise ValueError(f"Projeto ID {projeto_id} não encontrado")
         
-        for i, projeto in enumerate(projetos):
-            if projeto['id'] == projeto_id:
-                if deletar_documentos:
-                    # Remover permanentemente
-                    projetos.pop(i)
-                    print(f"🗑️  Projeto '{projeto['nome']}' deletado permanentemente!")
-                else:
-                    # Apenas desativar
-                    projetos[i]['ativo'] = False
-                    projetos[i]['data_desativacao'] = datetime.now().isoformat()
-                    print(f"⚠️  Projeto '{projeto['nome']}' desativado!")
-                
-                self._salvar_projetos(projetos)
-                return
+        with self._lock, self._conn:
+            if deletar_documentos:
+                # Remover permanentemente
+                self._conn.execute("DELETE FROM projetos WHERE id = ?", (projeto_id,))
+                print(f"🗑️  Projeto '{projeto['nome']}' deletado permanentemente!")
+            else:
+                # Apenas desativar
+                self._conn.execute(
+                    "UPDATE projetos SET ativo = 0, data_desativacao = ? WHERE id = ?",
+                    (datetime.now().isoformat(), projeto_id)
+                )
+                print(f"⚠️  Projeto '{projeto['nome']}' desativado!")
+    
+    def _somar_contador(self, projeto_id: int, delta: int):
+        """Soma delta ao contador de documentos numa única instrução atômica"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                """UPDATE projetos
+                   SET total_documentos = MAX(0, total_documentos + ?)
+                   WHERE id = ?""",
+                (delta, projeto_id)
+            )
         
-        raise ValueError(f"Projeto ID {projeto_id} não encontrado")
+        if cursor.rowcount == 0:
+            raise ValueError(f"Projeto ID {projeto_id} não encontrado")
     
     def incrementar_contador_documentos(self, projeto_id: int):
         """
@@ -220,15 +340,7 @@ class GerenciadorProjetos:
         Args:
             projeto_id: ID do projeto
         """
-        projetos = self._carregar_projetos()
-        
-        for i, projeto in enumerate(projetos):
-            if projeto['id'] == projeto_id:
-                projetos[i]['total_documentos'] = projeto.get('total_documentos', 0) + 1
-                self._salvar_projetos(projetos)
-                return
-        
-        raise ValueError(f"Projeto ID {projeto_id} não encontrado")
+        self._somar_contador(projeto_id, 1)
     
     def decrementar_contador_documentos(self, projeto_id: int):
         """
@@ -237,16 +349,7 @@ class GerenciadorProjetos:
         Args:
             projeto_id: ID do projeto
         """
-        projetos = self._carregar_projetos()
-        
-        for i, projeto in enumerate(projetos):
-            if projeto['id'] == projeto_id:
-                total = projeto.get('total_documentos', 0)
-                projetos[i]['total_documentos'] = max(0, total - 1)
-                self._salvar_projetos(projetos)
-                return
-        
-        raise ValueError(f"Projeto ID {projeto_id} não encontrado")
+        self._somar_contador(projeto_id, -1)
     
     def estatisticas_projeto(self, projeto_id: int) -> Dict:
         """
@@ -1,29 +1,90 @@
 import os
 import uuid
-from typing import List, Dict, Any, Optional
-import chromadb
-from chromadb.config import Settings
-from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.vectorstores import Chroma
-from langchain.docstore.document import Document as LangchainDocument
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+from backends_embeddings import criar_backend
+from despachante_embeddings import DespachanteEmbeddings
+from cache_embeddings import CacheEmbeddings, CacheConsultas, hash_texto
+from registro_documentos import RegistroDocumentos
+from indice_lexico import IndiceLexico, fusao_rrf
+from reranqueador import Reranqueador
+from diversificacao import selecionar_mmr, limitar_por_documento
+from empacotador_contexto import tamanho_sobreposicao
+from exportacao_streaming import iterar_chunks
+
+
+def criar_divisor_texto(chunk_size: int = 1000, chunk_overlap: int = 200):
+    """
+    Cria o divisor de texto da indexação
+    
+    Os IDs dos chunks vêm do hash do conteúdo, então quem divide documentos
+    fora do motor (ex.: processos de ingestao_lote) deve usar este divisor
+    com os mesmos parâmetros.
+    """
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=["\n\n", "\n", ". ", " ", ""]
+    )
 
 
 class RAGEngine:
     """Motor de Retrieval Augmented Generation"""
     
+    MODOS_BUSCA = ("vetorial", "lexico", "hibrido")
+    
     def __init__(self, 
                  persist_directory: str = "./chroma_db",
                  collection_name: str = "documents",
-                 embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"):
+                 embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 embedding_backend: str = "huggingface",
+                 cache_max_entradas: int = 200_000,
+                 cache_consultas_capacidade: int = 1024,
+                 cache_consultas_ttl: float = 3600,
+                 reranquear_padrao: bool = False,
+                 reranqueador_modelo: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                 reranqueador_orcamento_ms: float = 500,
+                 diversificar_padrao: bool = False,
+                 max_por_documento_padrao: Optional[int] = None,
+                 chunk_size: int = 1000,
+                 chunk_overlap: int = 200,
+                 janela_vizinhos_padrao: int = 0,
+                 microlote_janela_ms: float = 0,
+                 microlote_max: int = 32):
         """
         Inicializa o motor RAG
         
         Args:
             persist_directory: Diretório para persistir o banco vetorial
-            collection_name: Nome da coleção no ChromaDB
+            collection_name: Nome da coleção no ChromaDB (documentos sem projeto;
+                cada projeto usa a coleção "<collection_name>_projeto_<id>")
             embedding_model: Modelo de embeddings a ser usado
+            embedding_backend: "huggingface" (PyTorch), "onnx" ou "onnx-int8"
+                (ONNX Runtime, ver backends_embeddings)
+            cache_max_entradas: Limite de embeddings no cache em disco
+            cache_consultas_capacidade: Limite de consultas no cache em memória
+            cache_consultas_ttl: Tempo de vida (segundos) das consultas em cache
+            reranquear_padrao: Se a busca reranqueia os resultados quando não informado
+            reranqueador_modelo: Cross-encoder usado no reranqueamento
+            reranqueador_orcamento_ms: Tempo máximo do reranqueamento antes de
+                manter a ordem original
+            diversificar_padrao: Se a busca aplica MMR quando não informado
+            max_por_documento_padrao: Limite de chunks por documento quando não
+                informado (None = sem limite)
+            chunk_size: Tamanho máximo dos chunks, em caracteres
+            chunk_overlap: Caracteres repetidos entre chunks consecutivos
+            janela_vizinhos_padrao: Chunks vizinhos (antes e depois) anexados a
+                cada resultado quando não informado (0 = só o chunk encontrado)
+            microlote_janela_ms: Janela para agrupar consultas concorrentes numa
+                só passada do modelo (0 = cada consulta embutida sozinha)
+            microlote_max: Consultas que fecham o micro-lote sem esperar a janela
         """
+        # Importações pesadas só ao criar o motor (importar o módulo é rápido)
+        import chromadb
+        
         self.persist_directory = persist_directory
         self.collection_name = collection_name
         
@@ -31,11 +92,25 @@ class RAGEngine:
         os.makedirs(persist_directory, exist_ok=True)
         
         # Inicializa embeddings
-        print("Carregando modelo de embeddings...")
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=embedding_model,
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
+        print(f"Carregando modelo de embeddings ({embedding_backend})...")
+        self.embeddings = criar_backend(embedding_backend, embedding_model)
+        if microlote_janela_ms > 0:
+            self.embeddings = DespachanteEmbeddings(
+                self.embeddings,
+                janela_ms=microlote_janela_ms,
+                max_lote=microlote_max
+            )
+        
+        # Cache persistente de embeddings dos chunks
+        self.cache_embeddings = CacheEmbeddings(
+            arquivo_cache=os.path.join(persist_directory, "cache_embeddings.db"),
+            max_entradas=cache_max_entradas
+        )
+        
+        # Cache em memória de embeddings de consultas
+        self.cache_consultas = CacheConsultas(
+            capacidade=cache_consultas_capacidade,
+            ttl_segundos=cache_consultas_ttl
         )
         
         # Inicializa ChromaDB
@@ -45,83 +120,489 @@ class RAGEngine:
         try:
             self.collection = self.client.get_collection(name=collection_name)
             print(f"Coleção '{collection_name}' carregada com {self.collection.count()} documentos")
+            self._verificar_modelo_colecao(self.collection)
         except:
             self.collection = self.client.create_collection(
                 name=collection_name,
-                metadata={"hnsw:space": "cosine"}
+                metadata={"hnsw:space": "cosine", "embedding_model": self.embeddings.model_name}
             )
             print(f"Nova coleção '{collection_name}' criada")
         
+        # Reranqueamento opcional com cross-encoder (modelo carregado no primeiro uso)
+        self.reranquear_padrao = reranquear_padrao
+        self.reranqueador = Reranqueador(
+            modelo=reranqueador_modelo,
+            orcamento_ms=reranqueador_orcamento_ms
+        )
+        
+        # Diversificação (MMR) e limite de chunks por documento
+        self.diversificar_padrao = diversificar_padrao
+        self.max_por_documento_padrao = max_por_documento_padrao
+        
+        # Expansão dos resultados para os chunks vizinhos (small-to-big)
+        self.janela_vizinhos_padrao = janela_vizinhos_padrao
+        
+        # Coleções por projeto, abertas sob demanda
+        self._colecoes_projetos: Dict[int, Any] = {}
+        
+        # Coleções com chunks (sem projeto e de cada projeto), para reconstruir
+        # o registro e o índice léxico se os arquivos deles se perderam
+        colecoes_com_chunks = [(pid, colecao) for pid, colecao in self.colecoes() if colecao.count() > 0]
+        
+        # Registro de documentos (evita varrer a coleção para listar)
+        self.registro = RegistroDocumentos(
+            arquivo_registro=os.path.join(persist_directory, "registro_documentos.db")
+        )
+        if self.registro.contar() == 0 and colecoes_com_chunks:
+            total = sum(
+                self.registro.reconstruir(colecao, projeto_id=pid) for pid, colecao in colecoes_com_chunks
+            )
+            print(f"Registro de documentos reconstruído com {total} documentos")
+        
+        # Índice léxico (BM25) para a busca híbrida
+        self.indice_lexico = IndiceLexico(
+            arquivo_indice=os.path.join(persist_directory, "indice_lexico.db")
+        )
+        if self.indice_lexico.contar() == 0 and colecoes_com_chunks:
+            total = sum(
+                self.indice_lexico.reconstruir(iterar_chunks(colecao), projeto_id=pid)
+                for pid, colecao in colecoes_com_chunks
+            )
+            print(f"Índice léxico reconstruído com {total} chunks")
+        
         # Inicializa text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.text_splitter = criar_divisor_texto(chunk_size, chunk_overlap)
+    
+    def _nome_colecao_projeto(self, projeto_id: int) -> str:
+        """Nome da coleção do ChromaDB de um projeto"""
+        return f"{self.collection_name}_projeto_{projeto_id}"
+    
+    def colecao_projeto(self, projeto_id: Optional[int] = None):
+        """
+        Retorna a coleção de um projeto, criando-a se necessário
+        
+        Args:
+            projeto_id: ID do projeto (None ou 0 = coleção sem projeto)
+            
+        Returns:
+            Coleção do ChromaDB
+        """
+        if not projeto_id:
+            return self.collection
+        
+        if projeto_id not in self._colecoes_projetos:
+            self._colecoes_projetos[projeto_id] = self.client.get_or_create_collection(
+                name=self._nome_colecao_projeto(projeto_id),
+                metadata={"hnsw:space": "cosine", "embedding_model": self.embeddings.model_name}
+            )
+            self._verificar_modelo_colecao(self._colecoes_projetos[projeto_id])
+        
+        return self._colecoes_projetos[projeto_id]
+    
+    def iterar_chunks(self, projeto_id: Optional[int] = None):
+        """
+        Percorre os chunks de um projeto (None/0 = sem projeto), paginando
+        pelos documentos do registro
+        
+        Yields:
+            Tuplas (id, conteúdo, metadados)
+        """
+        return iterar_chunks(
+            self.colecao_projeto(projeto_id),
+            doc_ids=self.registro.listar_ids_projeto(projeto_id or 0)
         )
     
+    def _verificar_modelo_colecao(self, colecao):
+        """Avisa se a coleção foi indexada com outro modelo/backend de embeddings"""
+        # Coleções sem a informação foram criadas com o backend PyTorch
+        modelo_colecao = (colecao.metadata or {}).get('embedding_model', self.embeddings.model_name.split('#')[0])
+        if modelo_colecao != self.embeddings.model_name and colecao.count() > 0:
+            print(
+                f"⚠️ Coleção '{colecao.name}' indexada com '{modelo_colecao}', mas o modelo atual é "
+                f"'{self.embeddings.model_name}'. As buscas serão aproximadas; reindexe para corrigir."
+            )
+    
+    def colecoes(self, projeto_ids: Optional[List[int]] = None) -> List[Tuple[int, Any]]:
+        """
+        Lista as coleções existentes como pares (projeto_id, coleção)
+        
+        Args:
+            projeto_ids: Restringe a estes projetos (None = todas; 0 = sem projeto)
+            
+        Returns:
+            Lista de (projeto_id, coleção); projeto_id 0 é a coleção sem projeto
+        """
+        # Coleções já abertas dispensam a listagem no ChromaDB
+        if projeto_ids is not None and all(
+            pid == 0 or pid in self._colecoes_projetos for pid in projeto_ids
+        ):
+            return [(pid, self.colecao_projeto(pid)) for pid in sorted(set(projeto_ids))]
+        
+        prefixo = f"{self.collection_name}_projeto_"
+        existentes = {0}
+        for colecao in self.client.list_collections():
+            nome = getattr(colecao, 'name', colecao)
+            if nome.startswith(prefixo) and nome[len(prefixo):].isdigit():
+                existentes.add(int(nome[len(prefixo):]))
+        
+        if projeto_ids is not None:
+            existentes &= set(projeto_ids)
+        
+        return [(pid, self.colecao_projeto(pid)) for pid in sorted(existentes)]
+    
     def add_document(self, 
                      content: str, 
-                     metadata: Dict[str, Any]) -> str:
+                     metadata: Dict[str, Any],
+                     progresso: Optional[Callable[..., None]] = None,
+                     projeto_id: Optional[int] = None) -> str:
         """
-        Adiciona um documento ao banco vetorial
+        Adiciona (ou atualiza) um documento no banco vetorial
         
         Args:
             content: Conteúdo textual do documento
             metadata: Metadados do documento (filename, format, etc)
+            progresso: Callback opcional chamado como progresso(etapa, **info)
+                ao entrar em cada etapa (chunking, embedding, indexing)
+            projeto_id: Projeto do documento; cada projeto tem sua própria
+                coleção (None = coleção sem projeto)
             
         Returns:
             ID do documento adicionado
         """
+        return self.indexar_documento(content, metadata, progresso, projeto_id)['doc_id']
+    
+    def indexar_documento(self, 
+                          content: str, 
+                          metadata: Dict[str, Any],
+                          progresso: Optional[Callable[..., None]] = None,
+                          projeto_id: Optional[int] = None,
+                          chunks: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Indexa um documento de forma incremental
+        
+        Um arquivo reenviado (mesmo nome no mesmo projeto) mantém o doc_id;
+        se o conteúdo não mudou, nada é refeito. Os chunks são identificados pelo hash do conteúdo:
+        só os chunks novos são embutidos e inseridos, os que sumiram são
+        removidos e os demais só têm os metadados (posição) atualizados.
+        
+        Args:
+            content: Conteúdo textual do documento
+            metadata: Metadados do documento (filename, format, etc)
+            progresso: Callback opcional chamado como progresso(etapa, **info)
+            projeto_id: Projeto do documento (None = coleção sem projeto)
+            chunks: Chunks já divididos com o divisor do motor (None = divide aqui)
+            
+        Returns:
+            Dict com doc_id, status ('novo', 'atualizado' ou 'inalterado'),
+            chunks, chunks_novos e chunks_removidos
+        """
+        if progresso is None:
+            progresso = lambda etapa, **info: None
+        
+        plano = self._planejar_indexacao(content, metadata, projeto_id, chunks, progresso)
+        if plano['status'] == 'inalterado':
+            return self._resultado_indexacao(plano)
+        
+        novos = plano['novos']
+        progresso('embedding', chunks_total=plano['total_chunks'])
+        
+        # Gera embeddings (consultando o cache) apenas dos chunks novos
+        embeddings_list = self._embed_documents([plano['textos'][i] for i in novos])
+        
+        progresso('indexing', chunks_processados=plano['total_chunks'])
+        if novos:
+            plano['collection'].add(
+                ids=[plano['ids'][i] for i in novos],
+                embeddings=embeddings_list,
+                documents=[plano['textos'][i] for i in novos],
+                metadatas=[plano['metadatas'][i] for i in novos]
+            )
+        
+        self._concluir_indexacao(plano)
+        return self._resultado_indexacao(plano)
+    
+    def indexar_documentos(self, 
+                           documentos: List[Dict[str, Any]],
+                           projeto_id: Optional[int] = None,
+                           tamanho_lote_chroma: int = 5000) -> List[Dict[str, Any]]:
+        """
+        Indexa vários documentos de uma vez (ingestão em massa)
+        
+        Mesma lógica incremental de indexar_documento, mas os chunks novos de
+        todos os documentos são embutidos juntos, em lotes grandes, e gravados
+        com poucas chamadas a collection.add. Um documento com erro não
+        interrompe os demais.
+        
+        Args:
+            documentos: Dicts com content, metadata e, opcionalmente, chunks
+            projeto_id: Projeto dos documentos (None = coleção sem projeto,
+                ou o projeto_id dos metadados)
+            tamanho_lote_chroma: Máximo de chunks por chamada a collection.add
+            
+        Returns:
+            Resultado de cada documento, na mesma ordem; documentos com erro
+            têm status 'erro' e a mensagem em 'erro'
+        """
+        resultados: List[Optional[Dict[str, Any]]] = [None] * len(documentos)
+        planos = []
+        
+        # Documentos que repetem o nome de outro do mesmo lote (no mesmo projeto)
+        # ficam para depois, para que vejam a versão gravada pelo primeiro
+        vistos = set()
+        adiados = []
+        
+        for posicao, documento in enumerate(documentos):
+            metadata = documento['metadata']
+            chave = (projeto_id or metadata.get('projeto_id') or None, metadata.get('filename', 'unknown'))
+            if chave in vistos:
+                adiados.append(posicao)
+                continue
+            vistos.add(chave)
+            
+            try:
+                plano = self._planejar_indexacao(documento['content'], metadata, projeto_id, documento.get('chunks'))
+            except Exception as e:
+                resultados[posicao] = {'status': 'erro', 'erro': str(e)}
+                continue
+            
+            if plano['status'] == 'inalterado':
+                resultados[posicao] = self._resultado_indexacao(plano)
+            else:
+                planos.append((posicao, plano))
+        
+        # Uma passada de embeddings para os chunks novos de todos os documentos
+        pendentes = [(plano, i) for _, plano in planos for i in plano['novos']]
+        embeddings_list = self._embed_documents([plano['textos'][i] for plano, i in pendentes])
+        
+        # Inserção em lotes, por coleção; se falhar, desfaz o que foi inserido
+        por_colecao: Dict[int, List[int]] = {}
+        for n, (plano, _) in enumerate(pendentes):
+            por_colecao.setdefault(plano['projeto_id'] or 0, []).append(n)
+        
+        inseridos = []
+        try:
+            for indices in por_colecao.values():
+                collection = pendentes[indices[0]][0]['collection']
+                for inicio in range(0, len(indices), tamanho_lote_chroma):
+                    lote = indices[inicio:inicio + tamanho_lote_chroma]
+                    ids = [pendentes[n][0]['ids'][pendentes[n][1]] for n in lote]
+                    collection.add(
+                        ids=ids,
+                        embeddings=[embeddings_list[n] for n in lote],
+                        documents=[pendentes[n][0]['textos'][pendentes[n][1]] for n in lote],
+                        metadatas=[pendentes[n][0]['metadatas'][pendentes[n][1]] for n in lote]
+                    )
+                    inseridos.append((collection, ids))
+        except Exception:
+            for collection, ids in inseridos:
+                collection.delete(ids=ids)
+            raise
+        
+        for posicao, plano in planos:
+            try:
+                self._concluir_indexacao(plano)
+                resultados[posicao] = self._resultado_indexacao(plano)
+            except Exception as e:
+                resultados[posicao] = {'doc_id': plano['doc_id'], 'status': 'erro', 'erro': str(e)}
+        
+        if adiados:
+            restantes = self.indexar_documentos(
+                [documentos[posicao] for posicao in adiados], projeto_id, tamanho_lote_chroma
+            )
+            for posicao, resultado in zip(adiados, restantes):
+                resultados[posicao] = resultado
+        
+        return resultados
+    
+    def _planejar_indexacao(self, 
+                            content: str, 
+                            metadata: Dict[str, Any],
+                            projeto_id: Optional[int] = None,
+                            chunks: Optional[List[str]] = None,
+                            progresso: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+        """
+        Compara o documento com a versão indexada, sem gravar nada
+        
+        Returns:
+            Plano com doc_id, status, chunks (textos, ids, metadados) e os
+            índices dos chunks novos e movidos e os IDs dos removidos
+        """
         if not content or not content.strip():
             raise ValueError("Conteúdo do documento está vazio")
         
+        projeto_id = projeto_id or metadata.get('projeto_id') or None
+        metadata = dict(metadata)
+        if projeto_id:
+            metadata['projeto_id'] = projeto_id
+        metadata['content_hash'] = hash_texto(content)
+        collection = self.colecao_projeto(projeto_id)
+        
+        # A versão anterior é a do mesmo nome no projeto; conteúdo igual com outro
+        # nome vira outro documento (os embeddings vêm do cache, sem reprocessar)
+        anterior = self.registro.buscar_versao(metadata.get('filename', 'unknown'), projeto_id)
+        if anterior and anterior['content_hash'] == metadata['content_hash']:
+            print(f"Documento '{metadata.get('filename', 'unknown')}' sem alterações ({anterior['doc_id']})")
+            return {
+                'doc_id': anterior['doc_id'],
+                'status': 'inalterado',
+                'total_chunks': anterior['chunks'],
+                'novos': [],
+                'removidos': []
+            }
+        
         # Divide o documento em chunks
-        chunks = self.text_splitter.split_text(content)
+        if chunks is None:
+            if progresso is not None:
+                progresso('chunking')
+            chunks = self.text_splitter.split_text(content)
         
         if not chunks:
             raise ValueError("Não foi possível dividir o documento em chunks")
         
-        # Gera ID único para o documento
-        doc_id = str(uuid.uuid4())
+        # Reaproveita o ID da versão anterior ou gera um novo
+        doc_id = anterior['doc_id'] if anterior else str(uuid.uuid4())
         
-        # Prepara os dados para inserção
+        # Prepara os dados; o ID do chunk vem do hash do conteúdo
         ids = []
-        documents = []
         metadatas = []
+        ocorrencias: Dict[str, int] = {}
         
         for i, chunk in enumerate(chunks):
-            chunk_id = f"{doc_id}_chunk_{i}"
+            chunk_hash = hash_texto(chunk)
+            ocorrencias[chunk_hash] = ocorrencias.get(chunk_hash, 0) + 1
+            chunk_id = f"{doc_id}_{chunk_hash[:16]}"
+            if ocorrencias[chunk_hash] > 1:
+                chunk_id += f"_{ocorrencias[chunk_hash]}"
             ids.append(chunk_id)
-            documents.append(chunk)
             
             # Adiciona informações do chunk aos metadados
             chunk_metadata = metadata.copy()
             chunk_metadata.update({
                 'doc_id': doc_id,
                 'chunk_index': i,
-                'total_chunks': len(chunks)
+                'total_chunks': len(chunks),
+                'chunk_hash': chunk_hash
             })
             metadatas.append(chunk_metadata)
         
-        # Gera embeddings e adiciona ao ChromaDB
-        embeddings_list = self.embeddings.embed_documents(documents)
+        # Chunks da versão anterior
+        existentes = {}
+        if anterior:
+            results = collection.get(where={"doc_id": doc_id}, include=['metadatas'])
+            existentes = dict(zip(results['ids'], results['metadatas'] or []))
+        
+        return {
+            'doc_id': doc_id,
+            'status': 'atualizado' if anterior else 'novo',
+            'projeto_id': projeto_id,
+            'metadata': metadata,
+            'collection': collection,
+            'total_chunks': len(chunks),
+            'textos': chunks,
+            'ids': ids,
+            'metadatas': metadatas,
+            'novos': [i for i, chunk_id in enumerate(ids) if chunk_id not in existentes],
+            'movidos': [i for i, chunk_id in enumerate(ids) if chunk_id in existentes and existentes[chunk_id] != metadatas[i]],
+            'removidos': [chunk_id for chunk_id in existentes if chunk_id not in set(ids)]
+        }
+    
+    def _concluir_indexacao(self, plano: Dict[str, Any]):
+        """Atualiza, remove, indexa e registra depois da inserção dos chunks novos"""
+        collection = plano['collection']
+        ids, textos, metadatas = plano['ids'], plano['textos'], plano['metadatas']
+        novos, movidos, removidos = plano['novos'], plano['movidos'], plano['removidos']
         
-        self.collection.add(
-            ids=ids,
-            embeddings=embeddings_list,
-            documents=documents,
-            metadatas=metadatas
+        # Se falhar, desfaz a inserção dos chunks novos
+        try:
+            if movidos:
+                collection.update(ids=[ids[i] for i in movidos], metadatas=[metadatas[i] for i in movidos])
+            if removidos:
+                collection.delete(ids=removidos)
+                self.indice_lexico.remover_chunks(removidos)
+            self.indice_lexico.adicionar(plano['doc_id'], [ids[i] for i in novos], [textos[i] for i in novos], plano['projeto_id'])
+            self.registro.registrar(plano['doc_id'], plano['metadata'], len(textos))
+        except Exception:
+            if novos:
+                collection.delete(ids=[ids[i] for i in novos])
+                self.indice_lexico.remover_chunks([ids[i] for i in novos])
+            raise
+        
+        print(
+            f"Documento '{plano['metadata'].get('filename', 'unknown')}' {plano['status']} com {len(textos)} chunks "
+            f"({len(novos)} novos, {len(removidos)} removidos)"
         )
+    
+    @staticmethod
+    def _resultado_indexacao(plano: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'doc_id': plano['doc_id'],
+            'status': plano['status'],
+            'chunks': plano['total_chunks'],
+            'chunks_novos': len(plano['novos']),
+            'chunks_removidos': len(plano['removidos'])
+        }
+    
+    def _embed_documents(self, documents: List[str]) -> List[List[float]]:
+        """
+        Gera embeddings dos chunks, calculando apenas os que não estão no cache
         
-        print(f"Documento '{metadata.get('filename', 'unknown')}' adicionado com {len(chunks)} chunks")
+        Args:
+            documents: Textos dos chunks
+            
+        Returns:
+            Lista de embeddings na mesma ordem dos chunks
+        """
+        modelo = self.embeddings.model_name
+        hashes = [hash_texto(doc) for doc in documents]
+        encontrados = self.cache_embeddings.buscar(modelo, hashes)
+        
+        # Calcula apenas os chunks ausentes (sem repetir textos iguais)
+        pendentes = {}
+        for h, doc in zip(hashes, documents):
+            if h not in encontrados and h not in pendentes:
+                pendentes[h] = doc
+        
+        if pendentes:
+            novos = self.embeddings.embed_documents(list(pendentes.values()))
+            calculados = dict(zip(pendentes.keys(), novos))
+            self.cache_embeddings.salvar(modelo, calculados)
+            encontrados.update(calculados)
+        
+        return [encontrados[h] for h in hashes]
+    
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Gera o embedding de uma consulta, reaproveitando o cache em memória
+        
+        Args:
+            query: Texto da consulta
+            
+        Returns:
+            Embedding da consulta
+        """
+        modelo = self.embeddings.model_name
+        embedding = self.cache_consultas.buscar(modelo, query)
         
-        return doc_id
+        if embedding is None:
+            embedding = self.embeddings.embed_query(query)
+            self.cache_consultas.salvar(modelo, query, embedding)
+        
+        return embedding
     
     def search(self, 
                query: str, 
                n_results: int = 5,
-               filter_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+               filter_metadata: Optional[Dict[str, Any]] = None,
+               modo: str = "vetorial",
+               projeto_ids: Optional[List[int]] = None,
+               reranquear: Optional[bool] = None,
+               n_candidatos: Optional[int] = None,
+               diversificar: Optional[bool] = None,
+               lambda_mmr: float = 0.5,
+               max_por_documento: Optional[int] = None,
+               janela_vizinhos: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Busca documentos relevantes para uma query
         
@@ -129,6 +610,21 @@ class RAGEngine:
             query: Texto da busca
             n_results: Número de resultados a retornar
             filter_metadata: Filtros opcionais para metadados
+            modo: "vetorial" (similaridade de embeddings), "lexico" (BM25) ou
+                "hibrido" (ambos combinados por Reciprocal Rank Fusion)
+            projeto_ids: Restringe a busca às coleções destes projetos
+                (None = todos; 0 = documentos sem projeto)
+            reranquear: Reordena os candidatos com o cross-encoder
+                (None = reranquear_padrao)
+            n_candidatos: Candidatos buscados para o reranqueamento e a
+                diversificação (padrão: max(4 * n_results, 20))
+            diversificar: Seleciona os resultados por Maximal Marginal Relevance,
+                evitando chunks redundantes (None = diversificar_padrao)
+            lambda_mmr: Peso da relevância no MMR (1.0 = só relevância)
+            max_por_documento: Máximo de chunks de um mesmo documento
+                (None = max_por_documento_padrao; 0 = sem limite)
+            janela_vizinhos: Anexa a cada resultado os chunks até esta distância
+                no mesmo documento (None = janela_vizinhos_padrao)
             
         Returns:
             Lista de documentos relevantes com scores
@@ -136,27 +632,481 @@ class RAGEngine:
         if not query or not query.strip():
             raise ValueError("Query de busca está vazia")
         
-        # Gera embedding da query
-        query_embedding = self.embeddings.embed_query(query)
+        if modo not in self.MODOS_BUSCA:
+            raise ValueError(f"Modo de busca inválido: {modo}. Use: {', '.join(self.MODOS_BUSCA)}")
+        
+        projeto_ids = projeto_ids or None
+        if reranquear is None:
+            reranquear = self.reranquear_padrao
+        if diversificar is None:
+            diversificar = self.diversificar_padrao
+        if max_por_documento is None:
+            max_por_documento = self.max_por_documento_padrao
+        if janela_vizinhos is None:
+            janela_vizinhos = self.janela_vizinhos_padrao
+        
+        refinar = reranquear or diversificar or bool(max_por_documento)
+        n_busca = (n_candidatos or max(n_results * 4, 20)) if refinar else n_results
         
-        # Busca no ChromaDB
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            where=filter_metadata
+        # O MMR usa os vetores já gravados no ChromaDB, sem reembutir os candidatos
+        if modo == "lexico":
+            resultados = self._search_lexico(query, n_busca, filter_metadata, projeto_ids, diversificar)
+        elif modo == "hibrido":
+            resultados = self._search_hibrido(query, n_busca, filter_metadata, projeto_ids, diversificar)
+        else:
+            resultados = self._search_vetorial(query, n_busca, filter_metadata, projeto_ids, diversificar)
+        
+        resultados = self._refinar(query, resultados, n_results, reranquear, diversificar, lambda_mmr, max_por_documento)
+        
+        if janela_vizinhos > 0:
+            return self._expandir_vizinhos(resultados, janela_vizinhos)
+        
+        return resultados
+    
+    def _refinar(self,
+                 query: str,
+                 resultados: List[Dict[str, Any]],
+                 n_results: int,
+                 reranquear: bool,
+                 diversificar: bool,
+                 lambda_mmr: float,
+                 max_por_documento: Optional[int]) -> List[Dict[str, Any]]:
+        """Reranqueia e/ou diversifica os candidatos e retorna os n_results finais"""
+        if reranquear:
+            resultados = self.reranqueador.reranquear(query, resultados, len(resultados))
+        
+        if diversificar or max_por_documento:
+            resultados = self._diversificar(query, resultados, n_results, diversificar, lambda_mmr, max_por_documento)
+        else:
+            resultados = resultados[:n_results]
+        
+        # Os vetores só servem ao MMR; não vão para a resposta
+        return [
+            {k: v for k, v in r.items() if k != 'embedding'} if 'embedding' in r else r
+            for r in resultados
+        ]
+    
+    def _diversificar(self, 
+                      query: str, 
+                      resultados: List[Dict[str, Any]], 
+                      n_results: int,
+                      mmr: bool,
+                      lambda_mmr: float,
+                      max_por_documento: Optional[int]) -> List[Dict[str, Any]]:
+        """
+        Seleciona resultados por MMR e/ou com limite de chunks por documento
+        
+        Os embeddings dos candidatos são os vetores gravados no ChromaDB
+        (trazidos junto com a busca); o modelo só é chamado para os
+        candidatos que vierem sem vetor.
+        """
+        doc_ids = [r['metadata'].get('doc_id', r['id']) for r in resultados]
+        
+        if not mmr:
+            indices = limitar_por_documento(doc_ids, max_por_documento, n_results)
+            return [resultados[i] for i in indices]
+        
+        # Com reranqueamento, a relevância do MMR é o score do cross-encoder normalizado
+        relevancia = None
+        if resultados and all('score_reranqueamento' in r for r in resultados):
+            scores = [r['score_reranqueamento'] for r in resultados]
+            amplitude = (max(scores) - min(scores)) or 1.0
+            relevancia = [(score - min(scores)) / amplitude for score in scores]
+        
+        embeddings = [r.get('embedding') for r in resultados]
+        faltantes = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if faltantes:
+            calculados = self._embed_documents([resultados[i]['content'] for i in faltantes])
+            for i, embedding in zip(faltantes, calculados):
+                embeddings[i] = embedding
+        
+        indices = selecionar_mmr(
+            self.embed_query(query),
+            embeddings,
+            n_results,
+            lambda_mmr=lambda_mmr,
+            relevancia=relevancia,
+            doc_ids=doc_ids,
+            max_por_documento=max_por_documento
+        )
+        return [resultados[i] for i in indices]
+    
+    def _consultar_colecoes(self, 
+                            query_embeddings: List[List[float]], 
+                            n_results: int,
+                            filter_metadata: Optional[Dict[str, Any]],
+                            projeto_ids: Optional[List[int]],
+                            incluir_embeddings: bool = False) -> List[List[Dict[str, Any]]]:
+        """
+        Consulta as coleções dos projetos e mescla os resultados por distância
+        
+        Com incluir_embeddings, cada resultado traz também o vetor gravado
+        ('embedding'), usado pelo MMR.
+        
+        Returns:
+            Uma lista de resultados para cada embedding de consulta
+        """
+        mesclados = [[] for _ in query_embeddings]
+        include = ['documents', 'metadatas', 'distances']
+        if incluir_embeddings:
+            include.append('embeddings')
+        
+        for _, collection in self.colecoes(projeto_ids):
+            if collection.count() == 0:
+                continue
+            
+            results = collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=filter_metadata,
+                include=include
+            )
+            for i in range(len(query_embeddings)):
+                mesclados[i].extend(self._formatar_resultados(results, i))
+        
+        return [
+            sorted(resultados, key=lambda r: r['distance'] if r['distance'] is not None else 2.0)[:n_results]
+            for resultados in mesclados
+        ]
+    
+    def _search_vetorial(self, 
+                         query: str, 
+                         n_results: int,
+                         filter_metadata: Optional[Dict[str, Any]],
+                         projeto_ids: Optional[List[int]] = None,
+                         incluir_embeddings: bool = False) -> List[Dict[str, Any]]:
+        """Busca por similaridade de embeddings"""
+        # Gera embedding da query (ou reaproveita do cache)
+        query_embedding = self.embed_query(query)
+        
+        return self._consultar_colecoes(
+            [query_embedding], n_results, filter_metadata, projeto_ids, incluir_embeddings
+        )[0]
+    
+    def _search_lexico(self, 
+                       query: str, 
+                       n_results: int,
+                       filter_metadata: Optional[Dict[str, Any]],
+                       projeto_ids: Optional[List[int]] = None,
+                       incluir_embeddings: bool = False) -> List[Dict[str, Any]]:
+        """Busca pela pontuação BM25 do índice léxico"""
+        # Busca candidatos extras para compensar os removidos pelo filtro
+        n_candidatos = n_results * 4 if filter_metadata else n_results
+        candidatos = self.indice_lexico.buscar(query, n_candidatos, projeto_ids)
+        
+        chunks = self._buscar_por_ids(
+            [(chunk_id, projeto_id) for chunk_id, _, projeto_id in candidatos],
+            filter_metadata,
+            incluir_embeddings
+        )
+        
+        resultados = []
+        for chunk_id, score, _ in candidatos:
+            if chunk_id in chunks:
+                resultados.append(dict(chunks[chunk_id], score_bm25=score))
+        
+        return resultados[:n_results]
+    
+    def _search_hibrido(self, 
+                        query: str, 
+                        n_results: int,
+                        filter_metadata: Optional[Dict[str, Any]],
+                        projeto_ids: Optional[List[int]] = None,
+                        incluir_embeddings: bool = False) -> List[Dict[str, Any]]:
+        """Combina busca vetorial e léxica por Reciprocal Rank Fusion"""
+        n_candidatos = max(n_results * 4, 20)
+        
+        vetoriais = self._search_vetorial(query, n_candidatos, filter_metadata, projeto_ids, incluir_embeddings)
+        lexicos = self._search_lexico(query, n_candidatos, filter_metadata, projeto_ids, incluir_embeddings)
+        
+        por_id = {r['id']: r for r in lexicos}
+        por_id.update({r['id']: r for r in vetoriais})
+        
+        fundidos = fusao_rrf([
+            [r['id'] for r in vetoriais],
+            [r['id'] for r in lexicos]
+        ])
+        
+        return [
+            dict(por_id[chunk_id], score_rrf=score)
+            for chunk_id, score in fundidos[:n_results]
+        ]
+    
+    def _buscar_por_ids(self, 
+                        ids: List[Tuple[str, int]],
+                        filter_metadata: Optional[Dict[str, Any]] = None,
+                        incluir_embeddings: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Busca chunks por ID na coleção de cada projeto, aplicando o filtro de metadados
+        
+        Args:
+            ids: Pares (chunk_id, projeto_id)
+            filter_metadata: Filtros opcionais para metadados
+            incluir_embeddings: Traz também o vetor gravado de cada chunk ('embedding')
+        
+        Returns:
+            Dicionário id -> resultado no formato da busca (sem distância)
+        """
+        por_projeto: Dict[int, List[str]] = {}
+        for chunk_id, projeto_id in ids:
+            por_projeto.setdefault(projeto_id, []).append(chunk_id)
+        
+        include = ['documents', 'metadatas']
+        if incluir_embeddings:
+            include.append('embeddings')
+        
+        encontrados = {}
+        for projeto_id, chunk_ids in por_projeto.items():
+            results = self.colecao_projeto(projeto_id).get(
+                ids=chunk_ids,
+                where=filter_metadata,
+                include=include
+            )
+            
+            embeddings = results.get('embeddings')
+            for i, chunk_id in enumerate(results['ids']):
+                encontrados[chunk_id] = {
+                    'content': results['documents'][i],
+                    'metadata': results['metadatas'][i] if results['metadatas'] else {},
+                    'distance': None,
+                    'id': chunk_id
+                }
+                if embeddings is not None:
+                    encontrados[chunk_id]['embedding'] = embeddings[i]
+        
+        return encontrados
+    
+    def _expandir_vizinhos(self, resultados: List[Dict[str, Any]], janela: int) -> List[Dict[str, Any]]:
+        """
+        Expande cada resultado com os chunks vizinhos do mesmo documento
+        
+        Os vizinhos são buscados por doc_id e chunk_index numa única chamada
+        por coleção. Resultados do mesmo documento cujas
+        janelas se sobrepõem ou se tocam viram um único trecho, na posição
+        do mais relevante; a sobreposição entre chunks consecutivos é removida.
+        
+        Args:
+            resultados: Resultados da busca, do mais ao menos relevante
+            janela: Número de chunks anexados antes e depois de cada resultado
+            
+        Returns:
+            Resultados com o conteúdo expandido e 'chunk_inicio'/'chunk_fim'
+            nos metadados
+        """
+        # Intervalos [início, fim] de chunk_index de cada documento
+        intervalos: Dict[Tuple[int, str], List[Tuple[int, int, int]]] = {}
+        grupos: List[Dict[str, Any]] = []
+        for posicao, resultado in enumerate(resultados):
+            metadata = resultado['metadata']
+            indice = metadata.get('chunk_index')
+            if metadata.get('doc_id') is None or indice is None:
+                grupos.append({'posicao': posicao, 'resultado': resultado})
+                continue
+            
+            total = metadata.get('total_chunks', indice + janela + 1)
+            chave = (metadata.get('projeto_id') or 0, metadata['doc_id'])
+            intervalos.setdefault(chave, []).append(
+                (max(0, indice - janela), min(total - 1, indice + janela), posicao)
+            )
+        
+        # Une intervalos que se sobrepõem ou se tocam; o trecho fica na posição do mais relevante
+        for (projeto_id, doc_id), lista in intervalos.items():
+            lista.sort()
+            inicio, fim, posicao = lista[0]
+            for proximo_inicio, proximo_fim, proxima_posicao in lista[1:] + [(None, None, None)]:
+                if proximo_inicio is not None and proximo_inicio <= fim + 1:
+                    fim = max(fim, proximo_fim)
+                    posicao = min(posicao, proxima_posicao)
+                    continue
+                grupos.append({
+                    'posicao': posicao,
+                    'resultado': resultados[posicao],
+                    'doc_id': doc_id,
+                    'projeto_id': projeto_id,
+                    'inicio': inicio,
+                    'fim': fim
+                })
+                inicio, fim, posicao = proximo_inicio, proximo_fim, proxima_posicao
+        
+        grupos.sort(key=lambda g: g['posicao'])
+        
+        chunks = self._buscar_vizinhos([g for g in grupos if 'doc_id' in g])
+        
+        expandidos = []
+        for grupo in grupos:
+            resultado = grupo['resultado']
+            if 'doc_id' not in grupo:
+                expandidos.append(resultado)
+                continue
+            
+            conteudo = ""
+            presentes = []
+            for j in range(grupo['inicio'], grupo['fim'] + 1):
+                texto = chunks.get((grupo['doc_id'], j))
+                if texto is None:
+                    continue
+                if conteudo and presentes[-1] == j - 1:
+                    tamanho = tamanho_sobreposicao(conteudo, texto, self.chunk_overlap)
+                    texto = texto[tamanho:] if tamanho else " " + texto
+                elif conteudo:
+                    texto = "\n[...]\n" + texto
+                conteudo += texto
+                presentes.append(j)
+            
+            if not presentes:
+                expandidos.append(resultado)
+                continue
+            
+            metadata = dict(resultado['metadata'], chunk_inicio=presentes[0], chunk_fim=presentes[-1])
+            expandidos.append(dict(resultado, content=conteudo, metadata=metadata))
+        
+        return expandidos
+    
+    def _buscar_vizinhos(self, grupos: List[Dict[str, Any]]) -> Dict[Tuple[str, int], str]:
+        """
+        Busca os chunks dos intervalos [inicio, fim] de cada documento
+        
+        Args:
+            grupos: Dicts com projeto_id, doc_id, inicio e fim
+            
+        Returns:
+            Dicionário (doc_id, chunk_index) -> conteúdo do chunk
+        """
+        por_projeto: Dict[int, List[Dict[str, Any]]] = {}
+        for grupo in grupos:
+            por_projeto.setdefault(grupo['projeto_id'], []).append(grupo)
+        
+        conteudos = {}
+        for projeto_id, lista in por_projeto.items():
+            condicoes = [
+                {"$and": [
+                    {"doc_id": grupo['doc_id']},
+                    {"chunk_index": {"$in": list(range(grupo['inicio'], grupo['fim'] + 1))}}
+                ]}
+                for grupo in lista
+            ]
+            results = self.colecao_projeto(projeto_id).get(
+                where=condicoes[0] if len(condicoes) == 1 else {"$or": condicoes},
+                include=['documents', 'metadatas']
+            )
+            
+            for documento, metadata in zip(results['documents'], results['metadatas']):
+                conteudos[(metadata['doc_id'], metadata['chunk_index'])] = documento
+        
+        return conteudos
+    
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Gera embeddings de várias consultas numa única passada do modelo
+        
+        Consultas já presentes no cache em memória não são recalculadas.
+        
+        Args:
+            queries: Textos das consultas
+            
+        Returns:
+            Lista de embeddings na mesma ordem das consultas
+        """
+        modelo = self.embeddings.model_name
+        embeddings = [self.cache_consultas.buscar(modelo, q) for q in queries]
+        
+        pendentes = list(dict.fromkeys(
+            q for q, emb in zip(queries, embeddings) if emb is None
+        ))
+        if pendentes:
+            calculados = dict(zip(pendentes, self.embeddings.embed_documents(pendentes)))
+            for q, emb in calculados.items():
+                self.cache_consultas.salvar(modelo, q, emb)
+            embeddings = [
+                emb if emb is not None else calculados[q]
+                for q, emb in zip(queries, embeddings)
+            ]
+        
+        return embeddings
+    
+    def search_batch(self, 
+                     queries: List[str], 
+                     n_results: int = 5,
+                     filter_metadata: Optional[Dict[str, Any]] = None,
+                     projeto_ids: Optional[List[int]] = None,
+                     reranquear: Optional[bool] = None,
+                     diversificar: Optional[bool] = None,
+                     lambda_mmr: float = 0.5,
+                     max_por_documento: Optional[int] = None,
+                     janela_vizinhos: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Busca documentos relevantes para várias queries de uma vez
+        
+        Todas as queries são embutidas numa única passada do modelo e
+        consultadas numa única chamada ao ChromaDB por coleção.
+        
+        Args:
+            queries: Textos das buscas
+            n_results: Número de resultados por query
+            filter_metadata: Filtros opcionais para metadados
+            projeto_ids: Restringe a busca às coleções destes projetos (None = todos)
+            reranquear: Reordena os candidatos de cada query com o cross-encoder
+                (None = reranquear_padrao)
+            diversificar: Seleciona os resultados de cada query por MMR
+                (None = diversificar_padrao)
+            lambda_mmr: Peso da relevância no MMR
+            max_por_documento: Máximo de chunks de um mesmo documento por query
+                (None = max_por_documento_padrao; 0 = sem limite)
+            janela_vizinhos: Anexa a cada resultado os chunks até esta distância
+                no mesmo documento (None = janela_vizinhos_padrao)
+            
+        Returns:
+            Uma lista de resultados para cada query, na mesma ordem
+        """
+        if not queries:
+            return []
+        
+        if any(not q or not q.strip() for q in queries):
+            raise ValueError("Query de busca está vazia")
+        
+        if reranquear is None:
+            reranquear = self.reranquear_padrao
+        if diversificar is None:
+            diversificar = self.diversificar_padrao
+        if max_por_documento is None:
+            max_por_documento = self.max_por_documento_padrao
+        if janela_vizinhos is None:
+            janela_vizinhos = self.janela_vizinhos_padrao
+        
+        refinar = reranquear or diversificar or bool(max_por_documento)
+        query_embeddings = self.embed_queries(queries)
+        n_busca = max(n_results * 4, 20) if refinar else n_results
+        
+        resultados = self._consultar_colecoes(
+            query_embeddings, n_busca, filter_metadata, projeto_ids or None, diversificar
         )
         
-        # Formata os resultados
+        if refinar:
+            resultados = [
+                self._refinar(query, candidatos, n_results, reranquear, diversificar, lambda_mmr, max_por_documento)
+                for query, candidatos in zip(queries, resultados)
+            ]
+        
+        if janela_vizinhos > 0:
+            return [self._expandir_vizinhos(r, janela_vizinhos) for r in resultados]
+        
+        return resultados
+    
+    def _formatar_resultados(self, results: Dict[str, Any], indice: int) -> List[Dict[str, Any]]:
+        """Formata os resultados de uma das queries de collection.query"""
         formatted_results = []
+        embeddings = results.get('embeddings')
         
-        if results['documents'] and results['documents'][0]:
-            for i in range(len(results['documents'][0])):
+        if results['documents'] and results['documents'][indice]:
+            for i in range(len(results['documents'][indice])):
                 formatted_results.append({
-                    'content': results['documents'][0][i],
-                    'metadata': results['metadatas'][0][i] if results['metadatas'] else {},
-                    'distance': results['distances'][0][i] if results['distances'] else None,
-                    'id': results['ids'][0][i] if results['ids'] else None
+                    'content': results['documents'][indice][i],
+                    'metadata': results['metadatas'][indice][i] if results['metadatas'] else {},
+                    'distance': results['distances'][indice][i] if results['distances'] else None,
+                    'id': results['ids'][indice][i] if results['ids'] else None
                 })
+                if embeddings is not None:
+                    formatted_results[-1]['embedding'] = embeddings[indice][i]
         
         return formatted_results
     
@@ -171,53 +1121,52 @@ class RAGEngine:
             True se removido com sucesso
         """
         try:
+            # A coleção do documento vem do projeto registrado
+            documento = self.registro.buscar(doc_id)
+            collection = self.colecao_projeto(documento['projeto_id'] if documento else None)
+            
             # Busca todos os chunks do documento
-            results = self.collection.get(
-                where={"doc_id": doc_id}
+            results = collection.get(
+                where={"doc_id": doc_id},
+                include=[]
             )
             
             if results['ids']:
-                self.collection.delete(ids=results['ids'])
+                collection.delete(ids=results['ids'])
+                self.indice_lexico.remover_documento(doc_id)
+                self.registro.remover(doc_id)
                 print(f"Documento {doc_id} removido ({len(results['ids'])} chunks)")
                 return True
             
-            return False
+            # Remove entradas órfãs do registro, se houver
+            return self.registro.remover(doc_id)
         except Exception as e:
             print(f"Erro ao remover documento: {e}")
             return False
     
-    def list_documents(self) -> List[Dict[str, Any]]:
+    def list_documents(self, 
+                       limit: Optional[int] = None, 
+                       offset: int = 0) -> List[Dict[str, Any]]:
         """
-        Lista todos os documentos únicos no banco
+        Lista os documentos únicos no banco a partir do registro
+        
+        Args:
+            limit: Número máximo de documentos (None = todos)
+            offset: Quantos documentos pular (paginação)
         
         Returns:
             Lista de documentos com seus metadados
         """
         try:
-            # Pega todos os registros
-            results = self.collection.get()
-            
-            if not results['metadatas']:
-                return []
-            
-            # Agrupa por doc_id
-            docs_dict = {}
-            for metadata in results['metadatas']:
-                doc_id = metadata.get('doc_id')
-                if doc_id and doc_id not in docs_dict:
-                    docs_dict[doc_id] = {
-                        'doc_id': doc_id,
-                        'filename': metadata.get('filename', 'unknown'),
-                        'format': metadata.get('format', 'unknown'),
-                        'size': metadata.get('size', 0),
-                        'chunks': metadata.get('total_chunks', 0)
-                    }
-            
-            return list(docs_dict.values())
+            return self.registro.listar(limit=limit, offset=offset)
         except Exception as e:
             print(f"Erro ao listar documentos: {e}")
             return []
     
+    def count_documents(self) -> int:
+        """Retorna o número de documentos únicos no banco"""
+        return self.registro.contar()
+    
     def get_stats(self) -> Dict[str, Any]:
         """
         Retorna estatísticas do banco de dados
@@ -226,19 +1175,32 @@ class RAGEngine:
             Dicionário com estatísticas
         """
         try:
-            total_chunks = self.collection.count()
-            documents = self.list_documents()
+            colecoes = self.colecoes()
+            total_chunks = sum(collection.count() for _, collection in colecoes)
             
             return {
-                'total_documents': len(documents),
+                'total_documents': self.count_documents(),
                 'total_chunks': total_chunks,
                 'collection_name': self.collection_name,
-                'embedding_model': self.embeddings.model_name
+                'colecoes_projetos': len(colecoes) - 1,
+                'embedding_model': self.embeddings.model_name,
+                'embedding_backend': self.embeddings.backend,
+                'cache_embeddings': self.cache_embeddings.get_stats(),
+                'cache_consultas': self.cache_consultas.get_stats(),
+                'indice_lexico_chunks': self.indice_lexico.contar(),
+                'reranqueamento': self.reranqueador.get_stats(),
+                'microlotes': self.get_stats_microlotes()
             }
         except Exception as e:
             print(f"Erro ao obter estatísticas: {e}")
             return {}
     
+    def get_stats_microlotes(self) -> Optional[Dict[str, Any]]:
+        """Métricas do agrupamento de consultas (None se desativado)"""
+        if isinstance(self.embeddings, DespachanteEmbeddings):
+            return self.embeddings.get_stats()
+        return None
+    
     def clear_all(self) -> bool:
         """
         Remove todos os documentos do banco
@@ -247,11 +1209,19 @@ class RAGEngine:
             True se removido com sucesso
         """
         try:
+            for projeto_id, _ in self.colecoes():
+                if projeto_id:
+                    self.client.delete_collection(name=self._nome_colecao_projeto(projeto_id))
+            self._colecoes_projetos.clear()
+            
             self.client.delete_collection(name=self.collection_name)
             self.collection = self.client.create_collection(
                 name=self.collection_name,
-                metadata={"hnsw:space": "cosine"}
+                metadata={"hnsw:space": "cosine", "embedding_model": self.embeddings.model_name}
             )
+            self.registro.limpar()
+            self.indice_lexico.limpar()
+            self.reranqueador.limpar()
             print("Banco de dados limpo com sucesso")
             return True
         except Exception as e:
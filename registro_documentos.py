@@ -0,0 +1,272 @@
+"""
+Registro de Documentos
+Desenvolvido por: Marcio Góes do Nascimento
+
+Índice em nível de documento (doc_id -> arquivo, formato, tamanho, chunks,
+usuário, projeto, hash do conteúdo, datas) mantido junto ao banco vetorial.
+Permite listar documentos, gerar estatísticas sem varrer todos os chunks da
+coleção e reconhecer uma nova versão de um arquivo (mesmo nome no mesmo
+projeto).
+"""
+
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+
+class RegistroDocumentos:
+    """Registro SQLite dos documentos indexados no ChromaDB"""
+
+    COLUNAS = (
+        'doc_id', 'filename', 'format', 'size', 'chunks',
+        'uploaded_by', 'projeto_id', 'content_hash', 'criado_em', 'atualizado_em'
+    )
+
+    def __init__(self, arquivo_registro: str = "./chroma_db/registro_documentos.db"):
+        """
+        Inicializa o registro
+
+        Args:
+            arquivo_registro: Caminho do arquivo SQLite do registro
+        """
+        self.arquivo_registro = arquivo_registro
+        self._lock = threading.Lock()
+
+        Path(arquivo_registro).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(arquivo_registro, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS documentos (
+                doc_id TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                format TEXT,
+                size INTEGER DEFAULT 0,
+                chunks INTEGER DEFAULT 0,
+                uploaded_by TEXT,
+                projeto_id INTEGER,
+                content_hash TEXT,
+                criado_em TEXT NOT NULL,
+                atualizado_em TEXT NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_documentos_criado ON documentos (criado_em)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_documentos_projeto ON documentos (projeto_id)"
+        )
+
+        # Registros criados antes do hash de conteúdo
+        colunas = [linha[1] for linha in self._conn.execute("PRAGMA table_info(documentos)")]
+        if 'content_hash' not in colunas:
+            self._conn.execute("ALTER TABLE documentos ADD COLUMN content_hash TEXT")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_documentos_hash ON documentos (content_hash)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_documentos_arquivo ON documentos (filename)"
+        )
+        self._conn.commit()
+
+    def registrar(self, doc_id: str, metadata: Dict[str, Any], chunks: int):
+        """
+        Registra (ou atualiza) um documento
+
+        Args:
+            doc_id: ID do documento
+            metadata: Metadados do documento (filename, format, size, content_hash, ...)
+            chunks: Número de chunks indexados
+        """
+        agora = datetime.now().isoformat()
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT INTO documentos
+                       (doc_id, filename, format, size, chunks, uploaded_by, projeto_id, content_hash,
+                        criado_em, atualizado_em)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(doc_id) DO UPDATE SET
+                       filename = excluded.filename,
+                       format = excluded.format,
+                       size = excluded.size,
+                       chunks = excluded.chunks,
+                       uploaded_by = excluded.uploaded_by,
+                       projeto_id = excluded.projeto_id,
+                       content_hash = excluded.content_hash,
+                       atualizado_em = excluded.atualizado_em""",
+                (
+                    doc_id,
+                    metadata.get('filename', 'unknown'),
+                    metadata.get('format', 'unknown'),
+                    metadata.get('size', 0),
+                    chunks,
+                    metadata.get('uploaded_by'),
+                    metadata.get('projeto_id'),
+                    metadata.get('content_hash'),
+                    agora,
+                    agora
+                )
+            )
+
+    def remover(self, doc_id: str) -> bool:
+        """
+        Remove um documento do registro
+
+        Args:
+            doc_id: ID do documento
+
+        Returns:
+            True se o documento existia
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM documentos WHERE doc_id = ?", (doc_id,))
+            return cursor.rowcount > 0
+
+    def limpar(self):
+        """Remove todos os documentos do registro"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM documentos")
+
+    def buscar(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca um documento por ID
+
+        Args:
+            doc_id: ID do documento
+
+        Returns:
+            Dict com dados do documento ou None
+        """
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT * FROM documentos WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+        return dict(linha) if linha else None
+
+    def buscar_versao(self,
+                      filename: str,
+                      projeto_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Busca a versão indexada de um documento no mesmo projeto
+
+        A identidade do documento é o par (projeto, nome do arquivo): o mesmo
+        conteúdo com outro nome é outro documento.
+
+        Args:
+            filename: Nome do arquivo
+            projeto_id: ID do projeto (None ou 0 = sem projeto)
+
+        Returns:
+            Dict com dados do documento mais recente com esse nome ou None
+        """
+        with self._lock:
+            linha = self._conn.execute(
+                """SELECT * FROM documentos
+                   WHERE filename = ? AND COALESCE(projeto_id, 0) = ?
+                   ORDER BY atualizado_em DESC
+                   LIMIT 1""",
+                (filename, projeto_id or 0)
+            ).fetchone()
+        return dict(linha) if linha else None
+
+    def listar(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Lista documentos em ordem de criação
+
+        Args:
+            limit: Número máximo de documentos (None = todos)
+            offset: Quantos documentos pular
+
+        Returns:
+            Lista de documentos
+        """
+        with self._lock:
+            linhas = self._conn.execute(
+                "SELECT * FROM documentos ORDER BY criado_em, doc_id LIMIT ? OFFSET ?",
+                (limit if limit is not None else -1, offset)
+            ).fetchall()
+        return [dict(linha) for linha in linhas]
+
+    def resumo_por_projeto(self) -> List[Dict[str, Any]]:
+        """
+        Agrupa os documentos por projeto (0 = sem projeto)
+
+        Returns:
+            Lista com projeto_id, total de documentos e total de chunks
+        """
+        with self._lock:
+            linhas = self._conn.execute(
+                """SELECT COALESCE(projeto_id, 0) AS projeto_id,
+                          COUNT(*) AS total_documentos,
+                          COALESCE(SUM(chunks), 0) AS total_chunks
+                   FROM documentos
+                   GROUP BY COALESCE(projeto_id, 0)
+                   ORDER BY 1"""
+            ).fetchall()
+        return [dict(linha) for linha in linhas]
+
+    def listar_ids_projeto(self, projeto_id: int) -> List[str]:
+        """
+        Lista os doc_ids de um projeto (0 = sem projeto)
+
+        Args:
+            projeto_id: ID do projeto
+
+        Returns:
+            Lista de doc_ids em ordem de criação
+        """
+        with self._lock:
+            linhas = self._conn.execute(
+                """SELECT doc_id FROM documentos
+                   WHERE COALESCE(projeto_id, 0) = ?
+                   ORDER BY criado_em, doc_id""",
+                (projeto_id,)
+            ).fetchall()
+        return [linha['doc_id'] for linha in linhas]
+
+    def contar(self) -> int:
+        """Retorna o número de documentos registrados"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documentos").fetchone()[0]
+
+    def reconstruir(self,
+                    collection,
+                    projeto_id: Optional[int] = None,
+                    tamanho_pagina: int = 1000) -> int:
+        """
+        Reconstrói o registro a partir dos metadados da coleção, paginando
+
+        Usado uma única vez para bancos criados antes do registro existir.
+
+        Args:
+            collection: Coleção do ChromaDB
+            projeto_id: Projeto da coleção (None = usa os metadados; 0 = sem projeto)
+            tamanho_pagina: Número de chunks lidos por página
+
+        Returns:
+            Número de documentos registrados
+        """
+        documentos = {}
+        offset = 0
+
+        while True:
+            pagina = collection.get(limit=tamanho_pagina, offset=offset, include=['metadatas'])
+            if not pagina['ids']:
+                break
+
+            for metadata in pagina['metadatas'] or []:
+                doc_id = metadata.get('doc_id') if metadata else None
+                if doc_id and doc_id not in documentos:
+                    documentos[doc_id] = metadata
+
+            offset += len(pagina['ids'])
+
+        for doc_id, metadata in documentos.items():
+            if projeto_id is not None:
+                metadata = dict(metadata, projeto_id=projeto_id or None)
+            self.registrar(doc_id, metadata, metadata.get('total_chunks', 0))
+
+        return len(documentos)
@@ -0,0 +1,171 @@
+"""
+Reranqueador (Cross-Encoder)
+Desenvolvido por: Marcio Góes do Nascimento
+
+Etapa opcional da busca: o RAGEngine recupera mais candidatos do que o
+necessário e um cross-encoder pequeno (CPU) reavalia cada par
+(pergunta, chunk), devolvendo os k melhores. Melhora a precisão sem
+aumentar n_context_docs.
+
+- Scores ficam em cache por (pergunta, chunk_id).
+- Os pares são avaliados em lotes. Se o tempo passar do orçamento, a
+  ordem original da busca é mantida (fallback).
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+from cache_embeddings import normalizar_texto
+
+
+class Reranqueador:
+    """Reordena resultados de busca com um cross-encoder"""
+
+    def __init__(self,
+                 modelo: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                 tamanho_lote: int = 16,
+                 orcamento_ms: float = 500,
+                 cache_capacidade: int = 20_000):
+        """
+        Inicializa o reranqueador (o modelo é carregado no primeiro uso)
+
+        Args:
+            modelo: Nome do cross-encoder (sentence-transformers)
+            tamanho_lote: Pares avaliados por chamada ao modelo
+            orcamento_ms: Tempo máximo do reranqueamento antes do fallback
+            cache_capacidade: Número máximo de scores em cache
+        """
+        self.modelo = modelo
+        self.tamanho_lote = tamanho_lote
+        self.orcamento_ms = orcamento_ms
+        self.cache_capacidade = cache_capacidade
+
+        self._cross_encoder = None
+        self._lock_modelo = threading.Lock()
+        self._cache: "OrderedDict[tuple, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.chamadas = 0
+        self.fallbacks = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._latencias_ms = deque(maxlen=1000)
+
+    def _obter_modelo(self):
+        """Carrega o cross-encoder sob demanda"""
+        if self._cross_encoder is None:
+            with self._lock_modelo:
+                if self._cross_encoder is None:
+                    from sentence_transformers import CrossEncoder
+                    print(f"Carregando cross-encoder '{self.modelo}'...")
+                    self._cross_encoder = CrossEncoder(self.modelo, device='cpu')
+        return self._cross_encoder
+
+    def reranquear(self,
+                   query: str,
+                   resultados: List[Dict[str, Any]],
+                   n_results: int,
+                   orcamento_ms: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Reordena os resultados pela relevância do cross-encoder
+
+        Args:
+            query: Texto da busca
+            resultados: Candidatos da busca, na ordem original
+            n_results: Número de resultados a retornar
+            orcamento_ms: Sobrepõe o orçamento de tempo padrão
+
+        Returns:
+            Os n_results melhores, com 'score_reranqueamento'. Em caso de
+            fallback, os n_results primeiros na ordem original.
+        """
+        if not resultados:
+            return []
+
+        orcamento = self.orcamento_ms if orcamento_ms is None else orcamento_ms
+        inicio = time.perf_counter()
+        consulta = normalizar_texto(query)
+
+        scores: Dict[str, float] = {}
+        pendentes = []
+        with self._lock:
+            for resultado in resultados:
+                chave = (consulta, resultado['id'])
+                if chave in self._cache:
+                    self._cache.move_to_end(chave)
+                    scores[resultado['id']] = self._cache[chave]
+                    self.cache_hits += 1
+                else:
+                    pendentes.append(resultado)
+                    self.cache_misses += 1
+
+        estourou = False
+        try:
+            if pendentes:
+                # O carregamento do modelo (só na primeira vez) não conta no orçamento
+                carregamento = time.perf_counter()
+                modelo = self._obter_modelo()
+                inicio += time.perf_counter() - carregamento
+
+            for i in range(0, len(pendentes), self.tamanho_lote):
+                if (time.perf_counter() - inicio) * 1000 > orcamento:
+                    estourou = True
+                    break
+
+                lote = pendentes[i:i + self.tamanho_lote]
+                valores = modelo.predict([(query, r['content']) for r in lote])
+                novos = {r['id']: float(v) for r, v in zip(lote, valores)}
+                scores.update(novos)
+                self._salvar_cache(consulta, novos)
+
+        except Exception as e:
+            print(f"Erro no reranqueamento: {e}")
+            estourou = True
+
+        latencia_ms = (time.perf_counter() - inicio) * 1000
+        with self._lock:
+            self.chamadas += 1
+            self._latencias_ms.append(latencia_ms)
+            if estourou:
+                self.fallbacks += 1
+
+        if estourou:
+            return resultados[:n_results]
+
+        ordenados = sorted(resultados, key=lambda r: scores[r['id']], reverse=True)
+        return [dict(r, score_reranqueamento=scores[r['id']]) for r in ordenados[:n_results]]
+
+    def _salvar_cache(self, consulta: str, scores: Dict[str, float]):
+        with self._lock:
+            for chunk_id, score in scores.items():
+                self._cache[(consulta, chunk_id)] = score
+            while len(self._cache) > self.cache_capacidade:
+                self._cache.popitem(last=False)
+
+    def limpar(self):
+        """Remove todos os scores do cache"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna contadores e latência (p50/p95) do reranqueamento"""
+        with self._lock:
+            latencias = sorted(self._latencias_ms)
+            stats = {
+                'modelo': self.modelo,
+                'orcamento_ms': self.orcamento_ms,
+                'chamadas': self.chamadas,
+                'fallbacks': self.fallbacks,
+                'cache_entradas': len(self._cache),
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses
+            }
+
+        def percentil(p: float) -> float:
+            return round(latencias[min(len(latencias) - 1, int(p * len(latencias)))], 1)
+
+        stats['latencia_p50_ms'] = percentil(0.50) if latencias else 0.0
+        stats['latencia_p95_ms'] = percentil(0.95) if latencias else 0.0
+        return stats
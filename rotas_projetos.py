@@ -11,6 +11,7 @@ from pydantic import BaseModel
 from typing import List, Optional
 from auth import usuario_atual
 from projetos import gerenciador_projetos
+from executores import executores
 
 # Router para projetos
 router = APIRouter(prefix="/projetos", tags=["Projetos"])
@@ -62,7 +63,9 @@ async def listar_projetos(
     - Por padrão, retorna apenas projetos ativos
     """
     try:
-        projetos = gerenciador_projetos.listar_projetos(apenas_ativos=apenas_ativos)
+        projetos = await executores.executar(
+            'disco', gerenciador_projetos.listar_projetos, apenas_ativos=apenas_ativos
+        )
         return projetos
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -79,7 +82,7 @@ async def buscar_projeto(
     - Todos os usuários autenticados podem visualizar projetos
     """
     try:
-        projeto = gerenciador_projetos.buscar_projeto(projeto_id)
+        projeto = await executores.executar('disco', gerenciador_projetos.buscar_projeto, projeto_id)
         
         if not projeto:
             raise HTTPException(
@@ -108,7 +111,9 @@ async def criar_projeto(
         # Verificar se é admin
         verificar_admin(current_user)
         
-        novo_projeto = gerenciador_projetos.criar_projeto(
+        novo_projeto = await executores.executar(
+            'disco',
+            gerenciador_projetos.criar_projeto,
             nome=projeto.nome,
             descricao=projeto.descricao,
             usuario_criador=current_user['username']
@@ -138,7 +143,9 @@ async def atualizar_projeto(
         # Verificar se é admin
         verificar_admin(current_user)
         
-        projeto_atualizado = gerenciador_projetos.atualizar_projeto(
+        projeto_atualizado = await executores.executar(
+            'disco',
+            gerenciador_projetos.atualizar_projeto,
             projeto_id=projeto_id,
             nome=dados.nome,
             descricao=dados.descricao,
@@ -171,7 +178,9 @@ async def deletar_projeto(
         # Verificar se é admin
         verificar_admin(current_user)
         
-        gerenciador_projetos.deletar_projeto(
+        await executores.executar(
+            'disco',
+            gerenciador_projetos.deletar_projeto,
             projeto_id=projeto_id,
             deletar_documentos=deletar_documentos
         )
@@ -201,7 +210,7 @@ async def estatisticas_projeto(
     - Todos os usuários autenticados podem ver estatísticas
     """
     try:
-        stats = gerenciador_projetos.estatisticas_projeto(projeto_id)
+        stats = await executores.executar('disco', gerenciador_projetos.estatisticas_projeto, projeto_id)
         return stats
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
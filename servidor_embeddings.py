@@ -0,0 +1,204 @@
+"""
+Servidor de Embeddings Compartilhado
+Desenvolvido por: Marcio Góes do Nascimento
+
+Processo local que carrega o modelo de embeddings uma única vez e atende
+todos os workers de main.py e api_consulta.py por um Unix socket. Cada
+worker deixa de carregar a própria cópia do modelo (EMBEDDINGS_BACKEND=socket)
+e fica só com a memória da aplicação.
+
+Pedidos que chegam de vários workers ao mesmo tempo são agrupados num
+único lote (até janela_ms de espera ou max_lote textos) e embutidos numa
+só passada do modelo.
+
+Uso:
+    python servidor_embeddings.py --socket /tmp/rag_embeddings.sock --backend huggingface
+
+    # Em seguida, nos servidores web:
+    EMBEDDINGS_BACKEND=socket EMBEDDINGS_SOCKET=/tmp/rag_embeddings.sock uvicorn main:app --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from backends_embeddings import CABECALHO, SOCKET_PADRAO, criar_backend
+
+
+class ServidorEmbeddings:
+    """Atende pedidos de embeddings por Unix socket, agrupando-os em lotes"""
+
+    def __init__(self, backend, caminho_socket: str = SOCKET_PADRAO, janela_ms: float = 2.0, max_lote: int = 64):
+        """
+        Args:
+            backend: Backend de embeddings (ver backends_embeddings)
+            caminho_socket: Caminho do Unix socket
+            janela_ms: Espera máxima por outros pedidos antes de fechar o lote
+            max_lote: Textos a partir dos quais o lote é fechado sem esperar
+        """
+        self.backend = backend
+        self.caminho_socket = caminho_socket
+        self.janela_ms = janela_ms
+        self.max_lote = max_lote
+        self.dimensao = len(backend.embed_query("dimensão"))
+
+        # Uma única thread de inferência: o modelo já usa todos os núcleos
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embeddings")
+        self._fila: "asyncio.Queue[Tuple[List[str], asyncio.Future]]" = None
+
+        self.pedidos = 0
+        self.lotes = 0
+        self.textos = 0
+        self.tempo_modelo_s = 0.0
+
+    async def servir(self):
+        """Abre o socket e atende até o processo ser encerrado"""
+        self._fila = asyncio.Queue()
+        if os.path.exists(self.caminho_socket):
+            os.remove(self.caminho_socket)
+
+        servidor = await asyncio.start_unix_server(self._atender, path=self.caminho_socket)
+        agrupador = asyncio.create_task(self._agrupar())
+        print(f"🧠 Servidor de embeddings ({self.backend.model_name}) em {self.caminho_socket}")
+
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            agrupador.cancel()
+            self._executor.shutdown(wait=False)
+            if os.path.exists(self.caminho_socket):
+                os.remove(self.caminho_socket)
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Atende os pedidos de uma conexão (um worker/thread), em sequência"""
+        try:
+            while True:
+                try:
+                    tamanho = CABECALHO.unpack(await reader.readexactly(CABECALHO.size))[0]
+                    pedido = json.loads(await reader.readexactly(tamanho))
+                except asyncio.IncompleteReadError:
+                    break
+
+                try:
+                    resposta = b'O' + await self._processar(pedido)
+                except Exception as e:
+                    resposta = b'E' + str(e).encode('utf-8')
+
+                writer.write(CABECALHO.pack(len(resposta)) + resposta)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _processar(self, pedido: Dict[str, Any]) -> bytes:
+        operacao = pedido.get('op')
+
+        if operacao == 'embed':
+            futuro = asyncio.get_running_loop().create_future()
+            await self._fila.put((pedido['textos'], futuro))
+            return await futuro
+
+        if operacao == 'info':
+            return json.dumps({
+                'model_name': self.backend.model_name,
+                'backend': self.backend.backend,
+                'dimensao': self.dimensao
+            }).encode('utf-8')
+
+        if operacao == 'stats':
+            return json.dumps(self.get_stats()).encode('utf-8')
+
+        raise ValueError(f"Operação inválida: {operacao}")
+
+    async def _agrupar(self):
+        """Junta os pedidos que chegam dentro da janela e os embute numa só passada"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            lote = [await self._fila.get()]
+            total = len(lote[0][0])
+            prazo = loop.time() + self.janela_ms / 1000
+
+            while total < self.max_lote:
+                restante = prazo - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self._fila.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+                total += len(lote[-1][0])
+
+            textos = [texto for textos_pedido, _ in lote for texto in textos_pedido]
+            inicio = time.perf_counter()
+            try:
+                vetores = await loop.run_in_executor(self._executor, self.backend.embed_documents, textos)
+                vetores = np.asarray(vetores, dtype=np.float32)
+            except Exception as e:
+                for _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                continue
+
+            self.pedidos += len(lote)
+            self.lotes += 1
+            self.textos += len(textos)
+            self.tempo_modelo_s += time.perf_counter() - inicio
+
+            posicao = 0
+            for textos_pedido, futuro in lote:
+                if not futuro.done():
+                    futuro.set_result(vetores[posicao:posicao + len(textos_pedido)].tobytes())
+                posicao += len(textos_pedido)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'model_name': self.backend.model_name,
+            'pedidos': self.pedidos,
+            'lotes': self.lotes,
+            'textos': self.textos,
+            'pedidos_por_lote': round(self.pedidos / self.lotes, 2) if self.lotes else 0.0,
+            'tempo_modelo_s': round(self.tempo_modelo_s, 3),
+            'janela_ms': self.janela_ms,
+            'max_lote': self.max_lote
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de embeddings compartilhado (Unix socket)")
+    parser.add_argument("--socket", default=os.getenv("EMBEDDINGS_SOCKET", SOCKET_PADRAO), help="Caminho do Unix socket")
+    parser.add_argument("--backend", default="huggingface", choices=["huggingface", "onnx", "onnx-int8"],
+                        help="Backend que carrega o modelo")
+    parser.add_argument("--modelo", default="sentence-transformers/all-MiniLM-L6-v2", help="Modelo de embeddings")
+    parser.add_argument("--janela-ms", type=float, default=2.0, help="Espera máxima para agrupar pedidos")
+    parser.add_argument("--max-lote", type=int, default=64, help="Textos que fecham o lote sem esperar")
+    args = parser.parse_args()
+
+    print(f"Carregando modelo de embeddings ({args.backend})...")
+    servidor = ServidorEmbeddings(
+        criar_backend(args.backend, args.modelo),
+        caminho_socket=args.socket,
+        janela_ms=args.janela_ms,
+        max_lote=args.max_lote
+    )
+
+    # SIGTERM encerra como Ctrl+C, removendo o socket
+    def encerrar(*_):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, encerrar)
+
+    try:
+        asyncio.run(servidor.servir())
+    except KeyboardInterrupt:
+        print("\nServidor de embeddings encerrado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Servidor LLM Falso
+Desenvolvido por: Marcio Góes do Nascimento
+
+Imita as APIs da Anthropic (/v1/messages) e da OpenAI (/v1/chat/completions)
+com latência e taxa de falhas configuráveis. Permite exercitar o caminho
+assíncrono do chatbot (achat) — concorrência, timeouts e novas tentativas —
+sem rede e sem chave de API.
+
+Uso:
+    python servidor_llm_falso.py --latencia 0.5 --taxa-falha 0.1
+
+    # Em outro terminal, apontando o chatbot para o servidor falso:
+    ANTHROPIC_BASE_URL=http://localhost:8099 ANTHROPIC_API_KEY=teste python main.py
+
+    # Teste de carga: N conversas simultâneas via achat contra o servidor falso
+    python servidor_llm_falso.py --carga 200 --latencia 1.0
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Servidor LLM Falso")
+
+CONFIG = {'latencia': 0.5, 'taxa_falha': 0.0}
+ESTATISTICAS = {'requisicoes': 0, 'falhas_simuladas': 0, 'em_andamento': 0, 'pico_concorrencia': 0}
+
+
+def _texto_resposta(mensagens) -> str:
+    ultima = mensagens[-1]['content'] if mensagens else ''
+    if isinstance(ultima, list):
+        ultima = ' '.join(parte.get('text', '') for parte in ultima)
+    pergunta = ultima.rsplit('Pergunta do usuário:', 1)[-1].split('\n')[0].strip()
+    return f"Resposta simulada para: {pergunta}"
+
+
+async def _simular_chamada():
+    """Aplica a latência configurada e, às vezes, uma falha de sobrecarga"""
+    ESTATISTICAS['requisicoes'] += 1
+    ESTATISTICAS['em_andamento'] += 1
+    ESTATISTICAS['pico_concorrencia'] = max(ESTATISTICAS['pico_concorrencia'], ESTATISTICAS['em_andamento'])
+    try:
+        await asyncio.sleep(CONFIG['latencia'])
+    finally:
+        ESTATISTICAS['em_andamento'] -= 1
+
+    if random.random() < CONFIG['taxa_falha']:
+        ESTATISTICAS['falhas_simuladas'] += 1
+        return False
+    return True
+
+
+@app.post("/v1/messages")
+async def mensagens_anthropic(request: Request):
+    """Imita POST /v1/messages da Anthropic"""
+    corpo = await request.json()
+
+    if not await _simular_chamada():
+        return JSONResponse(
+            status_code=529,
+            content={'type': 'error', 'error': {'type': 'overloaded_error', 'message': 'Sobrecarga simulada'}}
+        )
+
+    texto = _texto_resposta(corpo.get('messages', []))
+    return {
+        'id': f"msg_{uuid.uuid4().hex}",
+        'type': 'message',
+        'role': 'assistant',
+        'model': corpo.get('model', 'falso'),
+        'content': [{'type': 'text', 'text': texto}],
+        'stop_reason': 'end_turn',
+        'stop_sequence': None,
+        'usage': {'input_tokens': 0, 'output_tokens': len(texto.split())}
+    }
+
+
+@app.post("/v1/chat/completions")
+async def completions_openai(request: Request):
+    """Imita POST /v1/chat/completions da OpenAI"""
+    corpo = await request.json()
+
+    if not await _simular_chamada():
+        return JSONResponse(
+            status_code=503,
+            content={'error': {'type': 'server_error', 'message': 'Sobrecarga simulada'}}
+        )
+
+    texto = _texto_resposta(corpo.get('messages', []))
+    return {
+        'id': f"chatcmpl-{uuid.uuid4().hex}",
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': corpo.get('model', 'falso'),
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': texto},
+            'finish_reason': 'stop'
+        }],
+        'usage': {'prompt_tokens': 0, 'completion_tokens': len(texto.split()), 'total_tokens': len(texto.split())}
+    }
+
+
+@app.get("/estatisticas")
+async def estatisticas():
+    """Requisições recebidas, falhas simuladas e pico de concorrência"""
+    return ESTATISTICAS
+
+
+def testar_carga(porta: int, conversas: int, provedor: str):
+    """Dispara conversas simultâneas via achat contra o servidor falso"""
+    from chatbot import RAGChatbot, MENSAGEM_ERRO_LLM
+
+    if provedor == 'anthropic':
+        os.environ['ANTHROPIC_BASE_URL'] = f"http://127.0.0.1:{porta}"
+        os.environ.setdefault('ANTHROPIC_API_KEY', 'teste')
+    else:
+        os.environ['OPENAI_BASE_URL'] = f"http://127.0.0.1:{porta}/v1"
+        os.environ.setdefault('OPENAI_API_KEY', 'teste')
+
+    chatbot = RAGChatbot(rag_engine=None, llm_provider=provedor)
+
+    async def executar():
+        inicio = time.perf_counter()
+        respostas = await asyncio.gather(*[
+            chatbot.achat(f"Pergunta {i}", use_rag=False) for i in range(conversas)
+        ])
+        duracao = time.perf_counter() - inicio
+        await chatbot.aclose()
+        return respostas, duracao
+
+    respostas, duracao = asyncio.run(executar())
+    erros = sum(1 for r in respostas if r['response'].startswith(MENSAGEM_ERRO_LLM))
+
+    print("=" * 60)
+    print("📊 TESTE DE CARGA DO CHATBOT ASSÍNCRONO")
+    print("=" * 60)
+    print(f"   Conversas:            {conversas}")
+    print(f"   Latência simulada:    {CONFIG['latencia']:.2f}s")
+    print(f"   Tempo total:          {duracao:.2f}s")
+    print(f"   Pico de concorrência: {ESTATISTICAS['pico_concorrencia']}")
+    print(f"   Falhas simuladas:     {ESTATISTICAS['falhas_simuladas']}")
+    print(f"   Respostas com erro:   {erros}")
+    print(f"   Métricas do chatbot:  {chatbot.get_metricas()['llm_async']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor LLM falso (Anthropic/OpenAI)")
+    parser.add_argument("--porta", type=int, default=8099, help="Porta do servidor")
+    parser.add_argument("--latencia", type=float, default=0.5, help="Latência de cada resposta, em segundos")
+    parser.add_argument("--taxa-falha", type=float, default=0.0, help="Fração de respostas com erro de sobrecarga")
+    parser.add_argument("--carga", type=int, default=0, help="Dispara N conversas simultâneas e encerra")
+    parser.add_argument("--provedor", choices=["anthropic", "openai"], default="anthropic", help="API usada no teste de carga")
+    args = parser.parse_args()
+
+    CONFIG['latencia'] = args.latencia
+    CONFIG['taxa_falha'] = args.taxa_falha
+
+    if not args.carga:
+        print(f"🤖 Servidor LLM falso em http://localhost:{args.porta}")
+        uvicorn.run(app, host="0.0.0.0", port=args.porta)
+        return
+
+    servidor = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.porta, log_level="warning"))
+    thread = threading.Thread(target=servidor.run, daemon=True)
+    thread.start()
+    while not servidor.started:
+        time.sleep(0.05)
+
+    try:
+        testar_carga(args.porta, args.carga, args.provedor)
+    finally:
+        servidor.should_exit = True
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Upload em Streaming
+Desenvolvido por: Marcio Góes do Nascimento
+
+Grava os arquivos enviados em blocos, com escrita assíncrona (aiofiles),
+sem bloquear o event loop. O limite de tamanho é verificado e o SHA-256
+é calculado durante a própria gravação; o hash identifica envios
+repetidos do mesmo arquivo.
+
+O corpo da requisição já chega aqui gravado pelo Starlette, que processa
+o multipart antes da rota (UploadFile): salvar_upload copia esse arquivo
+temporário para uploads/. O que barra um envio grande antes da recepção é
+o Content-Length, verificado pelo middleware de main.py.
+
+Arquivos ZIP são expandidos com os mesmos limites, contados sobre os bytes
+realmente descompactados (o tamanho declarado no ZIP pode ser falso).
+"""
+
+import hashlib
+import os
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import aiofiles
+
+TAMANHO_BLOCO = 1024 * 1024
+
+
+class TamanhoExcedidoError(ValueError):
+    """Levantada quando um arquivo ou o conjunto enviado passa do limite"""
+
+
+def _mb(limite_bytes: int) -> str:
+    return f"{limite_bytes / (1024 * 1024):g} MB"
+
+
+async def salvar_upload(arquivo,
+                        destino: Path,
+                        limite_bytes: Optional[int] = None,
+                        tamanho_bloco: int = TAMANHO_BLOCO) -> Dict[str, Any]:
+    """
+    Grava um UploadFile em disco, bloco a bloco
+
+    Args:
+        arquivo: UploadFile recebido pela rota
+        destino: Caminho do arquivo gravado
+        limite_bytes: Tamanho máximo aceito (None = sem limite)
+        tamanho_bloco: Bytes lidos e gravados por vez
+
+    Returns:
+        Dict com tamanho (bytes) e sha256
+
+    Raises:
+        TamanhoExcedidoError: Se o arquivo passar do limite (o arquivo
+            parcial é removido)
+    """
+    sha256 = hashlib.sha256()
+    tamanho = 0
+
+    try:
+        async with aiofiles.open(destino, 'wb') as saida:
+            while True:
+                bloco = await arquivo.read(tamanho_bloco)
+                if not bloco:
+                    break
+
+                tamanho += len(bloco)
+                if limite_bytes is not None and tamanho > limite_bytes:
+                    raise TamanhoExcedidoError(f"'{arquivo.filename}' excede o limite de {_mb(limite_bytes)}")
+
+                sha256.update(bloco)
+                await saida.write(bloco)
+    except BaseException:
+        if os.path.exists(destino):
+            os.remove(destino)
+        raise
+
+    return {'tamanho': tamanho, 'sha256': sha256.hexdigest()}
+
+
+def expandir_zip(caminho_zip: Path,
+                 diretorio: Path,
+                 extensoes: Iterable[str],
+                 limite_arquivo: Optional[int] = None,
+                 limite_total: Optional[int] = None,
+                 max_arquivos: Optional[int] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+    """
+    Extrai os documentos suportados de um ZIP
+
+    Cada documento é gravado com um nome único no diretório; o caminho dentro
+    do ZIP vira apenas o nome do documento, nunca um caminho no disco.
+
+    Args:
+        caminho_zip: Arquivo ZIP
+        diretorio: Diretório onde os documentos são gravados
+        extensoes: Extensões aceitas (as demais entradas são rejeitadas)
+        limite_arquivo: Tamanho máximo de cada documento descompactado
+        limite_total: Tamanho máximo da soma dos documentos descompactados
+        max_arquivos: Número máximo de documentos
+
+    Returns:
+        Tupla (arquivos, rejeitados): arquivos com filename, caminho, tamanho
+        e sha256; rejeitados com filename e erro
+
+    Raises:
+        TamanhoExcedidoError: Se o total ou o número de documentos passar do
+            limite (nada fica gravado)
+        ValueError: Se o arquivo não for um ZIP válido
+    """
+    extensoes = set(extensoes)
+    arquivos: List[Dict[str, Any]] = []
+    rejeitados: List[Dict[str, str]] = []
+    total = 0
+
+    try:
+        with zipfile.ZipFile(caminho_zip) as arquivo_zip:
+            for info in arquivo_zip.infolist():
+                nome = info.filename
+                # Pastas e metadados do Finder (macOS) não são documentos
+                if info.is_dir() or nome.startswith('__MACOSX/') or Path(nome).name.startswith('._'):
+                    continue
+
+                ext = Path(nome).suffix.lower()
+                if ext not in extensoes:
+                    rejeitados.append({'filename': nome, 'erro': f"Formato não suportado: {ext}"})
+                    continue
+
+                if max_arquivos is not None and len(arquivos) >= max_arquivos:
+                    raise TamanhoExcedidoError(f"O envio excede o limite de {max_arquivos} documentos")
+
+                destino = Path(diretorio) / f"{uuid.uuid4().hex}_{Path(nome).name}"
+                try:
+                    tamanho, sha256 = _extrair_membro(arquivo_zip, info, destino, limite_arquivo)
+                except TamanhoExcedidoError as e:
+                    rejeitados.append({'filename': nome, 'erro': str(e)})
+                    continue
+                except (RuntimeError, zipfile.BadZipFile, NotImplementedError) as e:
+                    # Membro criptografado, corrompido ou com compressão não suportada
+                    rejeitados.append({'filename': nome, 'erro': str(e)})
+                    continue
+
+                arquivos.append({'filename': nome, 'caminho': destino, 'tamanho': tamanho, 'sha256': sha256})
+                total += tamanho
+                if limite_total is not None and total > limite_total:
+                    raise TamanhoExcedidoError(f"O conteúdo descompactado do ZIP excede o limite de {_mb(limite_total)}")
+    except BaseException as e:
+        for arquivo in arquivos:
+            if os.path.exists(arquivo['caminho']):
+                os.remove(arquivo['caminho'])
+        if isinstance(e, zipfile.BadZipFile):
+            raise ValueError("Arquivo ZIP inválido ou corrompido") from e
+        raise
+
+    return arquivos, rejeitados
+
+
+def _extrair_membro(arquivo_zip: zipfile.ZipFile,
+                    info: zipfile.ZipInfo,
+                    destino: Path,
+                    limite_bytes: Optional[int]) -> Tuple[int, str]:
+    """Descompacta um membro do ZIP em blocos, com limite e hash"""
+    sha256 = hashlib.sha256()
+    tamanho = 0
+
+    try:
+        with arquivo_zip.open(info) as origem, open(destino, 'wb') as saida:
+            while True:
+                bloco = origem.read(TAMANHO_BLOCO)
+                if not bloco:
+                    break
+
+                tamanho += len(bloco)
+                if limite_bytes is not None and tamanho > limite_bytes:
+                    raise TamanhoExcedidoError(f"'{info.filename}' excede o limite de {_mb(limite_bytes)}")
+
+                sha256.update(bloco)
+                saida.write(bloco)
+    except BaseException:
+        if os.path.exists(destino):
+            os.remove(destino)
+        raise
+
+    return tamanho, sha256.hexdigest()